@@ -0,0 +1,205 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import kurtosis, skew
+
+from optimizer import PortfolioOptimizer
+
+
+TRADING_DAYS = 252
+MIN_COVERAGE = 0.9 # share of the lookback window a candidate needs prices for, otherwise it's left out of that window
+DEFAULTS = {
+    'cutoff': 7, # B-Score a ticker needs in the latest screening run before the rebalance date
+    'objective': 'sharpe',
+    'lower': 0.0,
+    'upper': 0.4,
+    'lambda_penalty': 0.5,
+    'risk_free_rate': 0.0,
+}
+
+
+def point_in_time(history, country=None, universe=None):
+    # every screening run as {run date: [(ticker, score)] best first}, from results_history.ResultsHistory
+    rows = history.query(country=country, universe=universe, columns=['date', 'Ticker', 'score'])
+    runs = {}
+    if rows.is_empty():
+        return runs
+    for date, ticker, score in rows.sort(['date', 'score'], descending=[False, True]).iter_rows():
+        runs.setdefault(pd.Timestamp(date), []).append((ticker, score))
+    return runs
+
+
+def rebalance_dates(index, every='M', start=None, end=None):
+    # the last trading day of every week ('W'), month ('M') or quarter ('Q') of a price index
+    days = pd.Series(index, index=index).loc[start:end]
+    return pd.DatetimeIndex(days.groupby(days.index.to_period(every)).max().to_numpy())
+
+
+def portfolio_statistics(returns, risk_free_rate=0.0, periods=TRADING_DAYS):
+    # sortino.ipynb's detailed_portfolio_statistics for a daily return series, CVaR historical (95%)
+    r = np.asarray(returns, dtype=float)
+    equity = np.cumprod(1 + r)
+    annual = equity[-1] ** (periods / len(r)) - 1 if len(r) else np.nan
+    vol = r.std(ddof=1) * np.sqrt(periods)
+    downside = r[r < 0].std(ddof=1) * np.sqrt(periods)
+    tail = np.sort(r)[:max(1, int(len(r) * 0.05))]
+    return {
+        'annual_return': annual,
+        'volatility': vol,
+        'skewness': skew(r),
+        'kurtosis': kurtosis(r),
+        'max_drawdown': (equity / np.maximum.accumulate(equity) - 1).min(),
+        'count': len(r),
+        'sharpe': (annual - risk_free_rate) / vol,
+        'cvar': -tail.mean(),
+        'sortino': annual / downside,
+        'variance': vol ** 2,
+    }
+
+
+# ---- optimization jobs, one per (rebalance date, candidate set, parameters); run in worker processes
+
+_PANEL = {}
+
+
+def _init(log_returns, columns):
+    _PANEL['returns'], _PANEL['columns'] = log_returns, {ticker: i for i, ticker in enumerate(columns)}
+
+
+def _solve(job):
+    position, lookback, tickers, objective, lower, upper, lambda_penalty, risk_free_rate = job
+    returns, columns = _PANEL['returns'], _PANEL['columns']
+    window = returns[max(position - lookback + 1, 0):position + 1, [columns[t] for t in tickers]]
+    keep = np.isnan(window).mean(axis=0) <= 1 - MIN_COVERAGE
+    tickers = [t for t, ok in zip(tickers, keep) if ok]
+    window = window[:, keep]
+    window = window[~np.isnan(window).any(axis=1)]
+    if not tickers or len(window) < 2:
+        return {}
+    if len(tickers) == 1:
+        return {tickers[0]: 1.0}
+    # with fewer candidates than 1 / upper the cap can't hold; it's relaxed to equal weight
+    optimizer = PortfolioOptimizer(pd.DataFrame(window, columns=tickers), risk_free_rate, lower, max(upper, 1 / len(tickers)))
+    params = {'lambda_penalty': lambda_penalty} if objective == 'sharpe' else {}
+    res = optimizer.solve(objective, **params)
+    weights = res.x if res.x is not None and res.success else optimizer.initial_weights()
+    return dict(zip(tickers, np.clip(weights, 0, None) / np.clip(weights, 0, None).sum()))
+
+
+class WalkForward:
+    """
+    Walk-forward backtest of B-Score selection + portfolio optimization.
+
+    On every rebalance date the tickers of the latest screening run up to that date with
+    score >= cutoff are optimized on the previous `lookback` days of log returns (PortfolioOptimizer),
+    and held until the next rebalance. Windows are solved in a process pool (the return panel is
+    sent to each worker once); identical jobs across a parameter sweep are solved once. P&L, drift
+    and turnover are computed for all holding periods at once.
+    """
+
+    def __init__(self, prices, runs, every='M', lookback=TRADING_DAYS, start=None, end=None, cost_bps=10.0, workers=None):
+        self.prices = prices.sort_index()
+        self.runs = runs # point_in_time(): {run date: [(ticker, score)]}
+        self.run_dates = np.array(sorted(runs), dtype='datetime64[ns]')
+        self.lookback = lookback
+        self.cost = cost_bps / 1e4
+        self.workers = workers
+        first_run = pd.Timestamp(self.run_dates[0]) if len(self.run_dates) else None
+        start = max(filter(None, (pd.Timestamp(start) if start else None, first_run)), default=None) # no rebalance before the first screen
+        self.dates = rebalance_dates(self.prices.index, every, start, end)
+        self.positions = self.prices.index.get_indexer(self.dates)
+        self.tickers = list(self.prices.columns)
+        self.log_returns = np.log(self.prices / self.prices.shift(1)).to_numpy()
+        self.simple_returns = np.nan_to_num(self.prices.pct_change(fill_method=None).to_numpy()) # delisted / missing days earn nothing
+
+    def candidates(self, date, cutoff):
+        i = np.searchsorted(self.run_dates, np.datetime64(date), side='right') - 1
+        if i < 0:
+            return ()
+        listed = set(self.tickers)
+        return tuple(t for t, score in self.runs[pd.Timestamp(self.run_dates[i])] if score >= cutoff and t in listed)
+
+    def _jobs(self, params):
+        p = {**DEFAULTS, **params}
+        return [(int(position), self.lookback, self.candidates(date, p['cutoff']), p['objective'], p['lower'], p['upper'],
+                 p['lambda_penalty'], p['risk_free_rate'])
+                for date, position in zip(self.dates, self.positions)]
+
+    def _solve_all(self, jobs):
+        unique = list(dict.fromkeys(jobs))
+        workers = min(self.workers or os.cpu_count() or 1, len(unique)) or 1
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(self.log_returns, self.tickers)) as pool:
+                solved = list(pool.map(_solve, unique, chunksize=max(1, len(unique) // (4 * workers))))
+        else:
+            _init(self.log_returns, self.tickers)
+            solved = [_solve(job) for job in unique]
+        return dict(zip(unique, solved))
+
+    def run(self, **params):
+        return self.sweep([params])[0]
+
+    def sweep(self, grid):
+        """
+        One result per parameter set; grid is a list of dicts or a dict of lists (their product),
+        e.g. {'cutoff': [6, 7, 8], 'upper': [0.2, 0.4], 'lambda_penalty': [0.1, 0.5, 2]}.
+        """
+        if isinstance(grid, dict):
+            grid = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+        jobs = [self._jobs(params) for params in grid]
+        solved = self._solve_all([job for per_params in jobs for job in per_params])
+        return [self._result({**DEFAULTS, **params}, [solved[job] for job in per_params]) for params, per_params in zip(grid, jobs)]
+
+    def _result(self, params, allocations):
+        columns = {t: i for i, t in enumerate(self.tickers)}
+        weights = np.zeros((len(self.dates), len(self.tickers)))
+        for i, allocation in enumerate(allocations):
+            for ticker, w in allocation.items():
+                weights[i, columns[ticker]] = w
+        returns, turnover = self._pnl(weights)
+        index = self.prices.index[self.positions[0] + 1:] if len(self.positions) else self.prices.index[:0]
+        returns = pd.Series(returns, index=index, name='return')
+        stats = portfolio_statistics(returns, params['risk_free_rate']) if len(returns) > 1 else {}
+        stats['turnover'] = turnover.sum() / max(len(returns) / TRADING_DAYS, 1e-9) / 2 # one-way, per year
+        return {
+            'params': params,
+            'returns': returns,
+            'equity': (1 + returns).cumprod().rename('equity'),
+            'weights': pd.DataFrame(weights, index=self.dates, columns=self.tickers).loc[:, weights.any(axis=0)],
+            'turnover': pd.Series(turnover, index=self.dates, name='turnover'),
+            'stats': stats,
+        }
+
+    def _pnl(self, weights):
+        # daily returns after costs and per-rebalance turnover (sum |w_new - w_drifted|), all holding periods at once
+        if not len(self.positions):
+            return np.zeros(0), np.zeros(0)
+        first = self.positions[0]
+        r = self.simple_returns[first + 1:]
+        period = np.searchsorted(self.positions, np.arange(first + 1, first + 1 + len(r)), side='left') - 1 # holding period of each day
+        growth = np.exp(pd.DataFrame(np.log1p(r)).groupby(period).cumsum().to_numpy()) # per-asset growth since the period's rebalance
+        held = weights[period]
+        value = (growth * held).sum(axis=1) + (1 - held.sum(axis=1)) # uninvested weight stays in cash
+        starts = np.r_[True, period[1:] != period[:-1]]
+        previous = np.where(starts, 1.0, np.r_[1.0, value[:-1]])
+        daily = value / previous - 1
+
+        # weights drifted to the end of each period are what the next rebalance trades from (cash before the first)
+        ends = np.r_[np.flatnonzero(starts)[1:] - 1, len(r) - 1]
+        ends = ends[period[ends] + 1 < len(weights)]
+        drifted = np.zeros_like(weights)
+        drifted[period[ends] + 1] = growth[ends] * held[ends] / value[ends, None]
+        turnover = np.abs(weights - drifted).sum(axis=1)
+        daily[np.flatnonzero(starts)] -= self.cost * turnover[period[starts]]
+        return daily, turnover
+
+    def summary(self, results):
+        # one row per parameter set: the parameters and the statistics
+        return pd.DataFrame([{**r['params'], **r['stats']} for r in results])
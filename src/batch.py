@@ -0,0 +1,109 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import portfolio_statistics
+
+
+# ---- jobs: (objective, lower, upper, sorted params), solved in worker processes against one shared optimizer
+
+_OPTIMIZER = {}
+
+
+def _init(optimizer):
+    _OPTIMIZER['optimizer'] = optimizer
+
+
+def _solve(key):
+    objective, lower, upper, params = key
+    try:
+        optimizer = _OPTIMIZER['optimizer'].with_bounds(lower, upper)
+    except ValueError as e: # bounds with no fully invested portfolio
+        return None, str(e)
+    return optimizer.solve(objective, **dict(params)), None
+
+
+def _key(optimizer, job):
+    job = {'objective': job} if isinstance(job, str) else dict(job)
+    objective = job.pop('objective')
+    lower, upper = job.pop('lower', optimizer.lower), job.pop('upper', optimizer.upper)
+    return objective, float(lower), float(upper), tuple(sorted(job.items()))
+
+
+def grid(objectives, bounds=None, **params):
+    """
+    Job list of every objective x (lower, upper) bound pair; params (lists) are crossed in only for the
+    objectives that take them, e.g. grid(OBJECTIVES[:3], [(0, 0.2), (0, 0.4)], lambda_penalty=[0, 0.5]).
+    """
+    takes = {'sharpe': {'lambda_penalty'}, 'utility': {'risk_aversion'},
+             'cvar': {'beta', 'scenarios', 'block', 'seed', 'target_return'}}
+    jobs = []
+    for objective, (lower, upper) in itertools.product(objectives, bounds or [(None, None)]):
+        own = {name: values for name, values in params.items() if name in takes.get(objective, ())}
+        for values in itertools.product(*own.values()):
+            job = {'objective': objective, **dict(zip(own, values))}
+            if lower is not None:
+                job['lower'] = lower
+            if upper is not None:
+                job['upper'] = upper
+            jobs.append(job)
+    return jobs
+
+
+def optimize_batch(optimizer, jobs, workers=None):
+    """
+    Solve many objective / bound combinations on one optimizer.PortfolioOptimizer.
+
+    jobs are objective names or dicts {'objective': ..., 'lower': ..., 'upper': ..., **params}
+    (missing bounds are the optimizer's). The returns and moments are the optimizer's, computed once;
+    the optimizer is sent to each worker once (pool initializer) and identical jobs are solved once.
+    Returns one dict per job, in order: objective, lower, upper, params, result (OptimizeResult,
+    None for infeasible bounds), weights (Series) and statistics (backtest.portfolio_statistics of the
+    daily portfolio returns).
+    """
+    keys = [_key(optimizer, job) for job in jobs]
+    unique = list(dict.fromkeys(keys))
+    workers = min(workers or os.cpu_count() or 1, len(unique)) or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(optimizer,)) as pool:
+            solved = dict(zip(unique, pool.map(_solve, unique)))
+    else:
+        _init(optimizer)
+        solved = {key: _solve(key) for key in unique}
+
+    # statistics once per distinct solution, all portfolio return series in one matrix product
+    found = [key for key in unique if solved[key][0] is not None and solved[key][0].x is not None]
+    weights = np.array([solved[key][0].x for key in found]).reshape(len(found), len(optimizer.tickers))
+    daily = optimizer.returns @ weights.T
+    statistics = {key: portfolio_statistics(daily[:, i], optimizer.risk_free_rate, optimizer.periods) for i, key in enumerate(found)}
+
+    results = []
+    for objective, lower, upper, params in keys:
+        key = objective, lower, upper, params
+        res, error = solved[key]
+        x = res.x if res is not None and res.x is not None else None
+        results.append({
+            'objective': objective,
+            'lower': lower,
+            'upper': upper,
+            'params': dict(params),
+            'result': res,
+            'success': bool(res is not None and res.success),
+            'message': error if res is None else str(res.message),
+            'weights': pd.Series(x, index=optimizer.tickers, name=objective) if x is not None else None,
+            'statistics': statistics.get(key, {}),
+        })
+    return results
+
+
+def summary(results):
+    # one row per job: objective, bounds, parameters and statistics
+    return pd.DataFrame([{'objective': r['objective'], 'lower': r['lower'], 'upper': r['upper'], **r['params'],
+                          'success': r['success'], **r['statistics']} for r in results])
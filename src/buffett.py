@@ -2,22 +2,32 @@
 # SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland 
 # SPDX-License-Identifier: MIT
 
-import yfinance as yf
-import pandas as pd
-from dotenv import load_dotenv
-import os
-import requests
-from pykrx import stock
+# importable library + CLI. importing this module does no network I/O and no input();
+# yfinance, pykrx, pandas, bs4 and openpyxl are only imported when a run actually needs them.
+#   python src/buffett.py --country KR --limit 300
+#   python src/buffett.py --country US --universe nasdaq100 --output results/ndx.xlsx
+#   python src/buffett.py --country US --universe sp500 --incremental   # daily rerun on top of the previous run
+
+import argparse
+import asyncio
 import datetime as dt
-import openpyxl
+import io
 import math
-from queue import Queue
-import threading
+import os
 import time
+from collections import Counter
 import polars as pl
-import shelve
-from bs4 import BeautifulSoup
-from urllib.request import urlopen
+from fundamentals_cache import CACHE_FILE, FundamentalsCache
+from snapshot import TickerSnapshot
+from industry_benchmarks import IndustryBenchmarks
+from fetch_engine import MAX_WORKERS, FetchEngine
+from momentum import MOMENTUM_WINDOWS, get_momentum_batch
+from scoring import RAW_METRICS_SCHEMA, raw_metrics_frame, raw_metrics_row, score_frame
+from results_store import ResultsStore
+from http_archive import HttpArchive
+from metrics import NULL_METRICS, Metrics
+from run_diff import summarize, write_diff
+from results_history import RUN_COLUMNS, ResultsHistory, format_change, format_momentum, format_price
 
 
 ################ DEPENDENCIES ###########################
@@ -29,8 +39,15 @@ from urllib.request import urlopen
 
 ################ PREDETERMINED FIELDS ###################
 
-NUM_THREADS = 20 #multithreading 
+NUM_WORKERS = 32 # tickers in flight at once; per-host request limits live in fetch_engine.HOST_LIMITS
+SAMPLE_EVERY = 0.5 # seconds between queue-depth samples when metrics are on
+# incremental runs: a ticker is fully refetched when one of these info dates passed since its last full fetch,
+# or when that fetch is older than FULL_REFRESH_DAYS; everything else only gets its price-dependent fields updated
+EVENT_FIELDS = ('earningsTimestamp', 'earningsTimestampStart', 'exDividendDate', 'dividendDate')
+FULL_REFRESH_DAYS = 7
+STATEMENT_DATASETS = ('info', 'financials', 'balance_sheet', 'dividends', 'quarterly_earnings')
 CUTOFF = 5
+US_CUTOFF_ADJUSTMENT = 2 #오버슈팅 오차조정
 lee_kw_list = [ #2025 이재명 정부 수혜주
     "Semiconductors",
     "Artificial Intelligence",
@@ -50,52 +67,52 @@ lee_kw_list = [ #2025 이재명 정부 수혜주
 
 #########################################################
 
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache')
+RESULTS_DIR = os.path.join(ROOT_DIR, 'results')
 
-country = input('Country (KR, JP, CH, US, UK 중 선택): ').upper() 
-if country == 'US': 
-    country = None
-    CUTOFF -= 2 #오버슈팅 오차조정
-
-if not country:
-    limit = 100
-else:
-    limit = int(float(input('Limit: '))) #input always accepts a str
-
-if not country:
-    sp500 = input('S&P500? (y/n, n for NASDAQ100): ').lower().strip() == 'y' # False for nasdaq100
-else:
-    sp500 = True
-
-print('May take up to few minutes...')
+COUNTRIES = ('KR', 'JP', 'CH', 'US', 'UK')
+UNIVERSES = ('sp500', 'nasdaq100')
 
-today = dt.datetime.today().weekday()
-weekend = today - 4 # returns 1 for saturday, 2 for sunday
-formattedDate = (dt.datetime.today() - dt.timedelta(days = weekend)).strftime("%Y%m%d") if today >= 5 else dt.datetime.today().strftime("%Y%m%d")
 
-dfKospi = stock.get_market_fundamental(formattedDate, market="ALL")
+def latest_business_date(today=None):
+    # saturday/sunday fall back to friday
+    today = today or dt.datetime.today()
+    weekend = today.weekday() - 4 # returns 1 for saturday, 2 for sunday
+    return (today - dt.timedelta(days = weekend)).strftime("%Y%m%d") if today.weekday() >= 5 else today.strftime("%Y%m%d")
 
-data = []
-data_lock = threading.Lock()
+def get_fmp_key():
+    from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+    # Load environment variables from .env file
+    load_dotenv()
+    return os.getenv("FMP_API_KEY")
 
-# Get the API key
-fmp_key = os.getenv("FMP_API_KEY")
-
-def get_tickers(country: str, limit: int, sp500: bool):
+def get_tickers(country: str, limit: int, sp500: bool, http_get=None):
     if country is not None:
-        return get_tickers_by_country(country, limit, fmp_key) #US, JP, KR
-    elif sp500:
-        return pl.read_csv("https://datahub.io/core/s-and-p-500-companies/r/constituents.csv")["Symbol"].to_list()
+        return get_tickers_by_country(country, limit, get_fmp_key(), http_get) #US, JP, KR
+    if http_get is None:
+        import requests
+        http_get = requests.get
+    # fetched with http_get (not by polars/pandas themselves) so the request goes through the engine and the HTTP archive
+    if sp500:
+        constituents = http_get("https://datahub.io/core/s-and-p-500-companies/r/constituents.csv")
+        return pl.read_csv(io.BytesIO(constituents.content))["Symbol"].to_list()
     elif not sp500:
+        import pandas as pd
+
         nasdaq100_url = 'https://en.wikipedia.org/wiki/NASDAQ-100'
-        nasdaq100 = pd.read_html(nasdaq100_url, header=0)[4] # Might need to adjust index (5th table on the page)
+        page = http_get(nasdaq100_url, headers={'User-Agent': 'Mozilla/5.0'})
+        nasdaq100 = pd.read_html(io.StringIO(page.text), header=0)[4] # Might need to adjust index (5th table on the page)
         return nasdaq100['Ticker'].tolist()
     else:
         raise Exception("No tickers list satisfies the given parameter")
 
-def get_tickers_by_country(country: str, limit: int = 100, apikey: str = 'your_api_key'):
+def get_tickers_by_country(country: str, limit: int = 100, apikey: str = 'your_api_key', http_get=None):
+    if http_get is None:
+        import requests
+        http_get = requests.get
+
     url = 'https://financialmodelingprep.com/api/v3/stock-screener'
     params = {
         'country': country,
@@ -109,10 +126,15 @@ def get_tickers_by_country(country: str, limit: int = 100, apikey: str = 'your_a
         # 'sector' : Consumer Cyclical | Energy | Technology | Industrials | Financial Services | Basic Materials | Communication Services | Consumer Defensive | Healthcare | Real Estate | Utilities | Industrial Goods | Financial | Services | Conglomerates
         # 'exchange' : nyse | nasdaq | amex | euronext | tsx | etf | mutual_fund
     }
-    response = requests.get(url, params=params)
+    response = http_get(url, params=params)
     data = response.json()
     return [item['symbol'] for item in data]
 
+def load_krx_fundamentals(date):
+    from pykrx import stock
+
+    return stock.get_market_fundamental(date, market="ALL")
+
 # buffett's philosophy & my quant ideas
 def buffett_score (de, cr, pbr, per, ind_per, roe, ind_roe, roa, ind_roa, eps, div, icr):
     score = 0
@@ -186,16 +208,15 @@ def buffett_score (de, cr, pbr, per, ind_per, roe, ind_roe, roa, ind_roa, eps, d
          
     return score
 
-def getFs (item, ticker):
+def getFs (item, ticker, df_kospi):
     # for country == 'KR' only
     try:
-        return dfKospi.loc[ticker[:6], item] 
+        return df_kospi.loc[ticker[:6], item] 
     except:
         return None
 
-def has_stable_dividend_growth(ticker):
-    stock = yf.Ticker(ticker)
-    divs = stock.dividends
+def has_stable_dividend_growth(snapshot: TickerSnapshot):
+    divs = snapshot.dividends
     # Ensure we have at least 10 years of data
     if divs.empty:
         return False
@@ -217,9 +238,8 @@ def has_stable_dividend_growth(ticker):
     tolerance = 0.85 # tolerance band to account for crises and minor dividend cuts
     return all(earlier * tolerance <= later for earlier, later in zip(last_10_divs, last_10_divs[1:])) # zip returns [(2015div, 2016div), (2016div, 2017div), ..., (2024div, 2025div)]
     
-def has_stable_dividend_growth_cagr(ticker):
-    stock = yf.Ticker(ticker)
-    divs = stock.dividends
+def has_stable_dividend_growth_cagr(snapshot: TickerSnapshot):
+    divs = snapshot.dividends
     # Ensure we have at least 10 years of data
     if divs.empty:
         return None
@@ -244,11 +264,9 @@ def has_stable_dividend_growth_cagr(ticker):
         cagr = ((div_end / div_start) ** (1/len(last_10_divs))) - 1
         return cagr
     
-def has_stable_eps_growth(ticker):
-    ticker = yf.Ticker(ticker)
-
+def has_stable_eps_growth(snapshot: TickerSnapshot):
     # Get annual income statement
-    income_stmt = ticker.financials # Annual by default
+    income_stmt = snapshot.financials # Annual by default
 
     # Make sure EPS is in the statement
     if "Diluted EPS" in income_stmt.index:
@@ -262,11 +280,9 @@ def has_stable_eps_growth(ticker):
         return False
 
 
-def has_stable_eps_growth_quarterly(ticker):
-    ticker = yf.Ticker(ticker)
-
+def has_stable_eps_growth_quarterly(snapshot: TickerSnapshot):
     # Get quarterly earnings data (contains actual EPS in 'Earnings' column)
-    quarterly_eps = ticker.quarterly_earnings
+    quarterly_eps = snapshot.quarterly_earnings
 
     # Make sure there is enough data
     if quarterly_eps is None or quarterly_eps.empty or len(quarterly_eps) < 8:
@@ -283,11 +299,9 @@ def has_stable_eps_growth_quarterly(ticker):
     # Check stable growth: every EPS >= 90% of previous EPS
     return all(earlier * tolerance <= later for earlier, later in zip(eps_list, eps_list[1:]))
 
-def has_stable_eps_growth_cagr(ticker):
-    ticker = yf.Ticker(ticker)
-
+def has_stable_eps_growth_cagr(snapshot: TickerSnapshot):
     # Get annual income statement
-    income_stmt = ticker.financials # Annual by default
+    income_stmt = snapshot.financials # Annual by default
 
     # Make sure EPS is in the statement
 
@@ -314,8 +328,8 @@ def has_stable_eps_growth_cagr(ticker):
 
 
 # gets the most recent interest coverage ratio available
-def get_interest_coverage_ratio(ticker):
-    financials = yf.Ticker(ticker).financials # Annual financials, columns = dates (most recent first)
+def get_interest_coverage_ratio(snapshot: TickerSnapshot):
+    financials = snapshot.financials # Annual financials, columns = dates (most recent first)
     ratio = None
     for date in financials.columns:
         if date.year < dt.datetime.today().year - 5: # sift out old data
@@ -341,11 +355,9 @@ def bvps_undervalued(bvps, current):
     else:
         return False
 
-def has_stable_book_value_growth(ticker, sector: str):
-    ticker = yf.Ticker(ticker)
-
+def has_stable_book_value_growth(snapshot: TickerSnapshot, sector: str):
     # Get annual balance sheet
-    balance_sheet = ticker.balance_sheet # Columns are by period (most recent first)
+    balance_sheet = snapshot.balance_sheet # Columns are by period (most recent first)
 
     # Reverse columns to go oldest → newest
     balance_sheet = balance_sheet.iloc[:, ::-1]
@@ -372,10 +384,9 @@ def has_stable_book_value_growth(ticker, sector: str):
     tolerance = 0.85 if sector in {'Industrials', 'Technology', 'Energy', 'Consumer Cyclical', 'Basic Materials'} else 0.9 #set is faster than list in checking O(1) avg
     return all(earlier * tolerance <= later for earlier, later in zip(book_values, book_values[1:]))
 
-def get_esg_score(ticker):
+def get_esg_score(snapshot: TickerSnapshot):
     ans = ''
-    ticker = yf.Ticker(ticker)
-    esg = ticker.sustainability
+    esg = snapshot.sustainability
     try:
         sust = esg.loc['totalEsg', 'esgScores']
         rateY = esg.loc['esgPerformance', 'esgScores']
@@ -385,140 +396,34 @@ def get_esg_score(ticker):
     finally:
         return ans
 
-def get_percentage_change(ticker):
-    ticker = yf.Ticker(ticker)
-
+def get_percentage_change(snapshot: TickerSnapshot):
     # Get last 2 days of price data
-    data = ticker.history(period="2d")
+    data = snapshot.history
 
     # Check if we have at least 2 days and prev_close is not zero
     if len(data) >= 2:
-        prev_close = data['Close'].iloc[-2]
-        last_close = data['Close'].iloc[-1]
-
-        if prev_close != 0:
-            percent_change = ((last_close - prev_close) / prev_close) * 100
-            if percent_change >= 0:
-                return (f" (+{percent_change:.2f}%)")  # e.g., (-6.20%)
-            else:
-                return (f" ({percent_change:.2f}%)")  # e.g., (-6.20%)
-        else:
-            return ' ()'
+        return percentage_change(data['Close'].iloc[-2], data['Close'].iloc[-1])
     else:
-        return ' ()'
-
-# FullRatio의 산업별 PER 페이지 URL
-url = 'https://fullratio.com/pe-ratio-by-industry'
-headers = {'User-Agent': 'Mozilla/5.0'}
-
-response = requests.get(url, headers=headers)
-soup = BeautifulSoup(response.text, 'html.parser')
-
-# 테이블 찾기 (이때 table이 None인지 체크)
-table = soup.find('table')
-if table is None:
-    raise Exception("테이블을 찾을 수 없습니다. 구조가 바뀌었거나 JS로 로딩될 수 있습니다.")
-
-# tbody가 있는 경우
-tbody = table.find('tbody')
-if tbody:
-    rows = tbody.find_all('tr')
-else:
-    rows = table.find_all('tr')[1:] # 헤더 제외
-
-# 각 행에서 데이터 추출
-per_data = []
-for row in rows:
-    cols = row.find_all('td')
-    if len(cols) >= 2:
-        industry = cols[0].text.strip()
-        pe_ratio = cols[1].text.strip()
-        per_data.append({'Industry': industry, 'P/E Ratio': pe_ratio})
-
-# 결과 출력
-df_per = pl.DataFrame(per_data)
-
-url_roe = 'https://fullratio.com/roe-by-industry'
-headers_roe = {'User-Agent': 'Mozilla/5.0'}
-
-response_roe = requests.get(url_roe, headers=headers_roe)
-soup_roe = BeautifulSoup(response_roe.text, 'html.parser')
-
-# 테이블 찾기 (이때 table이 None인지 체크)
-table_roe = soup_roe.find('table')
-if table_roe is None:
-    raise Exception("테이블을 찾을 수 없습니다. 구조가 바뀌었거나 JS로 로딩될 수 있습니다.")
-
-# tbody가 있는 경우
-tbody_roe = table_roe.find('tbody')
-if tbody_roe:
-    rows_roe = tbody_roe.find_all('tr')
-else:
-    rows_roe = table_roe.find_all('tr')[1:] # 헤더 제외
-
-# 각 행에서 데이터 추출
-roe_data = []
-for row in rows_roe:
-    cols_roe = row.find_all('td')
-    if len(cols_roe) >= 2:
-        industry_roe = cols_roe[0].text.strip()
-        roe_num = cols_roe[1].text.strip()
-        roe_data.append({'Industry': industry_roe, 'ROE': roe_num})
-
-# 결과 출력
-df_roe = pl.DataFrame(roe_data)
-#
-#
-url_roa = 'https://fullratio.com/roa-by-industry'
-headers_roa = {'User-Agent': 'Mozilla/5.0'}
-
-response_roa = requests.get(url_roa, headers=headers_roa)
-soup_roa = BeautifulSoup(response_roa.text, 'html.parser')
-
-# 테이블 찾기 (이때 table이 None인지 체크)
-table_roa = soup_roa.find('table')
-if table_roa is None:
-    raise Exception("테이블을 찾을 수 없습니다. 구조가 바뀌었거나 JS로 로딩될 수 있습니다.")
-
-# tbody가 있는 경우
-tbody_roa = table_roa.find('tbody')
-if tbody_roa:
-    rows_roa = tbody_roa.find_all('tr')
-else:
-    rows_roa = table_roa.find_all('tr')[1:] # 헤더 제외
-
-# 각 행에서 데이터 추출
-roa_data = []
-for row in rows_roa:
-    cols_roa = row.find_all('td')
-    if len(cols_roa) >= 2:
-        industry_roa = cols_roa[0].text.strip()
-        roa_num = cols_roa[1].text.strip()
-        roa_data.append({'Industry': industry_roa, 'ROA': roa_num})
-
-df_roa = pl.DataFrame(roa_data)
-#
-
-def get_industry_roe(ind):
+        return None
+
+def percentage_change(prev_close, last_close):
+    return float((last_close - prev_close) / prev_close * 100) if prev_close != 0 else None
+
+def get_industry_roe(ind, country, benchmarks):
     if country is None:
         try:
-            if ind is not None:
-                ans = float(df_roe.filter(pl.col('Industry') == ind).select("ROE").item())
-                return ans/100.0
-            else:
-                return 0.08
+            ans = benchmarks.industry_value('ROE', ind)
+            return ans/100.0 if ans is not None else 0.08
         except Exception:
-            return 0.08 
+            return 0.08
     else:
         return 0.1
 
-def get_industry_roa(ind):
+def get_industry_roa(ind, country, benchmarks):
     if country is None:
         try:
-            if ind is not None:
-                ans = float(df_roa.filter(pl.col('Industry') == ind).select("ROA").item())
-                return ans/100.0
-            return 0.06
+            ans = benchmarks.industry_value('ROA', ind)
+            return ans/100.0 if ans is not None else 0.06
         except Exception:
             return 0.06
     elif country == 'KR' and any(kw in ind for kw in ['Insurance', 'Bank']):
@@ -526,84 +431,24 @@ def get_industry_roa(ind):
     else:
         return 0.05
 
-    
+# benchmark index fund per market, used when the industry PER is unknown
+INDEX_FUNDS = {None: 'SPY', 'JP': 'EWJ'}
 
-def get_industry_per(ind, ticker):
+def get_industry_per(ind, ticker, country, benchmarks):
     if country is None: #country == US
-        spy = yf.Ticker('SPY')
-        spy_info = spy.info
-        per = spy_info.get('trailingPE')
-        try: 
-            if ind is not None:
-                ans = float(df_per.filter(pl.col('Industry') == ind).select("P/E Ratio").item())
-                return ans
-            return per
+        per = benchmarks.index_pe('SPY')
+        try:
+            ans = benchmarks.industry_value('P/E Ratio', ind)
+            return ans if ans is not None else per
         except Exception:
             return per
     elif country == 'KR':
         try:
-            url = f"https://finance.naver.com/item/main.nhn?code={ticker[:6]}"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            res = requests.get(url, headers=headers)
-            soup = BeautifulSoup(res.text, 'html.parser')
-
-            # 동일업종 PER이 들어있는 박스 찾기
-            aside = soup.select_one('div.aside_invest_info')
-            if aside:
-                rows = aside.select('table tr')
-                for row in rows:
-                    if '동일업종 PER' in row.text:
-                        per_text = row.select_one('td em').text
-                        return float(per_text.replace(',', ''))
-            return None
+            return benchmarks.naver_sector_per(ticker) # 동일업종 PER, cached per naver sector
         except Exception:
             return None
-
-    elif country == 'JP':
-        ewj = yf.Ticker('EWJ')
-        info = ewj.info
-        per = info.get('trailingPE')
-        return per
     else:
-        vt = yf.Ticker('VT')
-        info = vt.info
-        per = info.get('trailingPE')
-        return per
-
-
-tickers = get_tickers(country, limit, sp500)
-
-# block of code that gets rid of preferred stocks
-if country == 'KR':
-    for ticker in tickers:
-        if ticker[5] != '0': 
-            tickers.remove(ticker)
-
-def get_momentum_batch(tickers, period_days=126):
-    # Download 1 year of daily close prices for all tickers at once
-    try:
-        data = yf.download(tickers, period="1y", interval="1d", progress=False)['Close']
-    except Exception:
-        return {}
-    # data is a DataFrame: rows = dates, columns = tickers
-
-    momentum_dict = {}
-    for ticker in tickers:
-        if ticker not in data.columns:
-            momentum_dict[ticker] = None
-            continue
-        prices = data[ticker].dropna()
-        if len(prices) < period_days:
-            momentum_dict[ticker] = None
-            continue
-        momentum = (prices.iloc[-1] / prices.iloc[-period_days]) - 1
-        momentum_dict[ticker] = momentum
-
-    return momentum_dict
-
-momentum_3m = get_momentum_batch(tickers, 63)
-momentum_6m = get_momentum_batch(tickers, 126)
-momentum_12m = get_momentum_batch(tickers, 240)
+        return benchmarks.index_pe(INDEX_FUNDS.get(country, 'VT'))
 
 def momentum_score(short, mid, long):
    
@@ -683,63 +528,191 @@ def classify_cyclicality(industry):
     except Exception as e:
         return None
 
-q = Queue()
-for ticker in tickers:
-    q.put(ticker)
+class Screener:
+    """
+    One screening run for a single market.
 
-with shelve.open("cache/ticker_cache") as cache:
-    # Clear all the cache entries by deleting the keys
-    cache.clear()
+    Data sources (KRX fundamentals, fullratio tables, index-fund PEs) are initialized lazily,
+    only for the market being screened. run() returns the passing tickers sorted by B-Score.
+    """
 
-def process_ticker_quantitatives():
-    while not q.empty():
-        ticker = q.get()
-        try:
+    snapshot_class = TickerSnapshot # per-ticker data source; benchmarks swap in synthetic fixtures
+
+    def __init__(self, country=None, limit=100, sp500=True, cutoff=None, num_workers=NUM_WORKERS, report_every=10, cache_path=CACHE_FILE,
+                 metrics=None, price_path=None):
+        self.country = None if country in (None, 'US') else country.upper()
+        self.limit = limit
+        self.sp500 = sp500 if self.country is None else True
+        self.cutoff = cutoff if cutoff is not None else (CUTOFF - US_CUTOFF_ADJUSTMENT if self.country is None else CUTOFF)
+        self.num_workers = num_workers
+        self.date = latest_business_date()
+        self.report_every = report_every
+        self.cache_path = cache_path
+        self.price_path = price_path # price_store.PRICE_DIR when None
+        self.metrics = metrics or NULL_METRICS # metrics.Metrics() for spans, counters and queue depth
+        self.fundamentals = None
+        self.prices = None
+        self.engine = None
+        self.benchmarks = None
+        self.tickers = []
+        self.screened = [] # (result row, raw metrics) for every ticker that was fetched successfully
+        self.errors = Counter() # exception type -> tickers dropped by it
+        self.state = {} # ticker -> {'fetched', 'price', 'events'}, what incremental runs need from this one
+        self.close_panel = None
+        self.scored = None # score_frame() of the screened tickers
+        self.history_path = None
+        self.refetched = None # tickers fully fetched by an incremental run
+        self._started = 0
+        self._done = 0
+        self._df_kospi = None
+
+    @property
+    def df_kospi(self):
+        if self._df_kospi is None:
+            self._df_kospi = load_krx_fundamentals(self.date)
+        return self._df_kospi
+
+    @property
+    def quant_datasets(self):
+        # datasets every ticker needs; downloaded concurrently under the engine's yahoo limits
+        return ('info', 'history', 'financials', 'dividends') + (('sustainability',) if self.country is None else ())
+
+    @property
+    def universe(self):
+        if self.country:
+            return self.country
+        return 'sp500' if self.sp500 else 'nasdaq100'
+
+    def default_output(self):
+        if self.country:
+            return os.path.join(RESULTS_DIR, f"result_{self.country}_{self.date}.xlsx")
+        elif self.sp500:
+            return os.path.join(RESULTS_DIR, f"sp500_{self.date}.xlsx")
+        else:
+            return os.path.join(RESULTS_DIR, f"nasdaq100_{self.date}.xlsx")
+
+    def open(self):
+        # per-(ticker, dataset) TTL cache so repeated runs don't re-download annual statements
+        self.fundamentals = FundamentalsCache(self.cache_path).open()
+        # daily OHLCV shared with the notebooks; only the days since the last run are downloaded
+        from price_store import PRICE_DIR, PriceStore
+        self.prices = PriceStore(self.price_path or PRICE_DIR)
+        # rate-limited fetch layer for yahoo/fmp/naver/fullratio, prints live req/s; every ticker in flight may hold
+        # a pool thread (KR sector PER) that waits on a nested engine.get_blocking, so the pool keeps room for those
+        self.engine = FetchEngine(max_workers=max(MAX_WORKERS, 2 * self.num_workers), report_every=self.report_every).start()
+        # index-fund PE, fullratio tables and naver sector PER are fetched once per run and shared by all tickers
+        self.benchmarks = IndustryBenchmarks(self.fundamentals, http_get=self.engine.get_blocking)
+        return self
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.close()
+        if self.fundamentals is not None:
+            self.fundamentals.close()
+        if self.prices is not None:
+            self.prices.close()
+
+    def prepare(self):
+        engine = self.engine
+        if self.country is None:
+            self.benchmarks.load_fullratio() # fail fast if fullratio changed its layout
+        if self.country != 'KR':
+            engine.run(engine.call('yahoo', self.benchmarks.index_pe, INDEX_FUNDS.get(self.country, 'VT')))
+        else:
+            self.df_kospi # load the KRX snapshot before the fetch stage, not inside it
+
+        self.tickers = self.fetch_tickers()
 
-            info = yf.Ticker(ticker).info
+        # gets rid of preferred stocks
+        if self.country == 'KR':
+            self.tickers = [ticker for ticker in self.tickers if ticker[5] == '0']
+
+        # one 1y close panel for the whole universe (from the local price store); every lookback window is computed from it in one vectorized pass
+        try:
+            self.close_panel = engine.run(engine.call('yahoo', self.fetch_close_panel, self.tickers))
+        except Exception:
+            self.close_panel = None
+        momentum = get_momentum_batch(self.tickers, MOMENTUM_WINDOWS, panel=self.close_panel)
+        self.momentum_3m, self.momentum_6m, self.momentum_12m = (momentum[window] for window in MOMENTUM_WINDOWS)
+
+    def fetch_tickers(self):
+        return get_tickers(self.country, self.limit, self.sp500, self.engine.get_blocking)
+
+    def fetch_close_panel(self, tickers):
+        return self.prices.panel(tickers, period='1y')
+
+    def fetch(self, tickers=None):
+        # every ticker's datasets, with at most num_workers tickers in flight
+        work = self.engine.map(self.process_ticker_quantitatives, self.tickers if tickers is None else tickers, concurrency=self.num_workers)
+        self.engine.run(self._sampled(work) if self.metrics.enabled else work)
+
+    def _sample_queue(self):
+        self.metrics.sample('tickers', waiting=len(self.tickers) - self._started, in_flight=self._started - self._done, done=self._done)
+        for host, state in self.engine.limiter_state().items():
+            self.metrics.sample('host_' + host, **state)
+
+    async def _sampled(self, work, every=SAMPLE_EVERY):
+        # queue depth over time, sampled on the engine loop while the tickers are processed
+        task = asyncio.ensure_future(work)
+        while not task.done():
+            self._sample_queue()
+            await asyncio.wait([task], timeout=every)
+        self._sample_queue()
+        return task.result()
+
+    async def process_ticker_quantitatives(self, ticker):
+        self._started += 1
+        start = time.perf_counter()
+        measure = self.metrics.call # measure(span, fn, *args) == fn(*args), timed when metrics are on
+        try:
+            # one snapshot per ticker, so .info/.financials/... are each downloaded at most once
+            snapshot = self.snapshot_class(ticker, self.fundamentals, self.metrics)
+            with self.metrics.span('prefetch'):
+                await snapshot.prefetch(self.engine, self.quant_datasets)
+            info = snapshot.info
             name = info.get("longName") or info.get("shortName", ticker)
             # sector = info.get("sector", None)
             industry = info.get("industry", None)
             sub_industry = info.get('subIndustry', None)
             currentPrice = info.get("currentPrice", None)
-            percentage_change = get_percentage_change(ticker)
+            price_change = measure('percentage_change', get_percentage_change, snapshot)
             target_mean = info.get('targetMeanPrice', 0)
             if target_mean != 0 and currentPrice != 0 and currentPrice is not None and target_mean is not None:
                 target_incr = ((target_mean - currentPrice) / currentPrice) * 100
                 upside = str(round(target_incr)) + '%' if target_incr < 0 else '+' + str(round(target_incr)) + '%'
             else: 
                 upside = 'N/A'
-            
+        
             debtToEquity = info.get('debtToEquity', None) # < 0.5
             debtToEquity = debtToEquity/100 if debtToEquity is not None else None
             currentRatio = info.get('currentRatio', None) # 초점: 회사의 단기 유동성, > 1.5 && < 2.5
-            
+        
             pbr = info.get('priceToBook', None) # 초점: 자산가치, 저pbr종목은 저평가된 자산 가치주로 간주. 장기 수익률 설명력 높음 < 1.5 (=being traded at 1.5 times its book value (asset-liab))
-            if not pbr and country == 'KR': pbr = getFs('PBR', ticker) # 주가가 그 기업의 자산가치에 비해 과대/과소평가되어 있다는 의미. 낮으면 자산활용력 부족
+            if not pbr and self.country == 'KR': pbr = getFs('PBR', ticker, self.df_kospi) # 주가가 그 기업의 자산가치에 비해 과대/과소평가되어 있다는 의미. 낮으면 자산활용력 부족
             per = info.get('trailingPE', None) # 초점: 수익성, over/undervalue? 저per 종목 선별, 10-20전후(혹은 산업평균)로 낮고 높음 구분. 주가가 그 기업의 이익에 비해 과대/과소평가되어 있다는 의미
-            if not per and country == 'KR': per = getFs('PER', ticker) # high per expects future growth but could be overvalued(=버블). 
+            if not per and self.country == 'KR': per = getFs('PER', ticker, self.df_kospi) # high per expects future growth but could be overvalued(=버블). 
                                                                        # low per could be undervalued or company in trouble, IT, 바이오 등 성장산업은 자연스레 per이 높게 형성
                                                                        # 저per -> 수익성 높거나 주가가 싸다 고pbr -> 자산은 적은데 시장에서 비싸게 봐준다
-            industry_per = get_industry_per(industry, ticker)
+            industry_per = await asyncio.to_thread(measure, 'industry_per', get_industry_per, industry, ticker, self.country, self.benchmarks) # naver scrapes go through engine.get_blocking
             industry_per = round(industry_per) if industry_per is not None else industry_per
-            industry_roe = get_industry_roe(industry)
-            industry_roa = get_industry_roa(industry)
+            industry_roe = measure('industry_roe', get_industry_roe, industry, self.country, self.benchmarks)
+            industry_roa = measure('industry_roa', get_industry_roa, industry, self.country, self.benchmarks)
 
             roe = info.get('returnOnEquity', None) # 수익성 높은 기업 선별. 고roe + 저pbr 조합은 가장 유명한 퀀트 전략. > 8% (0.08) 주주 입장에서 수익성
             roa = info.get('returnOnAssets', None) # > 6% (0.06), 기업 전체 효율성
             #ROE가 높고 ROA는 낮다면? → 부채를 많이 이용해 수익을 낸 기업일 수 있음. ROE와 ROA 모두 높다면? → 자산과 자본 모두 효율적으로 잘 운용하고 있다는 의미.
             #A = L + E
-            
-            eps_growth = has_stable_eps_growth_cagr(ticker) # earnings per share, the higher the better, buffett looks for stable EPS growth
-            # eps_growth_quart = has_stable_eps_growth_quarterly(ticker) 
-            div_growth = has_stable_dividend_growth_cagr(ticker) # buffett looks for stable dividend growth for at least 10 years
+        
+            eps_growth = measure('eps_growth', has_stable_eps_growth_cagr, snapshot) # earnings per share, the higher the better, buffett looks for stable EPS growth
+            # eps_growth_quart = has_stable_eps_growth_quarterly(snapshot) 
+            div_growth = measure('div_growth', has_stable_dividend_growth_cagr, snapshot) # buffett looks for stable dividend growth for at least 10 years
             # bvps_growth = bvps_undervalued(info.get('bookValue', None), currentPrice)
-            
-            icr = get_interest_coverage_ratio(ticker)
+        
+            icr = measure('icr', get_interest_coverage_ratio, snapshot)
 
-            short_momentum = momentum_3m[ticker]
-            mid_momentum = momentum_6m[ticker]
-            long_momentum = momentum_12m[ticker]
+            short_momentum = self.momentum_3m[ticker]
+            mid_momentum = self.momentum_6m[ticker]
+            long_momentum = self.momentum_12m[ticker]
 
             cyclicality = 0
             # ACTIVATE THE CODE BELOW TO SCORE CYCLICALITY DEPENDING ON CURRENT MACROECON SITUATION
@@ -748,8 +721,8 @@ def process_ticker_quantitatives():
             #     cyclicality +=1
             # elif classification == 'cyclical':
             #     cyclicality -=0.
-            
-            if country == 'KR':
+        
+            if self.country == 'KR':
                 if industry is not None:
                     if any(kw.lower() in industry.lower() for kw in lee_kw_list):
                         cyclicality += 1
@@ -758,11 +731,13 @@ def process_ticker_quantitatives():
                         if any(kw.lower() in sub_industry.lower() for kw in lee_kw_list):
                             cyclicality +=1
 
-            quantitative_buffett_score = buffett_score(debtToEquity, currentRatio, pbr, per, industry_per, roe, industry_roe, roa, industry_roa, eps_growth, div_growth, icr) + momentum_score(short_momentum, mid_momentum, long_momentum) + cyclicality
+            # scored later for the whole universe at once (scoring.score_frame == buffett_score + momentum_score + cyclicality)
+            raw_metrics = raw_metrics_row(ticker, debtToEquity, currentRatio, pbr, per, industry_per, roe, industry_roe, roa, industry_roa, eps_growth, div_growth, icr,
+                                          short_momentum, mid_momentum, long_momentum, cyclicality)
 
             rec = info.get('recommendationKey', None)
-            if country is None:
-                esg = get_esg_score(ticker)
+            if self.country is None:
+                esg = measure('esg', get_esg_score, snapshot)
             else:
                 esg = ''
 
@@ -773,10 +748,10 @@ def process_ticker_quantitatives():
             # regulatory advantage(gov protection), patients(Pfizer, Intel)
 
             result = {
-                "Ticker": ticker[:6] if country == 'KR' else ticker,
+                "Ticker": ticker[:6] if self.country == 'KR' else ticker,
                 "Name": name,
                 "Industry": industry,
-                "Price": f"{currentPrice:,.0f}" + percentage_change if country == 'KR' or country == 'JP' else f"{currentPrice:,.2f}" + percentage_change,
+                "Price": format_price(currentPrice, format_change(price_change), self.country),
                 "D/E": round(debtToEquity, 2) if debtToEquity is not None else None,
                 "CR": round(currentRatio, 2) if currentRatio is not None else None,
                 "PBR": round(pbr,2) if pbr is not None else None,
@@ -786,24 +761,23 @@ def process_ticker_quantitatives():
                 "ICR": icr,
                 "EPS CAGR": eps_growth if isinstance(eps_growth, bool) else (f"{eps_growth:.2%}" if eps_growth is not None else None), #use this instead of operating income incrs for quart/annual 
                 "DIV CAGR": f"{div_growth:.2%}" if div_growth is not None else None,
-                "B-Score": round(quantitative_buffett_score, 1),
+                "B-Score": None, # filled in after scoring
                 # 'Analyst Forecast': rec + '(' + upside + ')',
-                'Momentum': "/".join(f"{m:.1%}" if m is not None else "None" for m in (short_momentum, mid_momentum, long_momentum)),
+                'Momentum': format_momentum(short_momentum, mid_momentum, long_momentum),
                 # 'ESG': esg, #works only for US stocks
             }
 
-            with data_lock:
-                if quantitative_buffett_score >= CUTOFF:
-                    data.append(result)
-                    with shelve.open("cache/ticker_cache") as cache:
-                        cache[ticker] = (name, quantitative_buffett_score)
-                    with shelve.open("cache/company_cache") as cache:
-                        cache[name] = quantitative_buffett_score
+            self.state[ticker] = {'fetched': time.time(), 'price': currentPrice, 'change': price_change,
+                                  'events': [info.get(field) for field in EVENT_FIELDS]}
+            self.screened.append((result, raw_metrics)) # coroutines all run on the engine loop thread, no lock needed
 
         except Exception as e:
-            if "429" in str(e):
-                print("Too many requests! Waiting 10 seconds...")
-                time.sleep(10)
+            # 429s were already retried with backoff inside the fetch engine; anything else drops the ticker
+            self.errors[type(e).__name__] += 1
+            self.metrics.error('process_ticker_quantitatives', e)
+        finally:
+            self._done += 1
+            self.metrics.observe('ticker', time.perf_counter() - start)
             # data.append({
             #     "Ticker": ticker,
             #     "Name": '',
@@ -824,30 +798,210 @@ def process_ticker_quantitatives():
             #     'ESG': '',
             # })
 
-        finally:
-            q.task_done()
-            time.sleep(2)
-    
-
-threads = []
-
-for _ in range(NUM_THREADS):
-    t = threading.Thread(target=process_ticker_quantitatives)
-    t.start()
-    threads.append(t)
-
-for t in threads:
-    t.join()
-
-df = pl.DataFrame(data)
-# df.dropna(subset=["D/E", "CR", "P/B", "ROE", "ROA", "PER", "ICR"], inplace = True)
-
-df_sorted = df.sort("B-Score", descending = True)
-
-if country: 
-    df_sorted.to_pandas().to_excel(f"results/result_{country}_{formattedDate}.xlsx", index=False)
-
-elif sp500:
-    df_sorted.to_pandas().to_excel(f"results/sp500_{formattedDate}.xlsx", index=False)
-else:
-    df_sorted.to_pandas().to_excel(f"results/nasdaq100_{formattedDate}.xlsx", index=False)
+    def score(self):
+        # score the whole universe in one vectorized pass, outside the fetch workers
+        self.scored = score_frame(raw_metrics_frame([raw for _, raw in self.screened])) if self.screened else None
+        scores = self.scored['score'].to_list() if self.screened else []
+        for (result, _), quantitative_buffett_score in zip(self.screened, scores):
+            result["B-Score"] = round(quantitative_buffett_score, 1)
+        return scores
+
+    def save(self, scores, store):
+        # every scored ticker goes to the results store (not just the passing ones), through one batched writer
+        run = store.start_run(self.date, self.country or 'US', self.universe, self.cutoff)
+        with store.writer(run) as writer:
+            for (result, raw), quantitative_buffett_score in zip(self.screened, scores):
+                writer.put(raw['Ticker'], result["Name"], quantitative_buffett_score, quantitative_buffett_score >= self.cutoff,
+                           result, {**raw, 'state': self.state.get(raw['Ticker'])})
+
+    def history_frame(self, scores):
+        # typed, numeric columns of this run for the Parquet history (raw metrics + score components)
+        if self.scored is None:
+            return pl.DataFrame(schema={**RAW_METRICS_SCHEMA, **RUN_COLUMNS})
+        states = [self.state.get(raw['Ticker']) or {} for _, raw in self.screened]
+        return self.scored.with_columns(
+            pl.Series('Name', [result['Name'] for result, _ in self.screened], pl.Utf8),
+            pl.Series('Industry', [result['Industry'] for result, _ in self.screened], pl.Utf8),
+            pl.Series('price', [state.get('price') for state in states], pl.Float64),
+            pl.Series('change', [state.get('change') for state in states], pl.Float64),
+            pl.Series('passed', [score >= self.cutoff for score in scores], pl.Boolean),
+        ).select(list({**RAW_METRICS_SCHEMA, **RUN_COLUMNS}))
+
+    def last_closes(self, ticker):
+        # (previous close, last close) from the momentum panel, or None
+        if self.close_panel is None or ticker not in self.close_panel.columns:
+            return None
+        closes = self.close_panel[ticker].dropna()
+        return (float(closes.iloc[-2]), float(closes.iloc[-1])) if len(closes) >= 2 else None
+
+    def needs_refetch(self, state, now):
+        if not state or not state.get('price') or now - state['fetched'] > FULL_REFRESH_DAYS * 86400:
+            return True
+        return self.event_passed(state, now)
+
+    def event_passed(self, state, now):
+        # an earnings/dividend date fell between the previous fetch and now
+        return bool(state) and any(event and state['fetched'] < event <= now for event in state.get('events', ()))
+
+    def carry_forward(self, ticker, result, raw, state, closes):
+        # previous run's metrics with today's price: PER and PBR scale with the price (same EPS and book value),
+        # momentum comes from today's panel, statement-based metrics are kept
+        prev_close, price = closes
+        ratio = price / state['price']
+        raw = {**raw, 'mom_short': self.momentum_3m[ticker], 'mom_mid': self.momentum_6m[ticker], 'mom_long': self.momentum_12m[ticker]}
+        for field in ('per', 'pbr'):
+            if raw[field] is not None:
+                raw[field] *= ratio
+        if self.country != 'KR': # index-fund/fullratio PERs were reloaded in prepare(); naver sector PERs are kept
+            industry_per = get_industry_per(result['Industry'], ticker, self.country, self.benchmarks)
+            raw['ind_per'] = round(industry_per) if industry_per is not None else None
+        per, pbr = raw['per'], raw['pbr']
+        result = {**result,
+                  'Price': format_price(price, format_change(percentage_change(prev_close, price)), self.country),
+                  'PBR': round(pbr, 2) if pbr is not None else None,
+                  'PER': f"{round(per, 2)} ({raw['ind_per']})" if per is not None else None,
+                  'Momentum': format_momentum(raw['mom_short'], raw['mom_mid'], raw['mom_long'])}
+        self.state[ticker] = {**state, 'price': price, 'change': percentage_change(prev_close, price)}
+        self.screened.append((result, raw))
+
+    def fetch_incremental(self, store):
+        # refetch only what changed since the previous run of this screen, carry the rest forward
+        previous = store.latest_run(self.country or 'US', self.universe, before=self.date)
+        rows = store.run_rows(previous[0]) if previous is not None else {}
+        now = time.time()
+        refetch, carried = [], []
+        for ticker in self.tickers:
+            prev = rows.get(ticker)
+            state = prev[3].get('state') if prev is not None else None
+            closes = self.last_closes(ticker)
+            if prev is None or closes is None or self.needs_refetch(state, now):
+                refetch.append(ticker)
+                if self.event_passed(state, now): # cached statements are out of date; other refetches keep their TTLs
+                    self.fundamentals.invalidate(ticker, STATEMENT_DATASETS)
+            else:
+                carried.append((ticker, prev, state, closes))
+
+        for ticker, (name, score, result, raw), state, closes in carried:
+            raw = {key: value for key, value in raw.items() if key != 'state'}
+            self.carry_forward(ticker, result, raw, state, closes)
+        self.refetched = refetch
+        print(f"Incremental run: {len(carried)} tickers carried forward from {previous[1] if previous else '-'}, {len(refetch)} refetched")
+        self.fetch(refetch)
+
+    def collect_metrics(self, passed):
+        # end-of-run totals from the engine, caches and benchmarks, exported next to the spans
+        m = self.metrics
+        m.set('tickers', len(self.tickers))
+        m.set('tickers_screened', len(self.screened))
+        m.set('tickers_passed', passed)
+        for host, counts in self.engine.request_counts().items():
+            for outcome in ('ok', 'throttled', 'retries', 'errors'):
+                m.count('http_requests', counts.get(outcome, 0), host=host, outcome=outcome)
+        for host, (backoff, waited) in self.engine.wait_times().items():
+            m.count('backoff_seconds', backoff, host=host)
+            m.count('limiter_wait_seconds', waited, host=host)
+        for dataset, s in self.fundamentals.stats().items():
+            m.count('cache_hits', s['hits'], dataset=dataset)
+            m.count('cache_misses', s['misses'], dataset=dataset)
+        m.count('cache_evictions', self.fundamentals.evictions)
+        m.count('benchmark_requests', self.benchmarks.requests)
+
+    def run(self, store=None, incremental=False, history=None):
+        history = history or ResultsHistory()
+        with (store or ResultsStore()) as store:
+            with self.metrics.span('stage', stage='prepare'):
+                self.prepare()
+            with self.metrics.span('stage', stage='fetch'):
+                if incremental:
+                    self.fetch_incremental(store)
+                else:
+                    self.fetch()
+            with self.metrics.span('stage', stage='score'):
+                scores = self.score()
+            data = [result for (result, _), score in zip(self.screened, scores) if score >= self.cutoff]
+
+            with self.metrics.span('stage', stage='save'):
+                self.save(scores, store)
+                self.history_path = history.write(self.history_frame(scores), self.country or 'US', self.universe, self.date)
+
+        print(self.engine.summary())
+        print(self.fundamentals.summary())
+        if self.errors:
+            print(f"{sum(self.errors.values())} tickers dropped: " + ', '.join(f'{name} {n}' for name, n in self.errors.most_common()))
+        if self.metrics.enabled:
+            self.collect_metrics(len(data))
+            print(self.metrics.summary())
+
+        df = pl.DataFrame(data)
+        # df.dropna(subset=["D/E", "CR", "P/B", "ROE", "ROA", "PER", "ICR"], inplace = True)
+        return df.sort("B-Score", descending = True) if len(df) else df
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Buffett-style quant stock screener")
+    parser.add_argument('--country', type=str.upper, choices=COUNTRIES, help="market to screen (prompted if omitted)")
+    parser.add_argument('--limit', type=int, default=100, help="number of tickers to screen (FMP markets)")
+    parser.add_argument('--universe', choices=UNIVERSES, default='sp500', help="US universe")
+    parser.add_argument('--output', help="output .xlsx path (default: results/<universe>_<date>.xlsx)")
+    parser.add_argument('--no-excel', action='store_true', help="only store the run in results/history (Parquet), skip the spreadsheet")
+    parser.add_argument('--cutoff', type=float, help=f"minimum B-Score (default {CUTOFF}, {CUTOFF - US_CUTOFF_ADJUSTMENT} for US)")
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS, help="tickers in flight at once")
+    parser.add_argument('--incremental', action='store_true',
+                        help="reuse the previous run's metrics: refetch only tickers with new earnings/dividends, reprice the rest")
+    parser.add_argument('--metrics', metavar='DIR', help="write per-stage timings and counters to DIR/<universe>_<date>.json and .prom")
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument('--record', metavar='ARCHIVE', help="save every HTTP response of this run to ARCHIVE (.zip)")
+    archive.add_argument('--replay', metavar='ARCHIVE', help="serve HTTP responses from ARCHIVE instead of the network")
+    parser.add_argument('--replay-latency', type=float, default=0.0, help="seconds added to every replayed response")
+    parser.add_argument('--replay-latency-scale', type=float, default=0.0, help="replay each response after this fraction of its recorded round trip")
+    return parser.parse_args(argv)
+
+
+def prompt_args(args):
+    # interactive fallback, same prompts as before
+    args.country = input('Country (KR, JP, CH, US, UK 중 선택): ').upper()
+    if args.country != 'US':
+        args.limit = int(float(input('Limit: '))) #input always accepts a str
+    else:
+        sp500 = input('S&P500? (y/n, n for NASDAQ100): ').lower().strip() == 'y' # False for nasdaq100
+        args.universe = 'sp500' if sp500 else 'nasdaq100'
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.country is None:
+        args = prompt_args(args)
+
+    print('May take up to few minutes...')
+
+    mode, path = ('record', args.record) if args.record else ('replay', args.replay) if args.replay else ('off', None)
+    with HttpArchive(path, mode, args.replay_latency, args.replay_latency_scale).activate() as archive:
+        metrics = Metrics() if args.metrics else None
+        with Screener(args.country, args.limit, args.universe == 'sp500', args.cutoff, args.workers, metrics=metrics) as screener:
+            screener.run(incremental=args.incremental)
+            output = args.output or screener.default_output()
+            if metrics is not None:
+                paths = metrics.write(os.path.join(args.metrics, f"{screener.universe}_{screener.date}"))
+                print("Metrics written to " + ' and '.join(paths))
+    if mode != 'off':
+        print(archive.summary())
+    print(f"Saved {len(screener.screened)} tickers to {screener.history_path}")
+    if args.no_excel:
+        return
+    # the spreadsheet is a view of the Parquet history: passing tickers of this run, best first
+    df_sorted = ResultsHistory().excel(output, screener.country or 'US', screener.universe, screener.date)
+    print(f"Saved {len(df_sorted)} tickers to {output}")
+    compared = write_diff(output, df_sorted) # entries/exits/score changes vs the previous day's file
+    if compared is not None:
+        print(summarize(*compared))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'covariance')
+TRADING_DAYS = 252
+RETURN_KINDS = ('log', 'simple')
+REBUILD_EVERY = TRADING_DAYS # re-sum the window from its rows every N pushes so float error can't build up
+
+
+def to_returns(prices, kind='log'):
+    # daily returns of a close panel (dates x tickers), days with a missing price dropped like the notebooks do
+    if kind == 'log':
+        returns = np.log(prices / prices.shift(1))
+    elif kind == 'simple':
+        returns = prices.pct_change(fill_method=None)
+    else:
+        raise ValueError(f"unknown return kind {kind!r}, expected one of {RETURN_KINDS}")
+    return returns.iloc[1:].dropna()
+
+
+class RollingMoments:
+    """
+    Mean and covariance of the last `window` daily returns of a fixed ticker set.
+
+    Keeps the window as a ring buffer of rows plus the running sums of r and r r', so a new
+    trading day costs O(N^2): add its outer product, subtract the one falling out of the window.
+    """
+
+    def __init__(self, tickers, window, kind='log'):
+        n = len(tickers)
+        self.tickers = list(tickers)
+        self.window = window
+        self.kind = kind
+        self.rows = np.zeros((window, n))
+        self.dates = np.zeros(window, dtype='datetime64[D]')
+        self.head = 0 # next slot to write
+        self.count = 0
+        self.pushes = 0
+        self.s1 = np.zeros(n)
+        self.s2 = np.zeros((n, n))
+        self.shrinkage = None # Ledoit-Wolf intensity of the last cov(shrink=True)
+
+    @property
+    def last_date(self):
+        return self.dates[(self.head - 1) % self.window] if self.count else None
+
+    def push(self, date, row):
+        if self.count == self.window:
+            old = self.rows[self.head]
+            self.s1 -= old
+            self.s2 -= np.outer(old, old)
+        else:
+            self.count += 1
+        self.rows[self.head] = row
+        self.dates[self.head] = date
+        self.s1 += row
+        self.s2 += np.outer(row, row)
+        self.head = (self.head + 1) % self.window
+        self.pushes += 1
+        if self.pushes % REBUILD_EVERY == 0:
+            self.resum()
+
+    def extend(self, returns):
+        # returns: DataFrame (dates x self.tickers) of days after last_date
+        for date, row in zip(returns.index.values.astype('datetime64[D]'), returns[self.tickers].to_numpy(dtype=float)):
+            self.push(date, row)
+
+    def resum(self):
+        rows = self.window_rows()
+        self.s1 = rows.sum(axis=0)
+        self.s2 = rows.T @ rows
+
+    def window_rows(self):
+        # the rows of the window, oldest first
+        if self.count < self.window:
+            return self.rows[:self.count]
+        return np.roll(self.rows, -self.head, axis=0)
+
+    def mean(self, periods=TRADING_DAYS):
+        return self.s1 / self.count * periods
+
+    def cov(self, periods=TRADING_DAYS, shrink=False):
+        """
+        Annualized sample covariance (ddof=1, same as DataFrame.cov()).
+
+        shrink=True applies Ledoit-Wolf shrinkage towards a scaled identity (the sklearn estimator);
+        its intensity needs the row norms of the window, O(window * N) on top of the running sums.
+        """
+        n = self.count
+        centered = self.s2 - np.outer(self.s1, self.s1) / n
+        if not shrink:
+            return centered / (n - 1) * periods
+        emp = centered / n # the Ledoit-Wolf estimator starts from the biased covariance
+        p = len(self.tickers)
+        mu = np.trace(emp) / p
+        norms = ((self.window_rows() - self.s1 / n) ** 2).sum(axis=1) # squared norm of each centered day
+        frobenius = (emp ** 2).sum()
+        delta = (frobenius - 2 * mu * np.trace(emp) + p * mu ** 2) / p # distance to the target
+        beta = min((norms @ norms / n - frobenius) / (p * n), delta) # estimation error of emp
+        self.shrinkage = 0.0 if delta == 0 else max(beta, 0.0) / delta
+        return ((1 - self.shrinkage) * emp + self.shrinkage * mu * np.eye(p)) * periods
+
+    def frame(self, values):
+        return pd.DataFrame(values, index=self.tickers, columns=self.tickers)
+
+    # ---- persistence
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = json.dumps({'tickers': self.tickers, 'window': self.window, 'kind': self.kind,
+                           'head': self.head, 'count': self.count, 'pushes': self.pushes})
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, rows=self.rows, dates=self.dates, s1=self.s1, s2=self.s2, meta=np.array(meta))
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            moments = cls(meta['tickers'], meta['window'], meta['kind'])
+            moments.rows, moments.dates, moments.s1, moments.s2 = data['rows'], data['dates'], data['s1'], data['s2']
+        moments.head, moments.count, moments.pushes = meta['head'], meta['count'], meta['pushes']
+        return moments
+
+
+class CovarianceCache:
+    """
+    RollingMoments on disk, one file per (ticker set, window, return type).
+
+    update(prices) brings the cached window up to the last day of the close panel: only the days
+    after the cached last date are pushed. A missing file, or a panel that no longer reaches back
+    to the cached last date, rebuilds the window from the panel.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.hits = 0
+        self.rebuilds = 0
+
+    def path(self, tickers, window, kind):
+        key = json.dumps([sorted(tickers), window, kind])
+        return os.path.join(self.root, hashlib.sha1(key.encode()).hexdigest()[:20] + '.npz')
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            return RollingMoments.load(path)
+        except (OSError, ValueError, KeyError): # unreadable file: rebuilt from the panel
+            return None
+
+    def update(self, prices, window=3 * TRADING_DAYS, kind='log'):
+        # prices: close panel (dates x tickers); returns the RollingMoments of its last `window` returns
+        tickers = sorted(prices.columns)
+        path = self.path(tickers, window, kind)
+        prices = prices[tickers]
+        moments = self.load(path)
+        last = moments.last_date if moments is not None else None
+        dates = prices.index.values.astype('datetime64[D]')
+        ahead = last is not None and len(dates) and last > dates[-1] # panel ends before the cache: its moments are of a later window
+        if last is not None and len(dates) and dates[0] <= last and not ahead:
+            # from the cached last day on: its close is the base of the first new return
+            start = int(np.searchsorted(dates, last, side='right')) - 1
+            new = to_returns(prices.iloc[start:], kind)
+            new = new[new.index.values.astype('datetime64[D]') > last]
+            self.hits += 1
+        else:
+            moments = RollingMoments(tickers, window, kind)
+            new = to_returns(prices, kind).iloc[-window:]
+            self.rebuilds += 1
+        moments.extend(new)
+        if (len(new) or not os.path.exists(path)) and not ahead: # the later cache stays for the next up-to-date panel
+            moments.save(path)
+        return moments
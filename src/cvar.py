@@ -0,0 +1,63 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import OptimizeResult, linprog
+
+
+BETA = 0.95 # confidence level; CVaR is the mean loss of the worst 5% of scenarios
+
+
+def bootstrap_scenarios(returns, n, block=5, seed=None):
+    # n daily return scenarios resampled in blocks of `block` consecutive days (keeps short-range volatility clustering)
+    returns = np.asarray(returns, dtype=float)
+    block = max(1, min(block, len(returns)))
+    starts = np.random.default_rng(seed).integers(0, len(returns) - block + 1, -(-n // block))
+    return returns[(starts[:, None] + np.arange(block)).ravel()[:n]]
+
+
+def portfolio_cvar(weights, scenarios, beta=BETA):
+    # (VaR, CVaR) of daily losses over the scenarios, CVaR = VaR + E[(loss - VaR)+] / (1 - beta) as in the LP
+    losses = -(np.asarray(scenarios) @ weights)
+    var = np.quantile(losses, beta)
+    return var, var + np.maximum(losses - var, 0).mean() / (1 - beta)
+
+
+def min_cvar(scenarios, beta=BETA, lower=0.0, upper=1.0, mean=None, target_return=None):
+    """
+    Minimum-CVaR fully invested portfolio over return scenarios (days x assets), Rockafellar-Uryasev LP.
+
+        min  a + 1 / (1 - beta) * sum(prob_s * u_s)
+        s.t. u_s >= -r_s . w - a,  u >= 0,  sum(w) == 1,  lower <= w <= upper  [,  mean . w >= target_return]
+
+    Identical scenarios (bootstrap draws of the same day) are merged into one with their probability.
+    HiGHS solves the dual, which has one row per asset instead of one per scenario:
+
+        max  l - upper * sum(m) + lower * sum(v) [+ target_return * t]
+        s.t. R' p + l - m + v [+ t * mean] == 0,  sum(p) == 1,  0 <= p_s <= prob_s / (1 - beta),  m, v [, t] >= 0
+
+    and the weights are the (negated) marginals of its asset rows. Returns an OptimizeResult:
+    x weights, fun CVaR, var the VaR at the optimum.
+    """
+    scenarios, counts = np.unique(np.asarray(scenarios, dtype=float), axis=0, return_counts=True)
+    s, n = scenarios.shape
+    prob = counts / counts.sum()
+    target = target_return is not None
+    # columns: p (s), l, m (n), v (n)[, t]
+    c = np.concatenate([np.zeros(s), [-1.0], np.full(n, upper), np.full(n, -lower), [-target_return] if target else []])
+    assets = [sparse.csr_matrix(scenarios.T), np.ones((n, 1)), -sparse.identity(n), sparse.identity(n)]
+    if target:
+        assets.append(np.asarray(mean, dtype=float).reshape(n, 1))
+    budget = sparse.hstack([np.ones((1, s)), sparse.csr_matrix((1, len(c) - s))])
+    a_eq = sparse.vstack([sparse.hstack(assets), budget], format='csr')
+    bounds = np.column_stack([np.zeros(len(c)), np.full(len(c), np.inf)])
+    bounds[:s, 1] = prob / (1 - beta)
+    bounds[s, 0] = -np.inf # l (the VaR) is free
+    res = linprog(c, A_eq=a_eq, b_eq=np.append(np.zeros(n), 1.0), bounds=bounds, method='highs')
+    if res.status != 0: # infeasible primal (target_return out of reach) shows up as an unbounded dual
+        return OptimizeResult(x=None, fun=None, var=None, success=False, status=res.status, message=res.message)
+    marginals = res.eqlin.marginals
+    return OptimizeResult(x=-marginals[:n], fun=-res.fun, var=-marginals[n], success=True, status=res.status,
+                          message=res.message, nit=res.nit)
@@ -0,0 +1,339 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+
+@dataclass
+class HostLimit:
+    rate: float # steady-state requests per second (token refill rate)
+    burst: int # token bucket capacity
+    max_concurrency: int # upper bound of the AIMD window
+    min_concurrency: int = 1
+    initial_concurrency: int = 4
+    max_rate: float = None # ceiling the token rate climbs to while requests succeed; None keeps it at rate
+    min_rate: float = 1.0 # floor of the token rate after 429s
+
+
+# per-host budgets, tuned to what each service tolerated in practice
+HOST_LIMITS = {
+    'yahoo': HostLimit(rate=30, burst=30, max_concurrency=24, initial_concurrency=8, max_rate=60, min_rate=5),
+    'fmp': HostLimit(rate=4, burst=4, max_concurrency=4, initial_concurrency=2),
+    'naver': HostLimit(rate=5, burst=10, max_concurrency=8),
+    'fullratio': HostLimit(rate=1, burst=3, max_concurrency=3, initial_concurrency=3),
+    'newsapi': HostLimit(rate=2, burst=4, max_concurrency=4, initial_concurrency=2),
+}
+DEFAULT_LIMIT = HostLimit(rate=5, burst=5, max_concurrency=8)
+
+# hostname suffix -> limit group
+HOST_GROUPS = {
+    'yahoo.com': 'yahoo',
+    'financialmodelingprep.com': 'fmp',
+    'naver.com': 'naver',
+    'fullratio.com': 'fullratio',
+    'newsapi.org': 'newsapi',
+}
+
+MAX_RETRIES = 5
+MAX_WORKERS = 64 # threads of the engine's pool (default executor of its loop)
+BACKOFF_BASE = 1.0 # seconds, doubled on every consecutive 429
+BACKOFF_CAP = 60.0
+RATE_WINDOW = 10.0 # seconds of history behind the live req/s figure
+
+
+class RateLimited(Exception):
+    def __init__(self, message='429 Too Many Requests', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(exc):
+    # yfinance raises YFRateLimitError ("Too Many Requests"), requests/urllib put the status code in the message
+    if isinstance(exc, RateLimited) or type(exc).__name__ == 'YFRateLimitError':
+        return True
+    message = str(exc)
+    return '429' in message or 'Too Many Requests' in message
+
+
+def parse_retry_after(value):
+    # Retry-After is either delay-seconds or an HTTP date
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostStats:
+    def __init__(self):
+        self.counts = Counter() # requests, ok, throttled, retries, errors
+        self.throttle_wait = 0.0 # seconds the host was blocked by 429 backoff, counted once per block
+        self.acquire_wait = 0.0 # seconds spent waiting for a window slot or a token, backoff included
+        self._recent = deque()
+
+    def record(self, outcome):
+        self.counts['requests'] += 1
+        self.counts[outcome] += 1
+        now = time.monotonic()
+        self._recent.append(now)
+        while self._recent and now - self._recent[0] > RATE_WINDOW:
+            self._recent.popleft()
+
+    def rate(self):
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > RATE_WINDOW:
+            self._recent.popleft()
+        return len(self._recent) / RATE_WINDOW
+
+
+class HostLimiter:
+    """
+    Token bucket + AIMD concurrency window for one host.
+
+    Every success grows the window by 1/window (about +1 per round trip), every 429 halves it
+    and blocks the whole host until Retry-After (or an exponential backoff) has passed. With a
+    max_rate the bucket's refill rate follows the same rule: +1/rate per success (about +1 req/s
+    every second) up to max_rate, halved down to min_rate on a 429.
+    """
+
+    def __init__(self, name, limit: HostLimit):
+        self.name = name
+        self.limit = limit
+        self.bucket = TokenBucket(limit.rate, limit.burst)
+        self.rate = float(limit.rate)
+        self.window = float(min(limit.initial_concurrency, limit.max_concurrency))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.stats = HostStats()
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        start = time.monotonic()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < max(1, int(self.window)))
+            self.in_flight += 1
+        while True:
+            while (delay := self.blocked_until - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+            if self.blocked_until <= time.monotonic(): # a 429 that arrived while waiting for a token blocks this one too
+                break
+        self.stats.acquire_wait += time.monotonic() - start
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self.consecutive_throttles = 0
+        self.window = min(self.limit.max_concurrency, self.window + 1 / self.window)
+        if self.limit.max_rate:
+            self._set_rate(min(self.limit.max_rate, self.rate + 1 / self.rate))
+        self.stats.record('ok')
+
+    def on_throttle(self, retry_after=None):
+        self.consecutive_throttles += 1
+        self.window = max(self.limit.min_concurrency, self.window / 2)
+        if self.limit.max_rate:
+            self._set_rate(max(self.limit.min_rate, self.rate / 2))
+        if retry_after is None:
+            backoff = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (self.consecutive_throttles - 1))
+            retry_after = backoff * random.uniform(0.5, 1.0) # jitter so workers don't retry in lockstep
+        now = time.monotonic()
+        if now + retry_after > self.blocked_until: # only the extension of the block counts, not every waiter
+            self.stats.throttle_wait += now + retry_after - max(self.blocked_until, now)
+            self.blocked_until = now + retry_after
+        self.stats.record('throttled')
+
+    def _set_rate(self, rate):
+        self.bucket._refill() # tokens so far at the old rate
+        self.rate = self.bucket.rate = rate
+
+    def on_error(self):
+        self.stats.record('errors')
+
+    def status(self):
+        c = self.stats.counts
+        return (f"{self.name} {self.stats.rate():.1f} req/s (window {self.window:.1f}, limit {self.rate:.0f}/s, in flight {self.in_flight}, "
+                f"ok {c['ok']}, 429 {c['throttled']}, errors {c['errors']})")
+
+
+class FetchEngine:
+    """
+    Asyncio fetch layer with per-host rate limiting.
+
+    The engine owns one event loop on a background thread. Blocking work (yfinance, requests)
+    runs in a thread pool under the host's limiter; sync code can use run() / get_blocking().
+    """
+
+    def __init__(self, limits=None, host_groups=None, max_retries=MAX_RETRIES, max_workers=MAX_WORKERS, report_every=None):
+        self.limits = {**HOST_LIMITS, **(limits or {})}
+        self.host_groups = {**HOST_GROUPS, **(host_groups or {})}
+        self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.report_every = report_every
+        self._limiters = {}
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._reporter = None
+
+    def start(self):
+        if self._loop is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+        self._loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(target=self._loop.run_forever, name='fetch-engine', daemon=True)
+        self._thread.start()
+        if self.report_every:
+            self._reporter = asyncio.run_coroutine_threadsafe(self._report(self.report_every), self._loop)
+        return self
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._reporter is not None:
+            self._reporter.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=False)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, coro):
+        # run a coroutine on the engine loop from sync code and wait for its result
+        self.start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("FetchEngine.run() called from the engine loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def group_of(self, url):
+        hostname = urlparse(url).hostname or ''
+        for suffix, group in self.host_groups.items():
+            if hostname == suffix or hostname.endswith('.' + suffix):
+                return group
+        return hostname
+
+    def limiter(self, host):
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(host, self.limits.get(host, DEFAULT_LIMIT))
+        return self._limiters[host]
+
+    async def call(self, host, fn, *args, **kwargs):
+        limiter = self.limiter(host)
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            try:
+                result = await asyncio.to_thread(fn, *args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    limiter.on_error()
+                    raise
+                limiter.on_throttle(getattr(e, 'retry_after', None))
+                if attempt == self.max_retries:
+                    raise
+                limiter.stats.counts['retries'] += 1
+                continue
+            finally:
+                await limiter.release()
+            limiter.on_success()
+            return result
+
+    async def get(self, url, host=None, **kwargs):
+        import requests
+
+        def send():
+            response = requests.get(url, **kwargs)
+            if response.status_code == 429:
+                raise RateLimited(f"429 Too Many Requests: {url}", parse_retry_after(response.headers.get('Retry-After')))
+            return response
+        return await self.call(host or self.group_of(url), send)
+
+    def get_blocking(self, url, **kwargs):
+        # drop-in for requests.get in sync scrapers running off the engine loop
+        return self.run(self.get(url, **kwargs))
+
+    async def map(self, fn, items, concurrency=32):
+        # run the coroutine function over items with at most `concurrency` of them in flight
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await fn(item)
+
+        return await asyncio.gather(*(bounded(item) for item in items), return_exceptions=True)
+
+    def request_counts(self):
+        # {host: {'requests': n, 'ok': n, 'throttled': n, 'retries': n, 'errors': n}}
+        return {name: dict(limiter.stats.counts) for name, limiter in self._limiters.items()}
+
+    def limiter_state(self):
+        # live AIMD state per host, for queue-depth sampling
+        return {name: {'in_flight': limiter.in_flight, 'window': round(limiter.window, 2), 'rate': limiter.stats.rate(),
+                       'blocked_for': max(0.0, limiter.blocked_until - time.monotonic())}
+                for name, limiter in self._limiters.items()}
+
+    def wait_times(self):
+        # {host: (seconds blocked by 429 backoff, seconds waiting for the limiter in total)}
+        return {name: (limiter.stats.throttle_wait, limiter.stats.acquire_wait) for name, limiter in self._limiters.items()}
+
+    def status(self):
+        return ' | '.join(limiter.status() for limiter in self._limiters.values())
+
+    async def _report(self, every):
+        while True:
+            await asyncio.sleep(every)
+            if self._limiters:
+                print(self.status())
+
+    def summary(self):
+        lines = ['Requests by host:']
+        for name, limiter in self._limiters.items():
+            c = limiter.stats.counts
+            lines.append(f"  {name:<12} {c['requests']:>6} requests  ok {c['ok']:>6}  429 {c['throttled']:>4}  "
+                         f"retries {c['retries']:>4}  errors {c['errors']:>4}  backoff {limiter.stats.throttle_wait:.1f}s")
+        return '\n'.join(lines)
@@ -0,0 +1,88 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class Frontier:
+    """
+    Exact efficient-frontier portfolios, lowest return first, plus the min-variance and max-Sharpe points.
+
+    weights is (points, assets); frame() gives Returns / Volatility / Sharpe Ratio and one column per ticker.
+    """
+
+    def __init__(self, optimizer, targets, weights, success, min_variance, max_sharpe):
+        self.tickers = optimizer.tickers
+        self.targets = targets
+        self.weights = weights
+        self.success = success
+        self.min_variance = min_variance # OptimizeResult
+        self.max_sharpe = max_sharpe # OptimizeResult
+        self.returns, self.volatility, self.sharpe = (np.array(v) for v in zip(*(optimizer.performance(w) for w in weights)))
+
+    def __len__(self):
+        return len(self.weights)
+
+    def frame(self):
+        df = pd.DataFrame({'Returns': self.returns, 'Volatility': self.volatility, 'Sharpe Ratio': self.sharpe, 'Converged': self.success})
+        return pd.concat([df, pd.DataFrame(self.weights, columns=self.tickers)], axis=1)
+
+
+def _segment(optimizer, mode, targets, x0):
+    # one contiguous run of the grid, every point warm-started from its neighbor's solution
+    weights, success = [], []
+    for target in targets:
+        if mode == 'return':
+            res = optimizer.solve('variance', x0, [optimizer.target_return(target)])
+        else:
+            res = optimizer.solve('utility', x0, risk_aversion=target)
+        weights.append(res.x)
+        success.append(bool(res.success))
+        if res.success:
+            x0 = res.x
+    return weights, success
+
+
+def efficient_frontier(optimizer, points=50, mode='return', risk_aversion=(0.1, 1000), lambda_penalty=0.0, workers=None):
+    """
+    Minimum-variance portfolios of optimizer (optimizer.PortfolioOptimizer) over a grid of targets.
+
+    mode='return' solves min variance at evenly spaced target returns between the min-variance
+    and the max-return portfolio; mode='risk_aversion' maximizes mean-variance utility over a
+    geometric grid of risk aversions. The grid is cut into one segment per worker, solved in a
+    process pool; a segment starts from the blend of the min-variance and max-return weights at
+    its first target (feasible, and on target since returns are linear in the weights).
+    max_sharpe is solved from the best frontier point with sharpe.ipynb's lambda_penalty.
+    """
+    min_var = optimizer.solve('variance')
+    top = optimizer.max_return_weights()
+    low, high = min_var.x @ optimizer.mean, top @ optimizer.mean
+    if mode == 'return':
+        targets = np.linspace(low, high, points)
+    elif mode == 'risk_aversion':
+        targets = np.geomspace(max(risk_aversion), min(risk_aversion), points) # most risk-averse (lowest return) first
+    else:
+        raise ValueError(f"unknown frontier mode {mode!r}, expected 'return' or 'risk_aversion'")
+
+    workers = min(workers or os.cpu_count() or 1, points)
+    segments = [s for s in np.array_split(targets, workers) if len(s)]
+    starts = []
+    for i, segment in enumerate(segments):
+        alpha = (segment[0] - low) / (high - low) if mode == 'return' and high > low else i / len(segments)
+        starts.append((1 - alpha) * min_var.x + alpha * top)
+    if len(segments) > 1:
+        with ProcessPoolExecutor(max_workers=len(segments)) as pool:
+            solved = list(pool.map(_segment, [optimizer] * len(segments), [mode] * len(segments), segments, starts))
+    else:
+        solved = [_segment(optimizer, mode, segments[0], starts[0])]
+
+    weights = np.array([w for segment, _ in solved for w in segment])
+    success = [ok for _, segment in solved for ok in segment]
+    best = max((i for i in range(len(weights)) if success[i]), key=lambda i: optimizer.performance(weights[i])[2], default=None)
+    max_sharpe = optimizer.solve('sharpe', weights[best] if best is not None else None, lambda_penalty=lambda_penalty)
+    return Frontier(optimizer, targets, weights, success, min_var, max_sharpe)
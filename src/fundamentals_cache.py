@@ -0,0 +1,201 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import os
+import shelve
+import threading
+import time
+from collections import Counter
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache')
+CACHE_FILE = os.path.join(CACHE_DIR, 'fundamentals_cache')
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# how long each yahoo dataset stays fresh on disk (seconds)
+DATASET_TTL = {
+    'history': 15 * MINUTE, # quotes move every minute
+    'info': DAY, # price-dependent ratios (PER, PBR) refresh daily
+    'sustainability': WEEK,
+    'dividends': WEEK, # 10y dividend history barely changes
+    'quarterly_earnings': WEEK,
+    'financials': 2 * WEEK, # annual statements
+    'balance_sheet': 2 * WEEK,
+}
+DEFAULT_TTL = DAY
+# an empty response (what yahoo sends when it quietly throttles) is kept this long at most, not the dataset's TTL
+EMPTY_TTL = 6 * HOUR
+MAX_ENTRIES = 20000 # ~7 datasets x 3000 tickers
+
+_INDEX_KEY = '__index__'
+_INDEX_FLUSH_EVERY = 100 # persist the LRU index every N writes in case the run crashes
+_MISSING = object()
+
+
+def is_empty(value):
+    # None, an empty DataFrame / Series / container, or an info dict with nothing but None in it
+    if value is None:
+        return True
+    if hasattr(value, 'empty'):
+        return bool(value.empty)
+    if isinstance(value, dict):
+        return all(v is None for v in value.values())
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+class FundamentalsCache:
+    """
+    Persistent cache of yahoo datasets keyed by (ticker, dataset).
+
+    Each entry expires after its dataset's TTL (empty loads after EMPTY_TTL at most); once more than
+    max_entries are stored the least recently used ones are evicted. Hit/miss counts are kept per dataset.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=None, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttl = {**DATASET_TTL, **(ttl or {})}
+        self.max_entries = max_entries
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._shelf = None
+        self._index = {} # key -> [stored_at, last_access]
+        self._writes = 0
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._shelf = shelve.open(self.path)
+        self._index = dict(self._shelf.get(_INDEX_KEY, {}))
+        self.purge_expired()
+        return self
+
+    def close(self):
+        if self._shelf is None:
+            return
+        with self._lock:
+            self._shelf[_INDEX_KEY] = self._index
+            self._shelf.close()
+            self._shelf = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _key(ticker, dataset):
+        return f'{ticker}|{dataset}'
+
+    def _ttl(self, dataset):
+        return self.ttl.get(dataset, DEFAULT_TTL)
+
+    def contains(self, ticker, dataset):
+        # fresh entry on disk? (does not count as a hit or miss)
+        key = self._key(ticker, dataset)
+        with self._lock:
+            entry = self._index.get(key)
+            return entry is not None and time.time() - entry[0] <= self._ttl(dataset)
+
+    def get(self, ticker, dataset, default=None):
+        value = self._lookup(ticker, dataset)
+        return default if value is _MISSING else value
+
+    def _lookup(self, ticker, dataset):
+        key = self._key(ticker, dataset)
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None and key in self._shelf: # written before the index was flushed
+                entry = [self._shelf[key][0], now]
+                self._index[key] = entry
+            if entry is None or now - entry[0] > self._ttl(dataset):
+                self.misses[dataset] += 1
+                return _MISSING
+            try:
+                value = self._shelf[key][1]
+            except KeyError:
+                del self._index[key]
+                self.misses[dataset] += 1
+                return _MISSING
+            entry[1] = now
+            self.hits[dataset] += 1
+            return value
+
+    def put(self, ticker, dataset, value, ttl=None):
+        # ttl shorter than the dataset's: stored_at is backdated so the usual expiry check drops it after ttl
+        key = self._key(ticker, dataset)
+        now = time.time()
+        stored_at = now - max(0, self._ttl(dataset) - ttl) if ttl is not None else now
+        with self._lock:
+            self._shelf[key] = (stored_at, value)
+            self._index[key] = [stored_at, now]
+            self._writes += 1
+            if len(self._index) > self.max_entries:
+                self._evict()
+            if self._writes % _INDEX_FLUSH_EVERY == 0:
+                self._shelf[_INDEX_KEY] = self._index
+
+    def invalidate(self, ticker, datasets):
+        # drop entries that are known to be stale before their TTL (new filings, dividends)
+        with self._lock:
+            for dataset in datasets:
+                key = self._key(ticker, dataset)
+                self._index.pop(key, None)
+                if key in self._shelf:
+                    del self._shelf[key]
+
+    def get_or_load(self, ticker, dataset, loader):
+        # loader runs outside the lock so slow downloads don't block other threads
+        value = self._lookup(ticker, dataset)
+        if value is _MISSING:
+            value = loader()
+            self.put(ticker, dataset, value, EMPTY_TTL if is_empty(value) else None)
+        return value
+
+    def _evict(self):
+        # drop down to 90% of capacity at once so we don't evict on every put
+        target = int(self.max_entries * 0.9)
+        by_access = sorted(self._index.items(), key=lambda item: item[1][1])
+        for key, _ in by_access[:len(self._index) - target]:
+            del self._index[key]
+            if key in self._shelf:
+                del self._shelf[key]
+            self.evictions += 1
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for key, (stored_at, _) in list(self._index.items()):
+                dataset = key.rsplit('|', 1)[-1]
+                if now - stored_at > self._ttl(dataset):
+                    del self._index[key]
+                    if key in self._shelf:
+                        del self._shelf[key]
+
+    def stats(self):
+        datasets = sorted(set(self.hits) | set(self.misses))
+        stats = {}
+        for dataset in datasets:
+            total = self.hits[dataset] + self.misses[dataset]
+            stats[dataset] = {
+                'hits': self.hits[dataset],
+                'misses': self.misses[dataset],
+                'hit_rate': self.hits[dataset] / total if total else 0.0,
+            }
+        return stats
+
+    def summary(self):
+        lines = [f'Fundamentals cache ({len(self._index)} entries, {self.evictions} evicted):']
+        for dataset, s in self.stats().items():
+            lines.append(f"  {dataset:<20} hits {s['hits']:>6}  misses {s['misses']:>6}  ({s['hit_rate']:.0%})")
+        return '\n'.join(lines)
@@ -0,0 +1,313 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import email.message
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# query parameters that change between sessions (auth, cache busters) and must not be part of the key
+VOLATILE_PARAMS = {'apikey', 'apiKey', 'api_key', 'key', 'crumb', '_', 'serviceKey', 'file_type'}
+
+MODES = ('off', 'record', 'replay')
+ENV_MODE = 'HTTP_ARCHIVE_MODE'
+ENV_PATH = 'HTTP_ARCHIVE_PATH'
+ENV_LATENCY = 'HTTP_ARCHIVE_LATENCY'
+
+
+class ArchiveMiss(KeyError):
+    pass
+
+
+def normalize_url(url, params=None):
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    query = sorted((str(k), str(v)) for k, v in query if k not in VOLATILE_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def request_key(method, url, body=None, params=None):
+    digest = hashlib.sha1(f"{method.upper()} {normalize_url(url, params)}".encode())
+    if body:
+        digest.update(body if isinstance(body, bytes) else str(body).encode())
+    return digest.hexdigest()
+
+
+class FakeResponse:
+    # duck-typed response for clients whose Response class can't be built by hand (curl_cffi)
+    def __init__(self, status_code, headers, content, url):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.cookies = {}
+        self.encoding = 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self, **kwargs):
+        return json.loads(self.content, **kwargs)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise Exception(f"{self.status_code} Error for url: {self.url}")
+
+
+class HttpArchive:
+    """
+    Record every HTTP response of a run into one compact zip archive, or serve them back offline.
+
+    Hooks requests (pykrx, naver, fmp, fetch_engine), urllib (pandas/fredapi), curl_cffi (yfinance)
+    and httpx (google-genai). Repeated requests are replayed in recorded order. In replay mode every
+    response is delayed by latency + latency_scale * recorded round-trip time.
+    """
+
+    def __init__(self, path, mode='replay', latency=0.0, latency_scale=0.0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._seen = Counter() # key -> responses served/recorded so far
+        self._index = {} # key -> number of recorded responses
+        self._zip = None
+        self._patches = []
+
+    # ---- storage
+
+    def open(self):
+        if self.mode == 'record':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._zip = zipfile.ZipFile(self.path + '.tmp', 'w', compression=zipfile.ZIP_DEFLATED)
+        elif self.mode == 'replay':
+            self._zip = zipfile.ZipFile(self.path, 'r')
+            self._index = json.loads(self._zip.read('index.json'))
+        return self
+
+    def close(self):
+        if self._zip is None:
+            return
+        if self.mode == 'record':
+            self._zip.writestr('index.json', json.dumps(self._index))
+            self._zip.close()
+            shutil.move(self.path + '.tmp', self.path)
+        else:
+            self._zip.close()
+        self._zip = None
+
+    def _store(self, key, method, url, status, headers, body, elapsed):
+        with self._lock:
+            n = self._index.get(key, 0)
+            self._index[key] = n + 1
+            meta = {'method': method, 'url': url, 'status': status, 'headers': dict(headers), 'elapsed': elapsed}
+            self._zip.writestr(f'{key}/{n}.json', json.dumps(meta))
+            self._zip.writestr(f'{key}/{n}.body', body)
+            self.stats['recorded'] += 1
+
+    def _load(self, key, method, url):
+        with self._lock:
+            count = self._index.get(key)
+            if not count:
+                self.stats['missed'] += 1
+                raise ArchiveMiss(f"{method} {url} is not in {self.path}")
+            n = min(self._seen[key], count - 1) # past the recorded sequence, keep serving the last response
+            self._seen[key] += 1
+            meta = json.loads(self._zip.read(f'{key}/{n}.json'))
+            body = self._zip.read(f'{key}/{n}.body')
+            self.stats['replayed'] += 1
+        delay = self.latency + self.latency_scale * meta.get('elapsed', 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        return meta, body
+
+    def exchange(self, method, url, send, body=None, params=None):
+        # send() performs the real request and returns (status, headers, body); only called when recording
+        key = request_key(method, url, body, params)
+        if self.mode == 'replay':
+            meta, content = self._load(key, method, url)
+            return meta['status'], meta['headers'], content
+        start = time.perf_counter()
+        status, headers, content = send()
+        self._store(key, method, url, status, headers, content, time.perf_counter() - start)
+        return status, headers, content
+
+    # ---- client hooks
+
+    def _patch(self, owner, name, replacement):
+        self._patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _hook_requests(self):
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from requests.structures import CaseInsensitiveDict
+        except ImportError:
+            return
+        archive, original = self, HTTPAdapter.send
+
+        def send(adapter, request, **kwargs):
+            holder = {}
+
+            def real():
+                response = original(adapter, request, **kwargs)
+                holder['response'] = response
+                return response.status_code, response.headers, response.content
+
+            status, headers, content = archive.exchange(request.method, request.url, real, request.body)
+            if 'response' in holder:
+                return holder['response']
+            response = requests.Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            response.headers.pop('Content-Encoding', None) # body is stored decoded
+            response._content = content
+            response.url = request.url
+            response.request = request
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            return response
+
+        self._patch(HTTPAdapter, 'send', send)
+
+    def _hook_urllib(self):
+        import urllib.request
+        import urllib.response
+
+        archive, original = self, urllib.request.OpenerDirector.open
+
+        def open_(opener, fullurl, data=None, *args, **kwargs):
+            url = fullurl.full_url if isinstance(fullurl, urllib.request.Request) else fullurl
+            method = fullurl.get_method() if isinstance(fullurl, urllib.request.Request) else ('POST' if data else 'GET')
+            holder = {}
+
+            def real():
+                response = original(opener, fullurl, data, *args, **kwargs)
+                content = response.read()
+                holder['status'], holder['headers'] = response.status, response.headers
+                return response.status, dict(response.headers), content
+
+            status, headers, content = archive.exchange(method, url, real, data)
+            message = email.message.Message()
+            for key, value in headers.items():
+                if key.lower() != 'content-encoding':
+                    message[key] = value
+            return urllib.response.addinfourl(io.BytesIO(content), message, url, status)
+
+        self._patch(urllib.request.OpenerDirector, 'open', open_)
+
+    def _hook_curl_cffi(self):
+        try:
+            from curl_cffi import requests as curl_requests
+        except ImportError:
+            return
+        archive, original = self, curl_requests.Session.request
+
+        def request(session, method, url, params=None, data=None, **kwargs):
+            holder = {}
+            body = data if data is not None else json.dumps(kwargs['json'], sort_keys=True) if kwargs.get('json') is not None else None
+
+            def real():
+                response = original(session, method, url, params=params, data=data, **kwargs)
+                holder['response'] = response
+                return response.status_code, dict(response.headers), response.content
+
+            status, headers, content = archive.exchange(method, url, real, body, params)
+            if 'response' in holder:
+                return holder['response']
+            return FakeResponse(status, headers, content, url)
+
+        self._patch(curl_requests.Session, 'request', request)
+
+    def _hook_httpx(self):
+        try:
+            import httpx
+        except ImportError:
+            return
+        archive = self
+        original, original_async = httpx.HTTPTransport.handle_request, httpx.AsyncHTTPTransport.handle_async_request
+
+        def rebuild(request, status, headers, content):
+            headers = {k: v for k, v in headers.items() if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+            return httpx.Response(status, headers=headers, content=content, request=request)
+
+        def handle_request(transport, request):
+            def real():
+                response = original(transport, request)
+                content = response.read()
+                return response.status_code, dict(response.headers), content
+
+            status, headers, content = archive.exchange(request.method, str(request.url), real, request.content)
+            return rebuild(request, status, headers, content)
+
+        async def handle_async_request(transport, request):
+            if archive.mode == 'replay':
+                status, headers, content = archive.exchange(request.method, str(request.url), None, request.content)
+                return rebuild(request, status, headers, content)
+            start = time.perf_counter()
+            response = await original_async(transport, request)
+            content = await response.aread()
+            archive._store(request_key(request.method, str(request.url), request.content), request.method, str(request.url),
+                           response.status_code, dict(response.headers), content, time.perf_counter() - start)
+            return rebuild(request, response.status_code, dict(response.headers), content)
+
+        self._patch(httpx.HTTPTransport, 'handle_request', handle_request)
+        self._patch(httpx.AsyncHTTPTransport, 'handle_async_request', handle_async_request)
+
+    def install(self):
+        if self.mode == 'off':
+            return self
+        self.open()
+        self._hook_requests()
+        self._hook_urllib()
+        self._hook_curl_cffi()
+        self._hook_httpx()
+        return self
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches = []
+        self.close()
+
+    @contextmanager
+    def activate(self):
+        self.install()
+        try:
+            yield self
+        finally:
+            self.uninstall()
+
+    def summary(self):
+        return f"HTTP archive ({self.mode}, {self.path}): " + ', '.join(f'{k} {v}' for k, v in sorted(self.stats.items()))
+
+
+def install_from_env():
+    # HTTP_ARCHIVE_MODE=record|replay HTTP_ARCHIVE_PATH=... [HTTP_ARCHIVE_LATENCY=seconds]; for notebooks and scripts
+    mode = os.getenv(ENV_MODE, 'off')
+    if mode == 'off':
+        return None
+    archive = HttpArchive(os.environ[ENV_PATH], mode, latency=float(os.getenv(ENV_LATENCY, 0.0))).install()
+    import atexit
+    atexit.register(archive.uninstall)
+    return archive
@@ -0,0 +1,160 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from snapshot import TickerSnapshot
+
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# FullRatio의 산업별 PER/ROE/ROA 페이지 URL
+FULLRATIO_URLS = {
+    'P/E Ratio': 'https://fullratio.com/pe-ratio-by-industry',
+    'ROE': 'https://fullratio.com/roe-by-industry',
+    'ROA': 'https://fullratio.com/roa-by-industry',
+}
+
+NAVER_ITEM_URL = 'https://finance.naver.com/item/main.nhn?code={code}'
+NAVER_SECTOR_URL = 'https://finance.naver.com/sise/sise_group_detail.naver?type=upjong&no={no}'
+
+
+def _default_get(url, **kwargs):
+    import requests
+
+    return requests.get(url, **kwargs)
+
+
+def _soup(html):
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, 'html.parser')
+
+
+def scrape_fullratio_table(url, column, http_get=_default_get):
+    response = http_get(url, headers=HEADERS)
+    soup = _soup(response.text)
+
+    # 테이블 찾기 (이때 table이 None인지 체크)
+    table = soup.find('table')
+    if table is None:
+        raise Exception("테이블을 찾을 수 없습니다. 구조가 바뀌었거나 JS로 로딩될 수 있습니다.")
+
+    # tbody가 있는 경우
+    tbody = table.find('tbody')
+    rows = tbody.find_all('tr') if tbody else table.find_all('tr')[1:] # 헤더 제외
+
+    # 각 행에서 데이터 추출
+    table_data = []
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) >= 2:
+            table_data.append({'Industry': cols[0].text.strip(), column: cols[1].text.strip()})
+    return table_data
+
+
+def _query_param(href, name):
+    return parse_qs(urlparse(href).query).get(name, [None])[0]
+
+
+class IndustryBenchmarks:
+    """
+    Industry-level comparables shared by every ticker in a run.
+
+    Index-fund PEs (SPY/EWJ/VT) are fetched once per run, fullratio tables are scraped once and
+    indexed by industry name, and Naver's 동일업종 PER is cached per Naver sector (업종) code.
+    """
+
+    snapshot_class = TickerSnapshot
+
+    def __init__(self, cache=None, http_get=_default_get):
+        self.cache = cache
+        self.http_get = http_get
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._index_pe = {}
+        self._tables = {} # column -> {industry: value}
+        self._sector_per = {} # naver sector code -> 동일업종 PER
+        self._sector_of = {} # 6-digit stock code -> naver sector code
+        self._loaded_sectors = set()
+
+    def _once(self, key):
+        # one lock per lookup so concurrent threads wait for the first fetch instead of repeating it
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get(self, url, **kwargs):
+        self.requests += 1
+        return self.http_get(url, **{'headers': HEADERS, **kwargs})
+
+    def index_pe(self, symbol):
+        with self._once(('index', symbol)):
+            if symbol not in self._index_pe:
+                self._index_pe[symbol] = self.snapshot_class(symbol, self.cache).info.get('trailingPE')
+            return self._index_pe[symbol]
+
+    def industry_table(self, column):
+        with self._once(('fullratio', column)):
+            if column not in self._tables:
+                index = {}
+                for row in scrape_fullratio_table(FULLRATIO_URLS[column], column, self._get):
+                    try:
+                        index[row['Industry']] = float(row[column])
+                    except ValueError:
+                        continue
+                self._tables[column] = index
+            return self._tables[column]
+
+    def load_fullratio(self):
+        for column in FULLRATIO_URLS:
+            self.industry_table(column)
+
+    def industry_value(self, column, industry):
+        if industry is None:
+            return None
+        return self.industry_table(column).get(industry)
+
+    def naver_sector_per(self, ticker):
+        code = ticker[:6]
+        sector = self._sector_of.get(code)
+        if sector is not None and sector in self._sector_per:
+            return self._sector_per[sector]
+
+        res = self._get(NAVER_ITEM_URL.format(code=code))
+        soup = _soup(res.text)
+
+        per = None
+        # 동일업종 PER이 들어있는 박스 찾기
+        aside = soup.select_one('div.aside_invest_info')
+        if aside:
+            for row in aside.select('table tr'):
+                if '동일업종 PER' in row.text:
+                    per = float(row.select_one('td em').text.replace(',', ''))
+                    break
+
+        sector_link = soup.select_one('a[href*="sise_group_detail"][href*="type=upjong"]')
+        if sector_link is not None:
+            sector = _query_param(sector_link['href'], 'no')
+            if sector is not None:
+                self._sector_per[sector] = per
+                self._sector_of[code] = sector
+                self._load_sector_members(sector)
+        return per
+
+    def _load_sector_members(self, sector):
+        # one request maps every company of the sector, so the rest of them never hit naver
+        with self._once(('sector', sector)):
+            if sector in self._loaded_sectors:
+                return
+            try:
+                res = self._get(NAVER_SECTOR_URL.format(no=sector))
+                soup = _soup(res.text)
+                for link in soup.select('a[href*="/item/main"][href*="code="]'):
+                    member = _query_param(link['href'], 'code')
+                    if member:
+                        self._sector_of.setdefault(member, sector)
+            finally:
+                self._loaded_sectors.add(sector)
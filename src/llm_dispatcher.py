@@ -0,0 +1,208 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from fetch_engine import BACKOFF_BASE, BACKOFF_CAP, HostLimit, HostLimiter, is_rate_limit_error
+
+
+MINUTE = 60.0
+
+
+@dataclass
+class ModelQuota:
+    rpm: int # requests per minute
+    tpm: int # tokens (prompt + output) per minute
+    max_concurrency: int = 32 # upper bound of the AIMD window
+    min_concurrency: int = 1
+    initial_concurrency: int = 4
+    input_price: float = 0.0 # USD per million prompt tokens
+    output_price: float = 0.0 # USD per million output tokens, thinking included
+
+
+# paid tier 1 limits and list prices; override with quota= (or MOAT_RPM / MOAT_TPM in moat.py) for other tiers
+MODEL_QUOTAS = {
+    'gemini-2.5-flash': ModelQuota(rpm=1000, tpm=1_000_000, input_price=0.30, output_price=2.50),
+    'gemini-2.5-flash-preview-04-17': ModelQuota(rpm=1000, tpm=1_000_000, input_price=0.15, output_price=3.50),
+    'gemini-2.5-flash-preview-05-20': ModelQuota(rpm=1000, tpm=1_000_000, input_price=0.15, output_price=3.50),
+    'gemini-2.5-pro': ModelQuota(rpm=150, tpm=2_000_000, input_price=1.25, output_price=10.0),
+}
+DEFAULT_QUOTA = ModelQuota(rpm=10, tpm=250_000, max_concurrency=4, initial_concurrency=2) # free tier
+EXPECTED_OUTPUT = 2000 # output tokens reserved per call until real responses give a running mean
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class Completion:
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class MinuteBudget:
+    """
+    Sliding one-minute window of usage against a per-minute limit, the way the provider counts it.
+
+    reserve(n) waits until n more fit in the last 60 s and returns the reservation; settle() swaps
+    an estimate for the real amount once it is known. acquire() reserves one, so a request budget
+    can stand in for HostLimiter's token bucket.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.events = deque() # [time, amount], oldest first
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now):
+        while self.events and now - self.events[0][0] >= MINUTE:
+            self.used -= self.events.popleft()[1]
+
+    def wait_time(self, amount, now=None):
+        now = now or time.monotonic()
+        self._expire(now)
+        excess = self.used + min(amount, self.limit) - self.limit # a call larger than the limit goes alone
+        if excess <= 0:
+            return 0.0
+        for at, used in self.events: # until enough of the oldest usage has left the window
+            excess -= used
+            if excess <= 0:
+                return at + MINUTE - now
+        return 0.0
+
+    async def reserve(self, amount):
+        async with self._lock: # first come first served: a large call isn't starved by small ones
+            while (delay := self.wait_time(amount)) > 0:
+                await asyncio.sleep(delay)
+            entry = [time.monotonic(), amount]
+            self.events.append(entry)
+            self.used += amount
+            return entry
+
+    def settle(self, entry, amount):
+        if entry in self.events: # still inside the window
+            self.used += amount - entry[1]
+        entry[1] = amount
+
+    async def acquire(self):
+        await self.reserve(1)
+
+    def rate(self):
+        self._expire(time.monotonic())
+        return self.used
+
+
+class LLMDispatcher:
+    """
+    Asyncio dispatcher of one LLM call per item under a model's requests- and tokens-per-minute quota.
+
+    Concurrency is fetch_engine's AIMD window: +1 per round trip while calls succeed, halved
+    (with the whole model paused) on a 429. A call first reserves a request and its estimated
+    tokens (prompt length + running mean of the output); the estimate is settled with the usage
+    the response reports. Every finished item goes to sink right away. records has elapsed
+    seconds, attempts, tokens and cost per item; summary() the throughput and total cost.
+    """
+
+    def __init__(self, model, quota=None, max_attempts=4, report_every=None):
+        self.model = model
+        self.quota = quota or MODEL_QUOTAS.get(model, DEFAULT_QUOTA)
+        q = self.quota
+        self.limiter = HostLimiter(model, HostLimit(rate=q.rpm / MINUTE, burst=1, max_concurrency=q.max_concurrency,
+                                                    min_concurrency=q.min_concurrency, initial_concurrency=q.initial_concurrency))
+        self.limiter.bucket = MinuteBudget(q.rpm) # the provider counts requests per minute, not a per-second rate
+        self.tokens = MinuteBudget(q.tpm)
+        self.max_attempts = max_attempts
+        self.report_every = report_every
+        self.expected_output = EXPECTED_OUTPUT
+        self.records = []
+        self.started = self.finished = None
+
+    def cost(self, completion):
+        return (completion.input_tokens * self.quota.input_price + completion.output_tokens * self.quota.output_price) / 1e6
+
+    async def _one(self, key, prompt, call, sink):
+        estimate = len(prompt) // CHARS_PER_TOKEN + int(self.expected_output)
+        start = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            await self.limiter.acquire()
+            reservation = await self.tokens.reserve(estimate)
+            error = None
+            try:
+                completion = await call(prompt)
+            except Exception as e:
+                error = e
+            finally:
+                await self.limiter.release()
+            if error is None:
+                break
+            if is_rate_limit_error(error):
+                self.tokens.settle(reservation, 0) # refused, nothing was consumed
+                self.limiter.on_throttle(getattr(error, 'retry_after', None))
+            else:
+                self.limiter.on_error()
+            if attempt == self.max_attempts:
+                self.records.append({'item': key, 'ok': False, 'seconds': time.monotonic() - start, 'attempts': attempt,
+                                     'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0, 'error': str(error)[:300]})
+                return None
+            self.limiter.stats.counts['retries'] += 1
+            if not is_rate_limit_error(error):
+                await asyncio.sleep(min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+        self.limiter.on_success()
+        used = completion.input_tokens + completion.output_tokens
+        self.tokens.settle(reservation, used or estimate)
+        if completion.output_tokens:
+            self.expected_output += (completion.output_tokens - self.expected_output) / 10 # running mean
+        self.records.append({'item': key, 'ok': True, 'seconds': time.monotonic() - start, 'attempts': attempt,
+                             'input_tokens': completion.input_tokens, 'output_tokens': completion.output_tokens,
+                             'cost': self.cost(completion), 'error': None})
+        if sink is not None:
+            sink(key, completion)
+        return completion
+
+    async def run(self, prompts, call, sink=None):
+        """
+        {key: Completion or None (failed after max_attempts)} for prompts {key: prompt}.
+
+        call(prompt) is a coroutine returning a Completion; sink(key, completion) is called as each
+        one finishes (e.g. to write it to disk), so an interrupted run keeps what it got.
+        """
+        self.started = time.monotonic()
+        reporter = asyncio.create_task(self._report(self.report_every)) if self.report_every else None
+        try:
+            results = await asyncio.gather(*(self._one(key, prompt, call, sink) for key, prompt in prompts.items()))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            self.finished = time.monotonic()
+        return dict(zip(prompts, results))
+
+    def status(self):
+        done = sum(r['ok'] for r in self.records)
+        return (f"{self.limiter.status()} | {done} done, {len(self.records) - done} failed, "
+                f"{self.limiter.bucket.rate()}/{self.quota.rpm} RPM, {self.tokens.rate()}/{self.quota.tpm} TPM")
+
+    async def _report(self, every):
+        while True:
+            await asyncio.sleep(every)
+            print(self.status())
+
+    def summary(self):
+        ok = [r for r in self.records if r['ok']]
+        seconds = ((self.finished or time.monotonic()) - self.started) if self.started else 0.0
+        minutes = max(seconds / MINUTE, 1e-9)
+        tokens = sum(r['input_tokens'] + r['output_tokens'] for r in ok)
+        cost = sum(r['cost'] for r in ok)
+        c = self.limiter.stats.counts
+        return '\n'.join([
+            f"{self.model}: {len(ok)} analyses, {len(self.records) - len(ok)} failed in {seconds:.1f}s "
+            f"({len(ok) / minutes:.1f}/min, {tokens / minutes:,.0f} tokens/min)",
+            f"  requests {c['requests']}  429 {c['throttled']}  retries {c['retries']}  errors {c['errors']}  "
+            f"backoff {self.limiter.stats.throttle_wait:.1f}s  final window {self.limiter.window:.1f}",
+            f"  cost ${cost:.4f} total, ${cost / max(len(ok), 1):.4f} per company, "
+            f"{sum(r['seconds'] for r in ok) / max(len(ok), 1):.1f}s mean latency",
+        ])
@@ -0,0 +1,207 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+PREFIX = 'screener'
+# histogram buckets (seconds) of every span, Prometheus-style cumulative
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MAX_ERROR_SAMPLES = 5 # example messages kept per exception type
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class SpanStats:
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class Metrics:
+    """
+    Timing spans, counters and sampled gauges of one run, exported as JSON and Prometheus text.
+
+    Thread-safe: spans are recorded from the fetch threads and the engine loop alike.
+    Use NullMetrics (metrics disabled) to keep the instrumented code paths free.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._spans = defaultdict(SpanStats) # (name, labels) -> SpanStats
+        self._counters = defaultdict(float) # (name, labels) -> value
+        self._gauges = {} # (name, labels) -> last value
+        self._series = defaultdict(list) # name -> [(seconds since start, {field: value})]
+        self._errors = defaultdict(list) # exception type -> sample messages
+
+    def observe(self, name, seconds, **labels):
+        with self._lock:
+            self._spans[name, _labels(labels)].add(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def call(self, name, fn, *args, **kwargs):
+        # fn(*args, **kwargs) timed as span `name`
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def count(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[name, _labels(labels)] += value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[name, _labels(labels)] = value
+
+    def sample(self, name, **fields):
+        with self._lock:
+            self._series[name].append((round(time.time() - self.started, 3), fields))
+
+    def error(self, where, exc):
+        # a swallowed exception: counted by type, with a few example messages for the JSON report
+        kind = type(exc).__name__
+        self.count('swallowed_exceptions', where=where, type=kind)
+        with self._lock:
+            if len(self._errors[kind]) < MAX_ERROR_SAMPLES:
+                self._errors[kind].append(f'{where}: {exc}'[:300])
+
+    # ---- export
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'started': self.started,
+                'duration': time.time() - self.started,
+                'spans': [{'name': name, 'labels': dict(labels), 'count': s.count, 'total': s.total,
+                           'mean': s.total / s.count if s.count else 0.0, 'max': s.max}
+                          for (name, labels), s in sorted(self._spans.items())],
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                           for (name, labels), value in sorted(self._gauges.items())],
+                'series': {name: [{'t': t, **fields} for t, fields in points] for name, points in self._series.items()},
+                'errors': dict(self._errors),
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            spans, counters, gauges = dict(self._spans), dict(self._counters), dict(self._gauges)
+
+        if spans:
+            metric = f'{PREFIX}_span_seconds'
+            lines += [f'# HELP {metric} Wall time of instrumented pipeline spans.', f'# TYPE {metric} histogram']
+            for (name, labels), s in sorted(spans.items()):
+                labels = (('span', name),) + labels
+                cumulative = 0
+                for bound, n in zip(BUCKETS, s.buckets):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{_prom_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{metric}_bucket{_prom_labels(labels, [("le", "+Inf")])} {s.count}')
+                lines.append(f'{metric}_sum{_prom_labels(labels)} {s.total:.6f}')
+                lines.append(f'{metric}_count{_prom_labels(labels)} {s.count}')
+
+        for kind, values, suffix in (('counter', counters, '_total'), ('gauge', gauges, '')):
+            for name in sorted({name for name, _ in values}):
+                metric = f'{PREFIX}_{name}{suffix}'
+                lines.append(f'# TYPE {metric} {kind}')
+                for (other, labels), value in sorted(values.items()):
+                    if other == name:
+                        lines.append(f'{metric}{_prom_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path_prefix):
+        # <prefix>.json and <prefix>.prom (node_exporter textfile collector format)
+        os.makedirs(os.path.dirname(os.path.abspath(path_prefix)), exist_ok=True)
+        with open(path_prefix + '.json', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+        tmp = path_prefix + '.prom.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path_prefix + '.prom') # atomic, so a scraper never reads half a file
+        return path_prefix + '.json', path_prefix + '.prom'
+
+    def summary(self, top=12):
+        spans = sorted(self.to_dict()['spans'], key=lambda s: s['total'], reverse=True)[:top]
+        lines = ['Time by span:']
+        for s in spans:
+            name = s['name'] + ''.join(f'.{v}' for v in s['labels'].values())
+            lines.append(f"  {name:<24} {s['total']:>8.2f}s  n {s['count']:>6}  mean {s['mean'] * 1000:>7.1f}ms  max {s['max']:.2f}s")
+        errors = [c for c in self.to_dict()['counters'] if c['name'] == 'swallowed_exceptions']
+        if errors:
+            lines.append('Swallowed exceptions: ' + ', '.join(f"{c['labels']['type']} ({c['labels']['where']}) {c['value']:g}" for c in errors))
+        return '\n'.join(lines)
+
+
+class NullMetrics:
+    # same interface as Metrics, every call is a no-op
+    enabled = False
+    _span = nullcontext()
+
+    def observe(self, name, seconds, **labels):
+        pass
+
+    def span(self, name, **labels):
+        return self._span
+
+    def call(self, name, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def count(self, name, value=1, **labels):
+        pass
+
+    def set(self, name, value, **labels):
+        pass
+
+    def sample(self, name, **fields):
+        pass
+
+    def error(self, where, exc):
+        pass
+
+    def summary(self, top=12):
+        return ''
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,84 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'moat')
+
+DAY = 24 * 60 * 60
+MAX_AGE = 30 * DAY # an analysis older than this is asked for again
+
+
+def template_hash(template):
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]
+
+
+class MoatCache:
+    """
+    Content-addressed store of LLM moat analyses, one JSON file per (company, prompt template, model).
+
+    The file name is the hash of the three, so editing the prompt or switching models misses the
+    cache by itself; an entry older than max_age is stale. Every analysis is written as soon as it
+    arrives, so an interrupted run resumes past the companies it already finished.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_age=MAX_AGE):
+        self.root = root
+        self.max_age = max_age
+        self.counts = Counter() # hit / miss / stale / write
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(company, template, model):
+        return hashlib.sha256(json.dumps([company, template_hash(template), model], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + '.json')
+
+    def get(self, company, template, model, now=None):
+        # the cached entry ({'company', 'model', 'template', 'stored_at', 'text', ...}) or None when missing / stale
+        try:
+            with open(self.path(self.key(company, template, model)), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('miss')
+            return None
+        if (now or time.time()) - entry['stored_at'] > self.max_age:
+            self._count('stale')
+            return None
+        self._count('hit')
+        return entry
+
+    def put(self, company, template, model, text, **extra):
+        entry = {'company': company, 'model': model, 'template': template_hash(template), 'stored_at': time.time(),
+                 'text': text, **extra}
+        path = self.path(self.key(company, template, model))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self._count('write')
+        return entry
+
+    def split(self, companies, template, model, now=None):
+        # ({company: cached entry}, [companies still to analyze]): only new or stale companies cost a request
+        cached, pending = {}, []
+        for company in companies:
+            entry = self.get(company, template, model, now)
+            if entry is None:
+                pending.append(company)
+            else:
+                cached[company] = entry
+        return cached, pending
+
+    def _count(self, what):
+        with self._lock:
+            self.counts[what] += 1
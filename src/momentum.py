@@ -0,0 +1,57 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import numpy as np
+
+
+MOMENTUM_WINDOWS = (63, 126, 240) # 3m, 6m, 12m in trading days
+
+
+def download_close_panel(tickers, period="1y"):
+    import yfinance as yf
+
+    # one batched download for the whole universe: rows = dates, columns = tickers
+    return yf.download(tickers, period=period, interval="1d", progress=False)['Close']
+
+
+def momentum_from_panel(panel, windows=MOMENTUM_WINDOWS):
+    """
+    Momentum for every ticker and lookback window from a single close-price panel.
+
+    Each ticker is measured on its own valid observations, i.e. the same value as
+    prices.dropna().iloc[-1] / prices.dropna().iloc[-window] - 1 per column.
+    Returns {window: {ticker: momentum or None}}.
+    """
+    prices = panel.to_numpy(dtype=float) # T x N
+    valid = ~np.isnan(prices)
+    counts = valid.sum(axis=0)
+    cols = np.arange(prices.shape[1])
+    windows = np.asarray(windows)
+
+    # row positions of each column's valid observations first, in date order (stable sort)
+    order = np.argsort(~valid, axis=0, kind='stable')
+    last = prices[order[np.maximum(counts - 1, 0), cols], cols]
+    start_pos = np.maximum(counts[None, :] - windows[:, None], 0) # windows x N
+    start = prices[order[start_pos, cols[None, :]], cols[None, :]]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        momentum = last[None, :] / start - 1
+    enough = (counts[None, :] >= windows[:, None]) & (windows[:, None] > 0)
+
+    tickers = list(panel.columns)
+    return {
+        int(window): {ticker: (float(m) if ok else None) for ticker, m, ok in zip(tickers, row, ok_row)}
+        for window, row, ok_row in zip(windows, momentum, enough)
+    }
+
+
+def get_momentum_batch(tickers, windows=MOMENTUM_WINDOWS, panel=None):
+    if panel is None:
+        try:
+            panel = download_close_panel(tickers)
+        except Exception:
+            panel = None
+    momentum = momentum_from_panel(panel, windows) if panel is not None else {int(w): {} for w in windows}
+    # tickers missing from the panel (delisted, bad symbol) get None like too-short histories
+    return {window: {ticker: values.get(ticker) for ticker in tickers} for window, values in momentum.items()}
@@ -0,0 +1,134 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS = 252
+CHUNK_BYTES = 64 * 2**20 # memory budget of one chunk's weight matrix (and its W @ L product)
+SEED_BLOCK = 2**16 # portfolios per child seed; fixed, so the draws don't depend on how they are chunked
+
+
+class Simulation:
+    """
+    Returns, volatilities and Sharpe ratios of simulated portfolios.
+
+    weights holds every portfolio (float32) when simulated with keep_weights=True; the weights of
+    the max-Sharpe and min-volatility portfolios are always kept.
+    """
+
+    def __init__(self, tickers, returns, volatility, sharpe, weights, best):
+        self.tickers = tickers
+        self.returns = returns
+        self.volatility = volatility
+        self.sharpe = sharpe
+        self.weights = weights
+        self._best = best # {'sharpe': (index, weights), 'volatility': (index, weights)}
+
+    def __len__(self):
+        return len(self.returns)
+
+    def _row(self, index, weights):
+        return pd.Series({'Returns': self.returns[index], 'Volatility': self.volatility[index],
+                          'Sharpe Ratio': self.sharpe[index], 'Portfolio Weights': np.round(weights, 4)})
+
+    def max_sharpe(self):
+        return self._row(*self._best['sharpe'])
+
+    def min_volatility(self):
+        return self._row(*self._best['volatility'])
+
+    def frame(self):
+        # one row per portfolio, same columns as sharpe.ipynb's simulations_df (plus one column per ticker when weights were kept)
+        df = pd.DataFrame({'Returns': self.returns, 'Volatility': self.volatility, 'Sharpe Ratio': self.sharpe})
+        if self.weights is not None:
+            df = pd.concat([df, pd.DataFrame(self.weights, columns=self.tickers)], axis=1)
+        return df
+
+
+class MonteCarlo:
+    """
+    Random long-only portfolios (uniform weights, normalized to sum to 1) scored in chunks.
+
+    Mean and covariance are annualized once from the daily returns; every chunk is a
+    (chunk, assets) weight matrix, so returns are W @ mu and volatilities the row norms of W @ L
+    (L the Cholesky factor of the covariance). Every SEED_BLOCK portfolios draw from their own
+    child seed, so a seeded run gives the same portfolios for any chunk size or number of workers.
+    numpy releases the GIL inside the generator and BLAS, so workers are threads.
+    """
+
+    def __init__(self, returns, risk_free_rate=0.0, periods=TRADING_DAYS):
+        returns = pd.DataFrame(returns).dropna()
+        self.tickers = list(returns.columns)
+        self.mean = returns.mean().to_numpy() * periods
+        self.cov = returns.cov().to_numpy() * periods
+        self.risk_free_rate = risk_free_rate
+        try:
+            self._factor = np.linalg.cholesky(self.cov)
+        except np.linalg.LinAlgError: # singular covariance (e.g. duplicated tickers): W @ cov * W instead
+            self._factor = None
+
+    def chunk_size(self):
+        return max(1, CHUNK_BYTES // (16 * max(1, len(self.tickers))))
+
+    def _draw(self, seeds, start, stop):
+        # uniform weights of portfolios start..stop, block by block; a block cut by the chunk skips the rows
+        # before it (one 64-bit draw per float64)
+        weights = np.empty((stop - start, len(self.tickers)))
+        for block in range(start // SEED_BLOCK, (stop - 1) // SEED_BLOCK + 1):
+            first = block * SEED_BLOCK
+            lo, hi = max(start, first), min(stop, first + SEED_BLOCK)
+            rng = np.random.default_rng(seeds[block])
+            rng.bit_generator.advance((lo - first) * len(self.tickers))
+            rng.random(out=weights[lo - start:hi - start])
+        return weights
+
+    def _chunk(self, seeds, start, stop, keep_weights):
+        weights = self._draw(seeds, start, stop)
+        weights /= weights.sum(axis=1, keepdims=True)
+        returns = weights @ self.mean
+        if self._factor is not None:
+            scaled = weights @ self._factor
+            volatility = np.sqrt(np.einsum('ij,ij->i', scaled, scaled))
+        else:
+            volatility = np.sqrt(np.einsum('ij,ij->i', weights @ self.cov, weights))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = (returns - self.risk_free_rate) / volatility
+        best_sharpe, low_vol = int(np.nanargmax(sharpe)), int(np.argmin(volatility))
+        best = {'sharpe': (best_sharpe, weights[best_sharpe].copy()), 'volatility': (low_vol, weights[low_vol].copy())}
+        return returns, volatility, sharpe, weights.astype(np.float32) if keep_weights else None, best
+
+    def simulate(self, n, seed=None, chunk_size=None, workers=1, keep_weights=False):
+        """
+        n portfolios in chunks of chunk_size (default: CHUNK_BYTES worth of weights).
+
+        workers > 1 scores chunks in parallel threads (None: one per core). keep_weights stores
+        every portfolio's weights (n x assets float32); otherwise only the best ones are kept.
+        """
+        chunk_size = chunk_size or self.chunk_size()
+        starts = list(range(0, n, chunk_size))
+        stops = [min(start + chunk_size, n) for start in starts]
+        seeds = np.random.SeedSequence(seed).spawn(-(-n // SEED_BLOCK))
+        workers = min(workers or os.cpu_count() or 1, len(starts)) or 1
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunks = list(pool.map(lambda start, stop: self._chunk(seeds, start, stop, keep_weights), starts, stops))
+        else:
+            chunks = [self._chunk(seeds, start, stop, keep_weights) for start, stop in zip(starts, stops)]
+        return self._merge(chunks, keep_weights)
+
+    def _merge(self, chunks, keep_weights):
+        returns, volatility, sharpe = (np.concatenate([chunk[i] for chunk in chunks]) for i in range(3))
+        offsets = np.cumsum([len(chunk[0]) for chunk in chunks])
+        best = {}
+        for key, index in (('sharpe', int(np.nanargmax(sharpe))), ('volatility', int(np.argmin(volatility)))):
+            # the overall best is the best of the chunk it falls in
+            k = int(np.searchsorted(offsets, index, side='right'))
+            best[key] = (index, chunks[k][4][key][1])
+        weights = np.concatenate([chunk[3] for chunk in chunks]) if keep_weights else None
+        return Simulation(self.tickers, returns, volatility, sharpe, weights, best)
@@ -0,0 +1,321 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import datetime as dt
+import os
+import re
+import sqlite3
+from collections import Counter
+
+import polars as pl
+
+from fetch_engine import FetchEngine, RateLimited
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache')
+NEWS_DB = os.path.join(CACHE_DIR, 'news.db')
+NEWS_URL = 'https://newsapi.org/v2/everything'
+
+MOAT_KEYWORDS = [
+    "brand strength",
+    "pricing power",
+    "economies of scale",
+    "dominant",
+    "switching costs",
+    "patent",
+    "leader",
+    "recurring revenue",
+    "sustainable",
+    "competitive",
+    "cost leadership",
+    "customer loyalty",
+    "network",
+    "margin",
+    "exclusive",
+    "regulatory",
+]
+NEWS_DOMAINS = ('bloomberg.com,reuters.com,wsj.com,cnbc.com,marketwatch.com,finance.yahoo.com,'
+                'hankyung.com,mk.co.kr,yna.co.kr,mt.co.kr,edaily.co.kr,asiae.co.kr,'
+                'ft.com,economist.com,asia.nikkei.com')
+
+PAGE_SIZE = 100 # NewsAPI's maximum
+MAX_PAGES = 5 # per company batch
+MAX_QUERY_CHARS = 500 # NewsAPI's limit on q
+LOOKBACK_DAYS = 30 # oldest articles the developer plan serves
+
+# legal-form suffixes left out of the search term / matched name ("Apple Inc." -> "Apple")
+SUFFIX = re.compile(r'[\s,]+(inc|corp|corporation|co|company|ltd|limited|plc|group|holdings?|n\.?v|s\.?a|ag|se)\.?$', re.IGNORECASE)
+# what's left of a name must still identify the company, else the full name is searched ("The Group" stays)
+MIN_NAME_CHARS = 2
+GENERIC_NAMES = {'the', 'a', 'an', 'new', 'first', 'general', 'national', 'international', 'global', 'united', 'american'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    source TEXT,
+    published_at TEXT,
+    fetched_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS mentions (
+    url TEXT NOT NULL REFERENCES articles (url) ON DELETE CASCADE,
+    company TEXT NOT NULL,
+    PRIMARY KEY (company, url)
+);
+CREATE TABLE IF NOT EXISTS hits (
+    url TEXT NOT NULL REFERENCES articles (url) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (url, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_at);
+"""
+
+
+def search_name(name):
+    name = name.strip()
+    stripped = name
+    while (shorter := SUFFIX.sub('', stripped)) != stripped and shorter:
+        stripped = shorter
+    if len(stripped) < MIN_NAME_CHARS or stripped.lower() in GENERIC_NAMES:
+        return name
+    return stripped
+
+
+def _trie_pattern(node):
+    # regex of a trie: shared prefixes are matched once, alternatives branch on the next character
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != '']
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+class KeywordMatcher:
+    """
+    One compiled matcher for many phrases (keywords and company names), Aho-Corasick-style.
+
+    The phrases are merged into a trie and compiled into a single regex, so a text is scanned once
+    in C instead of once per phrase. Matches start and end at word boundaries ("leader" is not
+    counted in "leadership"), are case-insensitive and may overlap (the longest whole-word phrase
+    starting at each position counts).
+    """
+
+    def __init__(self, phrases):
+        self.phrases = {}
+        trie = {}
+        for phrase in phrases:
+            key = phrase.lower()
+            if not key or key in self.phrases:
+                continue
+            self.phrases[key] = phrase
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+        self.pattern = re.compile(r'(?<!\w)(?=(' + _trie_pattern(trie) + r')(?!\w))', re.IGNORECASE) if trie else None
+
+    def count(self, text):
+        # Counter {phrase: occurrences}
+        if self.pattern is None or not text:
+            return Counter()
+        return Counter(self.phrases[m.group(1).lower()] for m in self.pattern.finditer(text))
+
+
+def batch_query(names, keywords):
+    # ("A" OR "B") AND ("k1" OR "k2" ...)
+    quote = lambda s: '"' + s.replace('"', '') + '"'
+    return '(' + ' OR '.join(map(quote, names)) + ') AND (' + ' OR '.join(map(quote, keywords)) + ')'
+
+
+def company_batches(names, keywords, max_chars=MAX_QUERY_CHARS):
+    # as many companies per request as fit in the query limit
+    batches, batch = [], []
+    for name in names:
+        if batch and len(batch_query(batch + [name], keywords)) > max_chars:
+            batches.append(batch)
+            batch = []
+        batch.append(name)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class NewsStore:
+    """
+    SQLite (WAL) store of fetched articles, deduplicated by URL, with their company mentions and
+    keyword hits. Articles are scored once, when first seen; keyword_table() aggregates per company.
+    """
+
+    def __init__(self, path=NEWS_DB):
+        self.path = path
+        self.conn = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False) # written from the fetch engine's loop
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+        return self
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def seen(self, urls):
+        found = set()
+        urls = list(urls)
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            found.update(url for (url,) in self.conn.execute(
+                f'SELECT url FROM articles WHERE url IN ({",".join("?" * len(chunk))})', chunk))
+        return found
+
+    def add(self, articles, mentions, hits):
+        # articles: [(url, title, description, source, published_at)], mentions: [(url, company)], hits: [(url, keyword, count)]
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO articles (url, title, description, source, published_at) VALUES (?, ?, ?, ?, ?)', articles)
+            self.conn.executemany('INSERT OR IGNORE INTO mentions VALUES (?, ?)', mentions)
+            self.conn.executemany('INSERT OR REPLACE INTO hits VALUES (?, ?, ?)', hits)
+
+    def keyword_table(self, companies=None, keywords=MOAT_KEYWORDS, since=None):
+        """
+        One row per company: articles, articles with any keyword, total hits, distinct keywords and
+        one count column per keyword; most hits first. since limits it to articles published from then on.
+        """
+        where, params = [], []
+        if since is not None:
+            where.append('a.published_at >= ?')
+            params.append(str(since))
+        if companies is not None:
+            companies = list(companies)
+            where.append(f'm.company IN ({",".join("?" * len(companies))})')
+            params += companies
+        clause = (' WHERE ' + ' AND '.join(where)) if where else ''
+        base = 'FROM mentions m JOIN articles a ON a.url = m.url'
+        counts = self.conn.execute(
+            f'SELECT m.company, COUNT(*), SUM(EXISTS (SELECT 1 FROM hits h WHERE h.url = m.url)) {base}{clause} GROUP BY m.company',
+            params).fetchall()
+        per_keyword = self.conn.execute(
+            f'SELECT m.company, h.keyword, SUM(h.count) {base} JOIN hits h ON h.url = m.url{clause} GROUP BY m.company, h.keyword',
+            params).fetchall()
+
+        table = {company: {'company': company, 'articles': n, 'moat_articles': int(moat or 0), 'hits': 0, 'keywords': 0,
+                           **dict.fromkeys(keywords, 0)} for company, n, moat in counts}
+        for company, keyword, n in per_keyword:
+            if keyword in keywords:
+                row = table[company]
+                row[keyword] = n
+                row['hits'] += n
+                row['keywords'] += 1
+        schema = {'company': pl.Utf8, 'articles': pl.Int64, 'moat_articles': pl.Int64, 'hits': pl.Int64, 'keywords': pl.Int64,
+                  **dict.fromkeys(keywords, pl.Int64)}
+        return pl.DataFrame(list(table.values()), schema=schema).sort(['hits', 'articles'], descending=True)
+
+
+class NewsIngest:
+    """
+    Articles for every screened company from NewsAPI's /v2/everything, into a NewsStore.
+
+    Companies are packed into as few queries as the query length allows and every query is paged
+    (page_size per request, up to max_pages) through the fetch engine's rate limiter, all batches
+    concurrently. Each page is deduplicated by URL against the store; only new articles are scored,
+    with one KeywordMatcher over the moat keywords and all company names, which also tells which
+    companies of a batch an article is about. With sort_by='publishedAt' paging stops at the first
+    page that was already stored, so daily reruns only fetch what's new.
+    """
+
+    def __init__(self, store, api_key=None, url=NEWS_URL, keywords=MOAT_KEYWORDS, domains=NEWS_DOMAINS,
+                 page_size=PAGE_SIZE, max_pages=MAX_PAGES, since=None, sort_by='publishedAt', language=None, engine=None):
+        self.store = store
+        self.api_key = api_key
+        self.url = url
+        self.keywords = list(keywords)
+        self.domains = domains
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.since = since or (dt.date.today() - dt.timedelta(days=LOOKBACK_DAYS))
+        self.sort_by = sort_by
+        self.language = language
+        self.engine = engine
+        self.stats = Counter() # requests, articles, new, duplicates, unattributed, errors
+        self.errors = []
+
+    def run(self, companies):
+        names = {}
+        for company in dict.fromkeys(companies):
+            names.setdefault(search_name(company), company)
+        self.companies = names # search name -> company as stored in the results
+        self.matcher = KeywordMatcher(self.keywords + list(names))
+        own = self.engine is None
+        self._engine = FetchEngine().start() if own else self.engine
+        try:
+            batches = company_batches(list(names), self.keywords)
+            self._engine.run(self._engine.map(self._batch, batches, concurrency=8))
+        finally:
+            if own:
+                self._engine.close()
+        return dict(self.stats)
+
+    async def _batch(self, names):
+        params = {'q': batch_query(names, self.keywords), 'domains': self.domains, 'pageSize': self.page_size,
+                  'sortBy': self.sort_by, 'from': str(self.since), 'apiKey': self.api_key}
+        if self.language:
+            params['language'] = self.language
+        for page in range(1, self.max_pages + 1):
+            self.stats['requests'] += 1
+            try:
+                response = await self._engine.get(self.url, params={**params, 'page': page}, timeout=30)
+                data = response.json()
+            except (RateLimited, OSError, ValueError) as e:
+                self._error(names, e)
+                return
+            if data.get('status') != 'ok':
+                if data.get('code') != 'maximumResultsReached': # the plan's result cap ends paging, it isn't an error
+                    self._error(names, data.get('message') or data.get('code'))
+                return
+            articles = data.get('articles') or []
+            new = self._ingest(names, articles)
+            if not articles or page * self.page_size >= data.get('totalResults', 0):
+                return
+            if not new and self.sort_by == 'publishedAt': # newest first: the rest was stored by an earlier run
+                return
+
+    def _ingest(self, names, articles):
+        urls = {a['url']: a for a in articles if a.get('url')}
+        seen = self.store.seen(urls)
+        self.stats['articles'] += len(articles)
+        self.stats['duplicates'] += len(articles) - len(urls) + len(seen)
+        rows, mentions, hits = [], [], []
+        for url, a in urls.items():
+            if url in seen:
+                continue
+            text = '\n'.join(filter(None, (a.get('title'), a.get('description'), a.get('content'))))
+            counts = self.matcher.count(text)
+            about = [self.companies[phrase] for phrase in counts if phrase in self.companies]
+            if not about:
+                about = [self.companies[names[0]]] if len(names) == 1 else [] # a one-company query is about that company
+            if not about:
+                self.stats['unattributed'] += 1
+            rows.append((url, a.get('title'), a.get('description'), (a.get('source') or {}).get('name'), a.get('publishedAt')))
+            mentions += [(url, company) for company in about]
+            hits += [(url, keyword, counts[keyword]) for keyword in self.keywords if counts.get(keyword)]
+        self.store.add(rows, mentions, hits)
+        self.stats['new'] += len(rows)
+        return len(rows)
+
+    def _error(self, names, error):
+        self.stats['errors'] += 1
+        if len(self.errors) < 20:
+            self.errors.append(f"{', '.join(names)[:80]}: {error}")
@@ -0,0 +1,142 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import copy
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from cvar import BETA, bootstrap_scenarios, min_cvar
+
+
+TRADING_DAYS = 252
+OBJECTIVES = ('sharpe', 'variance', 'sortino', 'utility', 'cvar')
+EPS = 1e-12
+
+
+class PortfolioOptimizer:
+    """
+    Fully invested portfolio optimization on precomputed NumPy moments.
+
+    The daily returns are held as one (days, assets) array and the annualized mean and covariance
+    are computed once. Every objective returns (value, gradient), so SLSQP gets an analytic
+    jacobian instead of N finite differences per iteration.
+    """
+
+    def __init__(self, returns, risk_free_rate=0.0, lower=0.0, upper=1.0, periods=TRADING_DAYS, moments=None, shrink=False):
+        returns = pd.DataFrame(returns).dropna()
+        self.tickers = list(returns.columns)
+        self.returns = np.ascontiguousarray(returns.to_numpy(dtype=float))
+        self.periods = periods
+        self.daily_mean = self.returns.mean(axis=0)
+        if moments is not None:
+            # covariance_cache.RollingMoments: the cached rolling-window mean and covariance (optionally Ledoit-Wolf shrunk)
+            order = [moments.tickers.index(ticker) for ticker in self.tickers]
+            self.mean = moments.mean(periods)[order]
+            self.cov = moments.cov(periods, shrink)[np.ix_(order, order)]
+        else:
+            self.mean = self.daily_mean * periods
+            self.cov = np.atleast_2d(np.cov(self.returns, rowvar=False)) * periods
+        self.risk_free_rate = risk_free_rate
+        self._set_bounds(lower, upper)
+
+    def _set_bounds(self, lower, upper):
+        if upper * len(self.tickers) < 1 - 1e-9 or lower * len(self.tickers) > 1 + 1e-9:
+            raise ValueError(f"no fully invested portfolio of {len(self.tickers)} assets within bounds ({lower}, {upper})")
+        self.lower, self.upper = lower, upper
+
+    def with_bounds(self, lower=None, upper=None):
+        # a copy with other weight bounds, sharing the returns and moments (no recomputation)
+        other = copy.copy(self)
+        other._set_bounds(self.lower if lower is None else lower, self.upper if upper is None else upper)
+        return other
+
+    # ---- objectives: (value, gradient) of weights w, minimized
+
+    def sharpe(self, w, lambda_penalty=0.0):
+        # -(annual return - risk free) / volatility + lambda * sum(w^2), sharpe.ipynb's neg_sharpe_ratio
+        cov_w = self.cov @ w
+        vol = np.sqrt(max(w @ cov_w, EPS))
+        excess = w @ self.mean - self.risk_free_rate
+        value = -excess / vol + lambda_penalty * (w @ w)
+        grad = -(self.mean / vol - excess * cov_w / vol**3) + 2 * lambda_penalty * w
+        return value, grad
+
+    def variance(self, w):
+        cov_w = self.cov @ w
+        return w @ cov_w, 2 * cov_w
+
+    def utility(self, w, risk_aversion=1.0):
+        # mean-variance utility -(w . mu) + risk_aversion / 2 * w' cov w; one frontier point per risk_aversion
+        cov_w = self.cov @ w
+        return -(w @ self.mean) + risk_aversion / 2 * (w @ cov_w), -self.mean + risk_aversion * cov_w
+
+    def sortino(self, w):
+        # -annualized mean / downside deviation (root mean square of the negative daily returns, target 0)
+        p = self.returns @ w
+        downside = np.minimum(p, 0.0)
+        dd = np.sqrt(max(downside @ downside / len(p), EPS))
+        mean = p.mean()
+        scale = np.sqrt(self.periods)
+        grad_dd = self.returns.T @ downside / (len(p) * dd)
+        return -scale * mean / dd, -scale * (self.daily_mean / dd - mean * grad_dd / dd**2)
+
+    # ---- solving
+
+    def bounds(self):
+        return [(self.lower, self.upper)] * len(self.tickers)
+
+    def initial_weights(self):
+        return np.clip(np.full(len(self.tickers), 1 / len(self.tickers)), self.lower, self.upper)
+
+    def max_return_weights(self):
+        # the highest-return portfolio within the bounds: fill the best assets up to UPPER_BOUND
+        w = np.full(len(self.tickers), self.lower, dtype=float)
+        left = 1 - w.sum()
+        for i in np.argsort(-self.mean):
+            w[i] += min(self.upper - self.lower, left)
+            left = 1 - w.sum()
+            if left <= 0:
+                break
+        return w
+
+    def target_return(self, target):
+        # SLSQP constraint: annual return == target
+        return {'type': 'eq', 'fun': lambda w: w @ self.mean - target, 'jac': lambda w: self.mean}
+
+    def solve(self, objective='sharpe', x0=None, constraints=(), **params):
+        """
+        Minimize one of OBJECTIVES under LOWER_BOUND <= w <= UPPER_BOUND and sum(w) == 1.
+
+        params go to the objective (e.g. lambda_penalty for sharpe); constraints are extra SLSQP
+        constraint dicts, e.g. fixing one ticker's weight. Returns scipy's OptimizeResult (.x weights).
+        'cvar' is a linear program (see cvar()); x0 and constraints don't apply to it.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"unknown objective {objective!r}, expected one of {OBJECTIVES}")
+        if objective == 'cvar':
+            return self.cvar(**params)
+        fun = getattr(self, objective)
+        budget = {'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: np.ones_like(w)}
+        x0 = self.initial_weights() if x0 is None else np.asarray(x0, dtype=float)
+        return minimize(lambda w: fun(w, **params), x0, jac=True, method='SLSQP', bounds=self.bounds(),
+                        constraints=[budget, *constraints], options={'maxiter': 500})
+
+    def cvar(self, beta=BETA, scenarios=None, block=5, seed=None, target_return=None):
+        """
+        Minimum historical CVaR (linear program, see cvar.min_cvar) instead of SLSQP.
+
+        scenarios=None uses the observed days; an int draws that many block-bootstrapped days.
+        target_return is annual, like mean.
+        """
+        sample = self.returns if scenarios is None else bootstrap_scenarios(self.returns, scenarios, block, seed)
+        return min_cvar(sample, beta, self.lower, self.upper, self.daily_mean,
+                        target_return / self.periods if target_return is not None else None)
+
+    def performance(self, w):
+        # annual return, volatility and Sharpe ratio of weights w
+        ret = w @ self.mean
+        vol = np.sqrt(w @ self.cov @ w)
+        return ret, vol, (ret - self.risk_free_rate) / vol
@@ -0,0 +1,262 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import datetime as dt
+import json
+import os
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+PRICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'prices')
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+ROW_SLACK = 260 # business days of room added past the last stored day, so daily appends don't rewrite the files
+MIN_COLUMNS = 64
+DOWNLOAD_BATCH = 200 # tickers per yf.download call
+ADJUSTED_TOLERANCE = 1e-4 # relative change of an already stored close that means the history was re-adjusted (split, dividend)
+PERIOD_UNITS = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+
+
+def _day(value):
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+def _period_start(end, period):
+    # yf.download-style period ('5d', '6mo', '1y', ...) counted back from end
+    for unit, name in PERIOD_UNITS.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return _day(pd.Timestamp(end) - pd.DateOffset(**{name: int(period[:-len(unit)])}))
+    raise ValueError(f"unsupported period {period!r}, expected e.g. '5d', '6mo' or '1y'")
+
+
+def _days(index):
+    if getattr(index, 'tz', None) is not None: # exchange-local dates, not UTC
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]')
+
+
+def download_ohlcv(tickers, start, end):
+    # {field: DataFrame (dates x tickers)} of daily bars in [start, end), split/dividend adjusted
+    import yfinance as yf
+
+    raw = yf.download(list(tickers), start=str(start), end=str(end), interval='1d', auto_adjust=True,
+                      progress=False, group_by='column')
+    frames = {}
+    for field in FIELDS:
+        frame = raw[field] if raw is not None and len(raw) and field in raw.columns.get_level_values(0) else pd.DataFrame()
+        if isinstance(frame, pd.Series): # single ticker on older yfinance
+            frame = frame.to_frame(tickers[0])
+        frames[field] = frame
+    return frames
+
+
+class PriceStore:
+    """
+    Local daily OHLCV history, one memory-mapped float64 matrix per field (business days x tickers).
+
+    Each ticker remembers the date range it was fetched for; panel() downloads only what's missing,
+    one batched request per distinct missing range, and re-fetches the last stored day with every
+    update to catch the current day's bar and re-adjusted histories. Rows are business days from
+    meta['base'], so a date maps to its row with np.busday_count; window() returns views of the
+    memory maps, panel() the aligned DataFrame for a ticker set.
+
+    One writer at a time: the files are shared by the screener and the notebooks, not locked across processes.
+    """
+
+    def __init__(self, root=PRICE_DIR, download=download_ohlcv):
+        self.root = root
+        self.download = download
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._maps = {}
+        self.meta = self._read_meta()
+
+    # ---- layout
+
+    def _meta_path(self):
+        return os.path.join(self.root, 'meta.json')
+
+    def _field_path(self, field):
+        return os.path.join(self.root, f'{field.lower()}.f64')
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'base': None, 'rows': 0, 'columns': 0, 'tickers': [], 'coverage': {}}
+
+    def _write_meta(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._meta_path() + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._meta_path())
+
+    def _map(self, field):
+        if field not in self._maps:
+            self._maps[field] = np.memmap(self._field_path(field), dtype=np.float64, mode='r+',
+                                          shape=(self.meta['rows'], self.meta['columns']))
+        return self._maps[field]
+
+    def _flush(self):
+        for m in self._maps.values():
+            m.flush()
+        self._maps.clear()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+
+    def _row(self, day):
+        return int(np.busday_count(np.datetime64(self.meta['base'], 'D'), day))
+
+    def _reshape(self, base, rows, columns):
+        # rewrite every field file for a new first day / row capacity / column capacity, NaN-filled
+        old = self.meta
+        self._flush()
+        os.makedirs(self.root, exist_ok=True)
+        shift = int(np.busday_count(base, np.datetime64(old['base'], 'D'))) if old['base'] else 0
+        for field in FIELDS:
+            tmp = self._field_path(field) + '.tmp'
+            new = np.memmap(tmp, dtype=np.float64, mode='w+', shape=(rows, columns))
+            new[:] = np.nan
+            if old['rows'] and os.path.exists(self._field_path(field)):
+                previous = np.memmap(self._field_path(field), dtype=np.float64, mode='r', shape=(old['rows'], old['columns']))
+                new[shift:shift + old['rows'], :old['columns']] = previous
+                del previous
+            new.flush()
+            del new
+            os.replace(tmp, self._field_path(field))
+        self.meta = {**old, 'base': str(base), 'rows': rows, 'columns': columns}
+        self._write_meta()
+
+    def _ensure(self, start, end, tickers):
+        # room for business days [start, end) and for every ticker; new tickers get the next free columns
+        meta = self.meta
+        new = [t for t in dict.fromkeys(tickers) if t not in meta['tickers']]
+        old_base = np.datetime64(meta['base'], 'D') if meta['base'] else None
+        base = old_base if old_base is not None and old_base <= start else np.busday_offset(start, 0, roll='forward')
+        shift = int(np.busday_count(base, old_base)) if old_base is not None else 0
+        rows = meta['rows'] + shift
+        if old_base is None or np.busday_count(base, end) > rows:
+            rows = int(np.busday_count(base, end)) + ROW_SLACK
+        columns = len(meta['tickers']) + len(new)
+        if base != old_base or rows != meta['rows'] or columns > meta['columns']:
+            capacity = max(meta['columns'], MIN_COLUMNS)
+            while capacity < columns:
+                capacity *= 2
+            self._reshape(base, rows, capacity)
+        self.meta['tickers'] = self.meta['tickers'] + new
+
+    # ---- fetching
+
+    def missing(self, tickers, start, end):
+        # {(from, to): [tickers]} still to download for [start, end); the tail overlaps the last stored day
+        ranges = defaultdict(list)
+        for ticker in tickers:
+            covered = self.meta['coverage'].get(ticker)
+            if covered is None:
+                ranges[start, end].append(ticker)
+                continue
+            first, last = np.datetime64(covered[0], 'D'), np.datetime64(covered[1], 'D')
+            if start < first:
+                ranges[start, first].append(ticker)
+            if end > last:
+                ranges[np.busday_offset(last, -1, roll='backward'), end].append(ticker)
+        return ranges
+
+    def update(self, tickers, start, end, today=None):
+        tickers = list(dict.fromkeys(tickers))
+        today = _day(today or dt.date.today())
+        ranges = self.missing(tickers, start, end)
+        readjusted = set()
+        for (lo, hi), group in ranges.items():
+            readjusted |= self._fetch(group, lo, hi, today)
+        if readjusted: # splits / dividends changed the stored history: fetch it again from the first covered day
+            for ticker in readjusted:
+                del self.meta['coverage'][ticker]
+            for (lo, hi), group in self.missing(sorted(readjusted), start, end).items():
+                self._fetch(group, lo, hi, today)
+        if ranges:
+            self._write_meta()
+            self._flush()
+
+    def _fetch(self, tickers, start, end, today):
+        self._ensure(start, end, tickers)
+        columns = {t: i for i, t in enumerate(self.meta['tickers'])}
+        # completed days already stored per ticker; a different close there means the history was re-adjusted
+        settled = {t: np.datetime64(self.meta['coverage'][t][1], 'D') for t in tickers if t in self.meta['coverage']}
+        readjusted, received = set(), set()
+        for i in range(0, len(tickers), DOWNLOAD_BATCH):
+            batch = tickers[i:i + DOWNLOAD_BATCH]
+            self.requests += 1
+            frames = self.download(batch, start, end)
+            for field in FIELDS:
+                frame = frames.get(field)
+                if frame is None or frame.empty:
+                    continue
+                days = _days(frame.index)
+                keep = np.is_busday(days) & (days >= start) & (days < end)
+                rows = np.busday_count(np.datetime64(self.meta['base'], 'D'), days[keep])
+                names = [t for t in batch if t in frame.columns]
+                cols = np.array([columns[t] for t in names], dtype=int)
+                values = frame.loc[keep, names].to_numpy(dtype=float)
+                target = self._map(field)
+                if field == 'Close':
+                    received |= {names[j] for j in np.flatnonzero((~np.isnan(values)).any(axis=0))}
+                if field == 'Close' and settled:
+                    stored = target[rows[:, None], cols[None, :]]
+                    before = np.array([settled.get(t, start) for t in names], dtype='datetime64[D]')
+                    compare = ~np.isnan(stored) & ~np.isnan(values) & (days[keep][:, None] < before[None, :])
+                    drift = np.abs(values - stored) > ADJUSTED_TOLERANCE * np.abs(stored)
+                    readjusted |= {names[j] for j in np.flatnonzero((compare & drift).any(axis=0))}
+                target[rows[:, None], cols[None, :]] = values
+        # a bar of today (or later) may still change, so the range stays open from the last completed day.
+        # tickers that came back empty (failed request, holiday, delisted) are asked for again next time
+        covered_to = min(end, today)
+        for ticker in received:
+            previous = self.meta['coverage'].get(ticker)
+            lo = min(start, np.datetime64(previous[0], 'D')) if previous else start
+            hi = max(covered_to, np.datetime64(previous[1], 'D')) if previous else covered_to
+            self.meta['coverage'][ticker] = [str(lo), str(max(hi, lo))]
+        return readjusted
+
+    # ---- reading
+
+    def window(self, start, end, field='Close'):
+        # (rows, view of the memory map) for business days [start, end); columns are meta['tickers']
+        if not self.meta['rows']:
+            return pd.DatetimeIndex([]), np.empty((0, 0))
+        lo, hi = max(self._row(_day(start)), 0), min(self._row(_day(end)), self.meta['rows'])
+        days = np.busday_offset(np.datetime64(self.meta['base'], 'D'), np.arange(lo, max(hi, lo)))
+        return pd.DatetimeIndex(days), self._map(field)[lo:max(hi, lo)]
+
+    def panel(self, tickers, start=None, end=None, period=None, field='Close', fetch=True, today=None):
+        """
+        Aligned (dates x tickers) panel of one field for [start, end), downloading missing ranges first.
+
+        period='1y' / '5y' / '6mo' (like yf.download) counts back from end; end defaults to tomorrow, so
+        today's bar is included. Days where none of the tickers traded are dropped; tickers without any
+        data are left out, like yf.download.
+        """
+        today = _day(today or dt.date.today())
+        end = _day(end) if end is not None else today + 1
+        start = _day(start) if start is not None else _period_start(end, period or '1y')
+        tickers = list(dict.fromkeys(tickers))
+        with self._lock:
+            if fetch:
+                self.update(tickers, start, end, today)
+            days, view = self.window(start, end, field)
+            columns = {t: i for i, t in enumerate(self.meta['tickers'])}
+            present = [t for t in tickers if t in columns]
+            cols = [columns[t] for t in present]
+            values = view[:, cols] if cols else np.empty((len(days), 0))
+        df = pd.DataFrame(values, index=days, columns=present)
+        df.index.name = 'Date'
+        df.columns.name = 'Ticker'
+        return df.dropna(how='all').dropna(axis=1, how='all')
@@ -0,0 +1,136 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import itertools
+import os
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+
+BATCH_ROWS = 2048 # rows converted from Arrow/polars to Python values at a time
+MAX_CELL_CHARS = 32767 # Excel's limit per cell; longer text is cut
+HEADER_HEIGHT = 15 # points, Excel's default row height
+
+# the header look of DataFrame.to_excel, so reports read the same as before
+_THIN = Side(style='thin')
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+WRAP_ALIGNMENT = Alignment(wrap_text=True, vertical='top')
+
+
+def _clean(value):
+    # text openpyxl would refuse (control characters from LLM / news output) or Excel would truncate on open
+    if isinstance(value, str):
+        value = ILLEGAL_CHARACTERS_RE.sub('', value)
+        return value[:MAX_CELL_CHARS]
+    return value
+
+
+def _batches(data):
+    # (column names, iterator of row-tuple lists) of a polars DataFrame / LazyFrame, a pyarrow Table /
+    # RecordBatch / RecordBatchReader, or an iterable of dicts
+    if hasattr(data, 'collect') and hasattr(data, 'lazy'): # polars LazyFrame
+        data = data.collect()
+    if hasattr(data, 'iter_slices'): # polars DataFrame
+        return list(data.columns), (chunk.rows() for chunk in data.iter_slices(BATCH_ROWS))
+    if hasattr(data, 'read_next_batch') or hasattr(data, 'column_names'): # pyarrow
+        batches = data if hasattr(data, 'read_next_batch') else data.to_batches(BATCH_ROWS) if hasattr(data, 'to_batches') else [data]
+        return list(data.schema.names), (list(zip(*(column.to_pylist() for column in batch.columns))) for batch in batches)
+    rows = iter(data)
+    first = next(rows, None)
+    if first is None:
+        return [], iter(())
+    names = list(first)
+    rows = itertools.chain([first], rows)
+    return names, iter(lambda: [tuple(row.get(name) for name in names) for row in itertools.islice(rows, BATCH_ROWS)], [])
+
+
+class ReportWriter:
+    """
+    Streaming .xlsx writer on openpyxl's write-only mode.
+
+    Rows go straight from Arrow / polars batches to the zip stream, one batch of Python values at a
+    time, so memory stays flat however long the report is. Column widths, the height of the data
+    rows (one sheet-wide default, not a per-row entry) and wrapped columns are set before the first
+    row, so nothing is reloaded and saved again. The file appears under its name only once complete.
+    """
+
+    def __init__(self, path, widths=None, row_height=None, wrap=(), sheet='Sheet1'):
+        self.path = path
+        self.widths = dict(widths or {}) # column name -> width in characters
+        self.row_height = row_height
+        self.wrap = set(wrap)
+        self.rows = 0
+        self.columns = None
+        self._book = Workbook(write_only=True)
+        self._sheet = self._book.create_sheet(sheet)
+        self._wrapped = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+
+    def _start(self, columns):
+        self.columns = list(columns)
+        ws = self._sheet
+        for i, name in enumerate(self.columns, 1):
+            if name in self.widths:
+                ws.column_dimensions[get_column_letter(i)].width = self.widths[name]
+        if self.row_height is not None:
+            ws.sheet_format.defaultRowHeight = self.row_height
+            ws.sheet_format.customHeight = True
+            ws.row_dimensions[1].height = HEADER_HEIGHT
+        header = []
+        for name in self.columns:
+            cell = WriteOnlyCell(ws, name)
+            cell.font, cell.border, cell.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGNMENT
+            header.append(cell)
+        ws.append(header)
+        self._wrapped = [i for i, name in enumerate(self.columns) if name in self.wrap]
+
+    def _cell(self, value):
+        cell = WriteOnlyCell(self._sheet, value)
+        cell.alignment = WRAP_ALIGNMENT
+        return cell
+
+    def write(self, data):
+        # append a polars DataFrame / LazyFrame, a pyarrow Table / RecordBatch(Reader) or dict rows
+        columns, batches = _batches(data)
+        if self.columns is None:
+            self._start(columns)
+        elif columns and columns != self.columns:
+            raise ValueError(f"columns {columns} don't match the report's {self.columns}")
+        ws = self._sheet
+        for batch in batches:
+            for row in batch:
+                row = [_clean(value) for value in row]
+                for i in self._wrapped:
+                    row[i] = self._cell(row[i])
+                ws.append(row)
+            self.rows += len(batch)
+        return self
+
+    def close(self):
+        if self.columns is None:
+            self._start([])
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        self._book.save(tmp)
+        os.replace(tmp, self.path)
+        return self.path
+
+
+def write_report(path, data, widths=None, row_height=None, wrap=(), sheet='Sheet1'):
+    # one-shot ReportWriter: the whole of data as one sheet, header first
+    with ReportWriter(path, widths, row_height, wrap, sheet) as writer:
+        writer.write(data)
+    return writer.rows
@@ -0,0 +1,178 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import datetime as dt
+import glob
+import os
+
+import polars as pl
+
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'history')
+
+# hive partitions: <HISTORY_DIR>/country=KR/universe=KR/date=2025-06-17/part-0.parquet
+PARTITIONS = {'country': pl.Utf8, 'universe': pl.Utf8, 'date': pl.Date}
+
+# columns of every run besides the raw metrics (scoring.RAW_METRICS_SCHEMA) and the score components
+RUN_COLUMNS = {
+    'Name': pl.Utf8,
+    'Industry': pl.Utf8,
+    'price': pl.Float64,
+    'change': pl.Float64, # daily % change
+    'buffett': pl.Float64,
+    'momentum': pl.Float64,
+    'score': pl.Float64,
+    'passed': pl.Boolean,
+}
+
+c = pl.col
+
+
+def format_change(percent_change):
+    if percent_change is None:
+        return ' ()'
+    if percent_change >= 0:
+        return (f" (+{percent_change:.2f}%)")  # e.g., (-6.20%)
+    else:
+        return (f" ({percent_change:.2f}%)")  # e.g., (-6.20%)
+
+
+def format_price(price, percentage_change, country):
+    return (f"{price:,.0f}" if country == 'KR' or country == 'JP' else f"{price:,.2f}") + percentage_change
+
+
+def format_momentum(short, mid, long):
+    return "/".join(f"{m:.1%}" if m is not None else "None" for m in (short, mid, long))
+
+
+def _round(value, digits=2):
+    return round(value, digits) if value is not None else None
+
+
+# columns of the daily spreadsheet, for the header of an empty run
+EXCEL_SCHEMA = {
+    'Ticker': pl.Utf8, 'Name': pl.Utf8, 'Industry': pl.Utf8, 'Price': pl.Utf8, 'D/E': pl.Float64, 'CR': pl.Float64,
+    'PBR': pl.Float64, 'PER': pl.Utf8, 'ROE': pl.Utf8, 'ROA': pl.Utf8, 'ICR': pl.Float64, 'EPS CAGR': pl.Utf8,
+    'DIV CAGR': pl.Utf8, 'B-Score': pl.Float64, 'Momentum': pl.Utf8,
+}
+
+
+def excel_rows(run, country):
+    # the spreadsheet layout of buffett.py (pre-formatted strings), from the typed columns of one run
+    rows = []
+    for r in run.iter_rows(named=True):
+        eps = r['eps_stable'] if r['eps_stable'] is not None else r['eps']
+        rows.append({
+            "Ticker": r['Ticker'][:6] if country == 'KR' else r['Ticker'],
+            "Name": r['Name'],
+            "Industry": r['Industry'],
+            "Price": format_price(r['price'], format_change(r['change']), country) if r['price'] is not None else None,
+            "D/E": _round(r['de']),
+            "CR": _round(r['cr']),
+            "PBR": _round(r['pbr']),
+            "PER": f"{round(r['per'], 2)} ({round(r['ind_per']) if r['ind_per'] is not None else None})" if r['per'] is not None else None,
+            "ROE": str(round(r['roe'] * 100, 2)) + '%' if r['roe'] is not None else None,
+            "ROA": str(round(r['roa'] * 100, 2)) + '%' if r['roa'] is not None else None,
+            "ICR": r['icr'],
+            "EPS CAGR": eps if isinstance(eps, bool) else (f"{eps:.2%}" if eps is not None else None),
+            "DIV CAGR": f"{r['div']:.2%}" if r['div'] is not None else None,
+            "B-Score": round(r['score'], 1),
+            'Momentum': format_momentum(r['mom_short'], r['mom_mid'], r['mom_long']),
+        })
+    return pl.DataFrame(rows) if rows else pl.DataFrame(schema=EXCEL_SCHEMA)
+
+
+class ResultsHistory:
+    """
+    Every screening run as typed columns in Hive-partitioned Parquet (country / universe / date).
+
+    Queries go through one lazy scan, so partition filters prune whole directories and
+    column filters (score, ticker) are pushed down to the Parquet row groups.
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+
+    def partition(self, country, universe, date):
+        return os.path.join(self.root, f'country={country}', f'universe={universe}', f'date={_iso(date)}')
+
+    def write(self, frame, country, universe, date):
+        # one file per run; rerunning a screen on the same day replaces its partition
+        directory = self.partition(country, universe, date)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'part-0.parquet')
+        frame.drop([name for name in PARTITIONS if name in frame.columns]).write_parquet(path + '.tmp', statistics=True)
+        os.replace(path + '.tmp', path)
+        return path
+
+    def scan(self):
+        if not glob.glob(os.path.join(self.root, '**', '*.parquet'), recursive=True):
+            return None
+        return pl.scan_parquet(os.path.join(self.root, '**', '*.parquet'), hive_partitioning=True, hive_schema=PARTITIONS)
+
+    def query(self, *predicates, country=None, universe=None, since=None, until=None, columns=None):
+        lf = self.scan()
+        if lf is None:
+            return pl.DataFrame()
+        filters = list(predicates)
+        if country is not None:
+            filters.append(c('country') == country)
+        if universe is not None:
+            filters.append(c('universe') == universe)
+        if since is not None:
+            filters.append(c('date') >= _date(since))
+        if until is not None:
+            filters.append(c('date') <= _date(until))
+        if filters:
+            lf = lf.filter(*filters)
+        if columns is not None:
+            lf = lf.select(columns)
+        return lf.collect()
+
+    def ticker_history(self, ticker, country=None, universe=None):
+        # B-Score of one ticker over time, oldest first
+        return self.query(c('Ticker') == ticker, country=country, universe=universe,
+                          columns=['date', 'country', 'universe', 'Ticker', 'Name', 'score', 'buffett', 'momentum', 'passed']
+                          ).sort('date')
+
+    def high_scores(self, min_score=7, days=90, country=None, universe=None, today=None):
+        # every name that scored >= min_score in the last `days` days: best score, days above it, latest date
+        since = (today or dt.date.today()) - dt.timedelta(days=days)
+        hits = self.query(c('score') >= min_score, country=country, universe=universe, since=since,
+                          columns=['date', 'country', 'Ticker', 'Name', 'score'])
+        if hits.is_empty():
+            return hits
+        return (hits.group_by('country', 'Ticker')
+                .agg(c('Name').last(), c('score').max().alias('best'), c('score').sort_by('date').last().alias('latest_score'),
+                     c('date').n_unique().alias('days'), c('date').max().alias('last_seen'))
+                .sort('best', 'days', descending=True))
+
+    def run(self, country, universe, date=None):
+        # one run's rows (the latest one when date is None), best score first
+        if date is None:
+            dates = self.query(country=country, universe=universe, columns=['date'])
+            if dates.is_empty():
+                return dates
+            date = dates['date'].max()
+        return self.query(country=country, universe=universe, since=date, until=date).sort('score', descending=True)
+
+    def excel(self, path, country, universe, date=None, min_score=None):
+        # the daily spreadsheet as a view of the store: passing tickers (or score >= min_score), best first
+        run = self.run(country, universe, date)
+        if not run.is_empty():
+            run = run.filter(c('score') >= min_score) if min_score is not None else run.filter(c('passed'))
+        df = excel_rows(run, None if country == 'US' else country)
+        from report_writer import write_report # openpyxl only once a spreadsheet is written
+        write_report(path, df) # streamed from the polars frame, no pandas round-trip
+        return df
+
+
+def _date(value):
+    if isinstance(value, dt.date):
+        return value
+    return dt.datetime.strptime(value.replace('-', ''), '%Y%m%d').date()
+
+
+def _iso(value):
+    return _date(value).isoformat()
@@ -0,0 +1,198 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache')
+DB_PATH = os.path.join(CACHE_DIR, 'results.db')
+
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_date TEXT NOT NULL,
+    country TEXT NOT NULL,
+    universe TEXT NOT NULL,
+    cutoff REAL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    run_date TEXT NOT NULL,
+    country TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    name TEXT,
+    score REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    row TEXT,
+    metrics TEXT,
+    PRIMARY KEY (run_id, ticker)
+);
+CREATE INDEX IF NOT EXISTS idx_results_date_country_score ON results (run_date, country, score);
+CREATE INDEX IF NOT EXISTS idx_results_ticker ON results (ticker, run_date);
+CREATE INDEX IF NOT EXISTS idx_results_name ON results (name, run_date);
+CREATE INDEX IF NOT EXISTS idx_runs_key ON runs (run_date, country, universe);
+"""
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL') # readers (notebooks) never block the writer
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    return conn
+
+
+class ResultsWriter(threading.Thread):
+    """
+    The single writer of a run: rows are queued by any thread and inserted in batches of batch_size
+    from this thread's own connection, one transaction per batch.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path, run, batch_size=BATCH_SIZE):
+        super().__init__(name='results-writer', daemon=True)
+        self.path = path
+        self.run_id, self.run_date, self.country = run
+        self.batch_size = batch_size
+        self.written = 0
+        self.error = None
+        self._queue = queue.Queue()
+
+    def put(self, ticker, name, score, passed, row=None, metrics=None):
+        self._queue.put((self.run_id, self.run_date, self.country, ticker, name, score, int(passed),
+                         json.dumps(row, ensure_ascii=False, default=str) if row is not None else None,
+                         json.dumps(metrics, default=str) if metrics is not None else None))
+
+    def run(self):
+        conn = _connect(self.path)
+        try:
+            batch = []
+            while True:
+                item = self._queue.get()
+                if item is not self._STOP:
+                    batch.append(item)
+                if batch and (item is self._STOP or len(batch) >= self.batch_size or self._queue.empty()):
+                    with conn:
+                        conn.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+                    self.written += len(batch)
+                    batch = []
+                if item is self._STOP:
+                    return
+        except Exception as e:
+            self.error = e
+        finally:
+            conn.close()
+
+    def close(self):
+        self._queue.put(self._STOP)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultsStore:
+    """
+    SQLite (WAL) store of every screening run, replacing cache/ticker_cache and cache/company_cache.
+
+    Every scored ticker is stored with its B-Score, so candidate selection like `score >= CUTOFF`
+    is an indexed query on (run_date, country, score).
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = _connect(self.path)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, run_date, country, universe, cutoff=None):
+        # re-running the same screen on the same day replaces that day's rows
+        with self.conn:
+            self.conn.execute('DELETE FROM runs WHERE run_date = ? AND country = ? AND universe = ?', (run_date, country, universe))
+            cur = self.conn.execute('INSERT INTO runs (run_date, country, universe, cutoff) VALUES (?, ?, ?, ?)',
+                                    (run_date, country, universe, cutoff))
+        return cur.lastrowid, run_date, country
+
+    def writer(self, run, batch_size=BATCH_SIZE):
+        self.conn # make sure the schema exists before the writer thread connects
+        return ResultsWriter(self.path, run, batch_size)
+
+    def latest_run(self, country=None, universe=None, run_date=None, before=None):
+        # (run_id, run_date, country, universe, cutoff) of the newest matching run, optionally older than `before`
+        clauses, params = [], []
+        for clause, value in (('country = ?', country), ('universe = ?', universe), ('run_date = ?', run_date), ('run_date < ?', before)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        return self.conn.execute('SELECT run_id, run_date, country, universe, cutoff FROM runs' + where +
+                                 ' ORDER BY run_date DESC, run_id DESC LIMIT 1', params).fetchone()
+
+    def candidates(self, min_score=None, country=None, universe=None, run_date=None):
+        # [(ticker, name, score)] of one run (the latest matching one), best first.
+        # min_score=None uses the run's own cutoff, i.e. what used to be in ticker_cache
+        run = self.latest_run(country, universe, run_date)
+        if run is None:
+            return []
+        run_id, run_date, country = run[:3]
+        if min_score is None:
+            min_score = run[4] if run[4] is not None else float('-inf')
+        return self.conn.execute(
+            'SELECT ticker, name, score FROM results WHERE run_date = ? AND country = ? AND score >= ? AND run_id = ? '
+            'ORDER BY score DESC', (run_date, country, min_score, run_id)).fetchall()
+
+    def run_rows(self, run_id):
+        # {ticker: (name, score, row, metrics)} of one run, with the JSON columns decoded
+        return {ticker: (name, score, json.loads(row) if row else None, json.loads(metrics) if metrics else {})
+                for ticker, name, score, row, metrics in self.conn.execute(
+                    'SELECT ticker, name, score, row, metrics FROM results WHERE run_id = ?', (run_id,))}
+
+    def names(self, tickers, run_date=None):
+        # {ticker: name} from the most recent row of each ticker
+        placeholders = ', '.join('?' * len(tickers))
+        query = f'SELECT ticker, name FROM results WHERE ticker IN ({placeholders})'
+        params = list(tickers)
+        if run_date is not None:
+            query += ' AND run_date <= ?'
+            params.append(run_date)
+        return dict(self.conn.execute(query + ' ORDER BY run_date', params).fetchall())
+
+    def company_scores(self, passed_only=True):
+        # {name: score} using each company's most recent run, like the old company_cache
+        passed = ' AND passed = 1' if passed_only else ''
+        return dict(self.conn.execute(
+            'SELECT name, score FROM results r WHERE name IS NOT NULL' + passed +
+            ' AND run_id = (SELECT max(run_id) FROM results WHERE name = r.name' + passed + ')'
+            ' ORDER BY run_id').fetchall())
@@ -0,0 +1,73 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import os
+import re
+
+import polars as pl
+
+
+DATED_OUTPUT = re.compile(r'(?P<prefix>.*_)(?P<date>\d{8})\.xlsx$')
+
+
+def previous_output(path):
+    # results/sp500_20250618.xlsx -> the newest results/sp500_YYYYMMDD.xlsx dated before it, or None
+    directory, name = os.path.split(os.path.abspath(path))
+    match = DATED_OUTPUT.match(name)
+    if match is None or not os.path.isdir(directory):
+        return None
+    pattern = re.compile(re.escape(match['prefix']) + r'\d{8}\.xlsx$')
+    older = sorted(f for f in os.listdir(directory) if pattern.match(f) and f < name)
+    return os.path.join(directory, older[-1]) if older else None
+
+
+def read_output(path):
+    import pandas as pd
+
+    df = pd.read_excel(path, dtype={'Ticker': str})
+    return pl.from_pandas(df[['Ticker', 'Name', 'B-Score']])
+
+
+def diff_results(old, new):
+    """
+    Entries, exits and score changes between two screening outputs (passing tickers only).
+
+    Returns one row per changed ticker: Ticker, Name, Change ('entry', 'exit', 'up', 'down'),
+    Old, New and Delta B-Score, entries first and then by the size of the move.
+    """
+    old = old.select('Ticker', pl.col('Name').alias('Old Name'), pl.col('B-Score').cast(pl.Float64).alias('Old'))
+    new = new.select('Ticker', 'Name', pl.col('B-Score').cast(pl.Float64).alias('New'))
+    joined = old.join(new, on='Ticker', how='full', coalesce=True)
+    change = (pl.when(pl.col('Old').is_null()).then(pl.lit('entry'))
+              .when(pl.col('New').is_null()).then(pl.lit('exit'))
+              .when(pl.col('New') > pl.col('Old')).then(pl.lit('up'))
+              .when(pl.col('New') < pl.col('Old')).then(pl.lit('down')))
+    order = pl.col('Change').replace_strict({'entry': 0, 'exit': 1, 'up': 2, 'down': 2}, return_dtype=pl.Int8)
+    return (
+        joined.with_columns(Name=pl.coalesce('Name', 'Old Name'), Change=change, Delta=(pl.col('New') - pl.col('Old')).round(2))
+        .filter(pl.col('Change').is_not_null())
+        .sort([order, pl.col('Delta').abs()], descending=[False, True], nulls_last=True)
+        .select('Ticker', 'Name', 'Change', 'Old', 'New', 'Delta')
+    )
+
+
+def summarize(diff, previous_path, top=10):
+    counts = dict(diff.group_by('Change').len().iter_rows())
+    lines = [f"Changes since {os.path.basename(previous_path)}: {counts.get('entry', 0)} entries, {counts.get('exit', 0)} exits, "
+             f"{counts.get('up', 0)} up, {counts.get('down', 0)} down"]
+    for ticker, name, change, old, new, delta in diff.head(top).iter_rows():
+        moved = f"{old} -> {new} ({delta:+.1f})" if delta is not None else (f"{new}" if change == 'entry' else f"{old}")
+        lines.append(f"  {change:<5} {ticker:<10} {str(name)[:30]:<30} {moved}")
+    return '\n'.join(lines)
+
+
+def write_diff(new_path, new_df):
+    # <output>_diff.csv next to the new output; returns (diff, previous path) or None on the first run
+    previous = previous_output(new_path)
+    if previous is None:
+        return None
+    new = new_df.select('Ticker', 'Name', 'B-Score') if len(new_df) else pl.DataFrame(schema={'Ticker': pl.Utf8, 'Name': pl.Utf8, 'B-Score': pl.Float64})
+    diff = diff_results(read_output(previous), new.with_columns(pl.col('Ticker').cast(pl.Utf8)))
+    diff.write_csv(os.path.splitext(new_path)[0] + '_diff.csv')
+    return diff, previous
@@ -0,0 +1,127 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import polars as pl
+
+
+# one row per ticker, raw inputs of buffett_score / momentum_score.
+# has_stable_eps_growth_cagr returns either a CAGR or a bool, so it is split into eps / eps_stable
+RAW_METRICS_SCHEMA = {
+    'Ticker': pl.Utf8,
+    'de': pl.Float64,
+    'cr': pl.Float64,
+    'pbr': pl.Float64,
+    'per': pl.Float64,
+    'ind_per': pl.Float64,
+    'roe': pl.Float64,
+    'ind_roe': pl.Float64,
+    'roa': pl.Float64,
+    'ind_roa': pl.Float64,
+    'eps': pl.Float64,
+    'eps_stable': pl.Boolean,
+    'div': pl.Float64,
+    'icr': pl.Float64,
+    'mom_short': pl.Float64,
+    'mom_mid': pl.Float64,
+    'mom_long': pl.Float64,
+    'cyclicality': pl.Float64,
+}
+
+MOMENTUM_WEIGHTS = {'short': 0.3, 'mid': 0.5, 'long': 1.2}
+MOMENTUM_THRESHOLDS = {
+    'short': (0.05, -0.05),   # +5% / -5%
+    'mid': (0.10, -0.05),     # +10% / -5%
+    'long': (0.15, 0.0)       # +15% / 0%
+}
+
+c = pl.col
+
+
+def raw_metrics_row(ticker, de, cr, pbr, per, ind_per, roe, ind_roe, roa, ind_roa, eps, div, icr,
+                    short=None, mid=None, long=None, cyclicality=0):
+    # same argument order as buffett_score + momentum_score
+    return {
+        'Ticker': ticker, 'de': de, 'cr': cr, 'pbr': pbr, 'per': per, 'ind_per': ind_per,
+        'roe': roe, 'ind_roe': ind_roe, 'roa': roa, 'ind_roa': ind_roa,
+        'eps': None if isinstance(eps, bool) else eps,
+        'eps_stable': eps if isinstance(eps, bool) else None,
+        'div': div, 'icr': icr, 'mom_short': short, 'mom_mid': mid, 'mom_long': long,
+        'cyclicality': cyclicality,
+    }
+
+
+def raw_metrics_frame(rows):
+    return pl.DataFrame(rows, schema=RAW_METRICS_SCHEMA)
+
+
+def _points(condition, points):
+    # null conditions (missing metrics) fall through to 0, like the `is not None` guards in buffett_score
+    return pl.when(condition).then(pl.lit(points, dtype=pl.Float64)).otherwise(pl.lit(0.0))
+
+
+def buffett_score_expr():
+    de, cr, pbr, per, ind_per = c('de'), c('cr'), c('pbr'), c('per'), c('ind_per')
+    roe, ind_roe, roa, ind_roa = c('roe'), c('ind_roe'), c('roa'), c('ind_roa')
+    eps, eps_stable, div, icr = c('eps'), c('eps_stable'), c('div'), c('icr')
+
+    low_pbr = (pbr <= 1.5) & (pbr != 0)
+    # a stable-EPS bool compares like 1/0 against thresholds in the div+eps rule
+    eps_num = pl.when(eps_stable.is_not_null()).then(eps_stable.cast(pl.Float64)).otherwise(eps)
+    overvalued = (per > ind_per) & (roe < ind_roe)
+    quality = c('_industry_known') & (roe > ind_roe) & (per != 0)
+    cheap = quality & (per < ind_per)
+    fair = quality & (per >= ind_per) & (per <= 1.2 * ind_per)
+
+    return pl.sum_horizontal([
+        #basic buffett-style filtering
+        _points((de <= 0.5) & (de != 0), 1),
+        _points((cr >= 1.5) & (cr <= 2.5), 1),
+        _points(low_pbr, 1),
+        _points(low_pbr & (pbr <= 1.0) & (roa >= ind_roa) & (cr >= 1.5), 1), # 저PBR + 고ROA
+        pl.when(div >= 0.1).then(1.0).when(div >= 0.08).then(0.75).when(div >= 0.06).then(0.5).otherwise(0.0),
+        pl.when(eps_stable).then(1.0).when(~eps_stable).then(-1.0).otherwise(0.0),
+        _points(eps >= 0.1, 1),
+        _points(eps < 0, -1),
+        _points((eps > 0) & (per / (eps * 100) <= 1), 1), # peg ratio, underv if less than 1
+        _points(icr >= 5, 1),
+        _points((div >= 0.3) & (eps_num >= 0.3), 1), # 고배당 + 고EPS 성장률
+        _points(overvalued, -2), # hard pass
+        _points(overvalued & (roe < 0), -1),
+        _points(cheap, 1.5), # 저PER + 고ROE
+        _points(cheap & (roa > ind_roa), 0.5),
+        _points(fair, 0.75), # great business, slightly overvalued
+        _points(fair & (roa > ind_roa), 0.25),
+    ])
+
+
+def _momentum_points(mom, good_thresh, bad_thresh):
+    return pl.when(mom >= good_thresh).then(1).when(mom <= bad_thresh).then(-1).otherwise(0)
+
+
+def momentum_score_expr():
+    w, t = MOMENTUM_WEIGHTS, MOMENTUM_THRESHOLDS
+    total = (_momentum_points(c('mom_short'), *t['short']) * w['short']
+             + _momentum_points(c('mom_mid'), *t['mid']) * w['mid']
+             + _momentum_points(c('mom_long'), *t['long']) * w['long'])
+    return (total / sum(w.values())).round(2)
+
+
+def score_frame(raw):
+    """
+    B-Score for the whole universe in one pass of null-aware column expressions.
+
+    Gives the same numbers as buffett_score(...) + momentum_score(...) + cyclicality per row.
+    Adds 'buffett', 'momentum' and 'score' (unrounded) columns.
+    """
+    floats = [name for name, dtype in RAW_METRICS_SCHEMA.items() if dtype == pl.Float64 and name in raw.columns]
+    return (
+        # the 저PER + 고ROE rule only checks that its inputs are not None, so NaN still counts as known there
+        raw.with_columns(_industry_known=pl.all_horizontal(
+            [c(name).is_not_null() for name in ('roe', 'ind_roe', 'per', 'ind_per', 'roa', 'ind_roa')]))
+        # everywhere else NaN fails every threshold, same as null
+        .with_columns([c(name).cast(pl.Float64).fill_nan(None) for name in floats])
+        .with_columns(buffett=buffett_score_expr(), momentum=momentum_score_expr())
+        .with_columns(score=c('buffett') + c('momentum') + c('cyclicality'))
+        .drop('_industry_known')
+    )
@@ -0,0 +1,99 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import threading
+
+from metrics import NULL_METRICS
+
+
+class TickerSnapshot:
+    """
+    Every yahoo dataset one screening pass needs for a single symbol.
+
+    Datasets are downloaded lazily on first access and at most once per snapshot,
+    going through the on-disk FundamentalsCache when one is given.
+    """
+
+    DATASETS = ('info', 'history', 'financials', 'balance_sheet', 'dividends', 'sustainability', 'quarterly_earnings')
+
+    def __init__(self, ticker, cache=None, metrics=NULL_METRICS):
+        self.ticker = ticker
+        self.cache = cache
+        self.metrics = metrics
+        self.fetches = 0 # round-trips actually sent to yahoo
+        self._yf_ticker = None
+        self._yf_lock = threading.Lock()
+        self._data = {}
+
+    def __repr__(self):
+        return f"TickerSnapshot({self.ticker!r}, loaded={sorted(self._data)})"
+
+    @property
+    def yf_ticker(self):
+        with self._yf_lock:
+            if self._yf_ticker is None:
+                import yfinance as yf # deferred: importing yfinance costs ~1s
+
+                self._yf_ticker = yf.Ticker(self.ticker)
+            return self._yf_ticker
+
+    def _fetch(self, dataset):
+        self.fetches += 1
+        if dataset == 'history':
+            return self.yf_ticker.history(period="2d") # enough for the daily % change
+        return getattr(self.yf_ticker, dataset)
+
+    def _timed_fetch(self, dataset):
+        with self.metrics.span('yahoo', dataset=dataset):
+            return self._fetch(dataset)
+
+    def load(self, dataset):
+        if dataset not in self._data:
+            if self.cache is not None:
+                self._data[dataset] = self.cache.get_or_load(self.ticker, dataset, lambda: self._timed_fetch(dataset))
+            else:
+                self._data[dataset] = self._timed_fetch(dataset)
+        return self._data[dataset]
+
+    def is_loaded(self, dataset):
+        return dataset in self._data
+
+    def is_cached(self, dataset):
+        return dataset in self._data or (self.cache is not None and self.cache.contains(self.ticker, dataset))
+
+    async def prefetch(self, engine, datasets, host='yahoo'):
+        # download the missing datasets concurrently under the engine's yahoo limits; cache hits skip the limiter
+        missing = [dataset for dataset in datasets if not self.is_cached(dataset)]
+        await asyncio.gather(*(engine.call(host, self.load, dataset) for dataset in missing))
+        for dataset in datasets:
+            self.load(dataset)
+
+    @property
+    def info(self):
+        return self.load('info')
+
+    @property
+    def history(self):
+        return self.load('history')
+
+    @property
+    def financials(self):
+        return self.load('financials')
+
+    @property
+    def balance_sheet(self):
+        return self.load('balance_sheet')
+
+    @property
+    def dividends(self):
+        return self.load('dividends')
+
+    @property
+    def sustainability(self):
+        return self.load('sustainability')
+
+    @property
+    def quarterly_earnings(self):
+        return self.load('quarterly_earnings')
@@ -0,0 +1,191 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+import time
+from collections import Counter, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+StubRequest = namedtuple('StubRequest', ['method', 'path', 'query', 'headers', 'body'])
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for yahoo/naver/news/LLM endpoints.
+
+    routes maps a path to either a fixed response or a callable taking a StubRequest.
+    A response is a dict/list (sent as JSON), str (HTML), bytes, or a (status, headers, body) tuple.
+    With throttle_every=N every Nth request gets a 429 with the given Retry-After.
+    """
+
+    def __init__(self, routes=None, throttle_every=0, retry_after=None, latency=0.0, host='127.0.0.1', port=0):
+        self.routes = dict(routes or {})
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.hits = Counter()
+        self.throttled = 0
+        self.log = []
+        self._count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def route(self, path, response):
+        self.routes[path] = response
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_throttle(self):
+        with self._lock:
+            self._count += 1
+            if self.throttle_every and self._count % self.throttle_every == 0:
+                self.throttled += 1
+                return True
+            return False
+
+    def _respond(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.hits[request.path] += 1
+            self.log.append(request)
+        if self._should_throttle():
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            return 429, headers, b'Too Many Requests'
+        response = self.routes.get(request.path)
+        if response is None:
+            return 404, {}, b'Not Found'
+        if callable(response):
+            response = response(request)
+        status, headers = 200, {}
+        if isinstance(response, tuple):
+            status, headers, response = response
+        if isinstance(response, (dict, list)):
+            headers = {'Content-Type': 'application/json', **headers}
+            response = json.dumps(response, ensure_ascii=False)
+        if isinstance(response, str):
+            headers = {'Content-Type': 'text/html; charset=utf-8', **headers}
+            response = response.encode('utf-8')
+        return status, headers, response
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                request = StubRequest(self.command, parsed.path, parse_qs(parsed.query), dict(self.headers),
+                                      self.rfile.read(length) if length else b'')
+                status, headers, body = stub._respond(request)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass # keep benchmark/test output clean
+
+        return Handler
+
+
+def gemini_route(model, reply=None, fail_every=0):
+    """
+    (path, route) answering the Gemini generateContent call of one model, for StubServer.route.
+
+    reply(prompt) gives the text (default: a canned analysis naming the prompt's first line);
+    with fail_every=N every Nth call returns a 500, to exercise retries.
+    """
+    count = [0]
+    lock = threading.Lock()
+
+    def generate(request):
+        with lock:
+            count[0] += 1
+            failing = fail_every and count[0] % fail_every == 0
+        if failing:
+            return 500, {}, {'error': {'code': 500, 'message': 'stub failure', 'status': 'INTERNAL'}}
+        body = json.loads(request.body or b'{}')
+        prompt = ''.join(part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', []))
+        text = reply(prompt) if reply else f'stub analysis ({model})\n- {prompt.strip().splitlines()[0] if prompt.strip() else ""}\n- Final rating: 2'
+        return {
+            'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP', 'index': 0}],
+            'usageMetadata': {'promptTokenCount': len(prompt) // 4, 'candidatesTokenCount': len(text) // 4,
+                              'totalTokenCount': (len(prompt) + len(text)) // 4},
+            'modelVersion': model,
+        }
+
+    return f'/v1beta/models/{model}:generateContent', generate
+
+
+def newsapi_route(per_company=150, keywords=(), max_results=None, seed=0):
+    """
+    (path, route) answering NewsAPI's /v2/everything for StubServer.route.
+
+    Every quoted company of q gets per_company articles, newest first, that name it and a few of
+    the keywords; every 10th article is about all companies of the query and listed once per
+    company under the same URL, to exercise dedup. page / pageSize are honored; beyond max_results it answers 426
+    maximumResultsReached like the developer plan.
+    """
+    import random
+    import re
+
+    def everything(request):
+        q = request.query.get('q', [''])[0]
+        page = int(request.query.get('page', ['1'])[0])
+        size = int(request.query.get('pageSize', ['100'])[0])
+        names = re.findall(r'"([^"]+)"', q.split(') AND (')[0])
+        if max_results is not None and page * size > max_results:
+            return 426, {}, {'status': 'error', 'code': 'maximumResultsReached',
+                             'message': f'You have requested too many results. Developer accounts are limited to a max of {max_results} results.'}
+        articles = []
+        for i in range(per_company):
+            for name in names:
+                rng = random.Random(f'{seed}/{name}/{i}')
+                about = ' and '.join(names) if i % 10 == 0 else name
+                words = ', '.join(rng.sample(list(keywords), min(3, len(keywords)))) if keywords else ''
+                slug = re.sub(r'\W+', '-', about).strip('-').lower()
+                articles.append({
+                    'source': {'id': None, 'name': 'Stub News'},
+                    'author': None,
+                    'title': f'{about}: quarterly update {i}',
+                    'description': f'Analysts point to {words} at {about}.',
+                    'url': f'https://news.example/{slug}/{i}',
+                    'urlToImage': None,
+                    'publishedAt': f'2025-06-{28 - i % 28:02d}T00:00:00Z',
+                    'content': f'{about} {words}'[:200],
+                })
+        return {'status': 'ok', 'totalResults': len(articles), 'articles': articles[(page - 1) * size:page * size]}
+
+    return '/v2/everything', everything
@@ -0,0 +1,475 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+# end-to-end benchmark of the screening pipeline (prepare -> fetch -> score -> save) on fixed inputs.
+# every case runs in its own process so peak RSS is per case; results are appended to results/benchmarks.jsonl
+# with the commit they ran on, and compared against the latest run of the same case on another commit.
+#   python test/benchmark.py                                      # synthetic sp500, nasdaq100 and KR universes
+#   python test/benchmark.py --cases KR --latency-scale 0         # pure CPU cost, no simulated network or host rate limits
+#   python test/benchmark.py --cases KR --fixture cache/kr300.zip --date 20250617   # replay a recorded run
+#   python test/benchmark.py --baseline 7c7a0cf --fail-on-regression 10
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+from buffett import Screener
+from fetch_engine import HOST_LIMITS, HostLimit
+from http_archive import FakeResponse, HttpArchive
+from industry_benchmarks import FULLRATIO_URLS, IndustryBenchmarks
+from metrics import Metrics
+from results_history import ResultsHistory
+from results_store import ResultsStore
+from snapshot import TickerSnapshot
+
+RESULTS_FILE = os.path.join(ROOT_DIR, 'results', 'benchmarks.jsonl')
+
+# universe -> Screener arguments and synthetic universe size
+CASES = {
+    'sp500': {'country': None, 'sp500': True, 'size': 503},
+    'nasdaq100': {'country': None, 'sp500': False, 'size': 101},
+    'KR': {'country': 'KR', 'sp500': True, 'size': 300},
+}
+
+# simulated round trip per yahoo dataset in seconds, multiplied by --latency-scale
+DATASET_LATENCY = {
+    'info': 0.08, 'history': 0.04, 'financials': 0.12, 'balance_sheet': 0.12,
+    'dividends': 0.05, 'sustainability': 0.06, 'quarterly_earnings': 0.06,
+}
+PAGE_LATENCY = 0.05 # fullratio / naver pages
+PANEL_LATENCY = 0.5 # one batched close-price download
+NAVER_SECTORS = 40
+# host limits with --latency-scale 0, so the limiter doesn't stand in for CPU time
+UNLIMITED = HostLimit(rate=1e9, burst=10**9, max_concurrency=10**4, initial_concurrency=10**4)
+
+INDUSTRIES = {
+    # industry: (P/E, ROE %, ROA %)
+    'Semiconductors': (28.1, 21.0, 12.3), 'Software—Application': (35.4, 18.2, 8.1),
+    'Banks—Regional': (11.2, 10.4, 1.1), 'Insurance—Life': (12.8, 11.0, 0.9),
+    'Specialty Retail': (18.6, 24.5, 7.7), 'Auto Manufacturers': (9.4, 12.1, 4.2),
+    'Utilities—Regulated Electric': (17.9, 9.3, 2.8), 'Drug Manufacturers—General': (22.3, 20.4, 9.0),
+    'Oil & Gas Integrated': (10.8, 14.7, 7.4), 'Packaged Foods': (19.1, 16.2, 6.0),
+    'Aerospace & Defense': (24.0, 15.8, 5.5), 'Chemicals': (16.3, 12.9, 5.9),
+}
+
+
+def _rng(*key):
+    return random.Random(':'.join(map(str, key)))
+
+
+def _sleep(seconds, rng, scale):
+    if scale > 0:
+        time.sleep(seconds * scale * rng.uniform(0.5, 1.5))
+
+
+class SyntheticFixtures:
+    """
+    Deterministic stand-ins for yahoo, fullratio, naver and KRX, seeded per ticker and dataset.
+
+    Responses have the same shape as the real ones, so the screener's own parsing, caching and
+    scoring code runs unchanged; only the network round trip is simulated with time.sleep.
+    """
+
+    def __init__(self, case, size=None, seed=0, latency_scale=1.0):
+        self.case = case
+        self.country = CASES[case]['country']
+        self.size = size or CASES[case]['size']
+        self.seed = seed
+        self.latency_scale = latency_scale
+        self.today = dt.datetime.today()
+
+    def tickers(self):
+        if self.country == 'KR':
+            # every 10th code is a preferred share (last digit != 0), which prepare() filters out
+            codes = [f"{i:05d}{5 if i % 10 == 9 else 0}" for i in range(1, self.size + 1)]
+            return [code + '.KS' for code in codes]
+        return [f"SYN{i:04d}" for i in range(self.size)]
+
+    def dataset(self, ticker, dataset):
+        rng = _rng(self.seed, ticker, dataset)
+        _sleep(DATASET_LATENCY.get(dataset, 0.05), rng, self.latency_scale)
+        return getattr(self, '_' + dataset)(ticker, rng)
+
+    def price(self, ticker):
+        # last close; .info, .history and the close panel all agree on it
+        return _rng(self.seed, ticker, 'price').uniform(5, 500) * (1000 if self.country == 'KR' else 1)
+
+    def _info(self, ticker, rng):
+        industry = list(INDUSTRIES)[_rng(self.seed, ticker).randrange(len(INDUSTRIES))]
+        price = self.price(ticker)
+        maybe = lambda value, p=0.9: value if rng.random() < p else None
+        return {
+            'longName': f"{ticker} Holdings", 'shortName': ticker, 'industry': industry, 'subIndustry': industry,
+            'currentPrice': price, 'targetMeanPrice': maybe(price * rng.uniform(0.8, 1.4), 0.8),
+            'debtToEquity': maybe(rng.uniform(0, 250)), 'currentRatio': maybe(rng.uniform(0.5, 3.5)),
+            'priceToBook': maybe(rng.uniform(0.3, 6), 0.7 if self.country == 'KR' else 0.95),
+            'trailingPE': maybe(rng.uniform(4, 60), 0.85), 'returnOnEquity': maybe(rng.uniform(-0.1, 0.4)),
+            'returnOnAssets': maybe(rng.uniform(-0.05, 0.2)), 'recommendationKey': rng.choice(['buy', 'hold', 'sell']),
+            # about one ticker in 30 reports within a day of the run
+            'earningsTimestamp': int(self.today.timestamp() + _rng(self.seed, ticker, 'earnings').uniform(-15, 15) * 86400),
+        }
+
+    def _history(self, ticker, rng):
+        close = self.price(ticker)
+        index = pd.DatetimeIndex([self.today - dt.timedelta(days=1), self.today]).normalize()
+        return pd.DataFrame({'Close': [close * rng.uniform(0.95, 1.05), close]}, index=index)
+
+    def _financials(self, ticker, rng):
+        years = [pd.Timestamp(self.today.year - k, 12, 31) for k in range(1, 5)] # most recent first
+        eps = [rng.uniform(-1, 10)]
+        for _ in years[1:]:
+            eps.append(eps[-1] * rng.uniform(0.7, 1.1))
+        operating = [rng.uniform(-50, 500) for _ in years]
+        interest = [-rng.uniform(0, 40) if rng.random() < 0.9 else np.nan for _ in years]
+        return pd.DataFrame([eps, operating, interest], index=['Diluted EPS', 'Operating Income', 'Interest Expense'], columns=years)
+
+    _balance_sheet = _financials
+
+    def _dividends(self, ticker, rng):
+        if rng.random() < 0.3:
+            return pd.Series([], index=pd.DatetimeIndex([]), dtype=float)
+        dates = pd.date_range(f'{self.today.year - 12}-01-01', f'{self.today.year - 1}-12-31', freq='QE')
+        amounts = np.cumprod([rng.uniform(0.9, 1.08) for _ in dates]) * rng.uniform(0.1, 1.0)
+        return pd.Series(amounts, index=dates)
+
+    def _sustainability(self, ticker, rng):
+        return pd.DataFrame({'esgScores': {'totalEsg': round(rng.uniform(10, 40), 2), 'esgPerformance': 'AVG_PERF'}})
+
+    def _quarterly_earnings(self, ticker, rng):
+        dates = pd.date_range(end=self.today, periods=8, freq='QE')
+        return pd.DataFrame({'Earnings': [rng.uniform(1, 5) for _ in dates]}, index=dates)
+
+    def close_panel(self, tickers):
+        rng = np.random.default_rng(self.seed)
+        _sleep(PANEL_LATENCY, random.Random(self.seed), self.latency_scale)
+        dates = pd.bdate_range(end=self.today, periods=250)
+        steps = rng.normal(0.0004, 0.02, size=(len(dates), len(tickers)))
+        prices = np.exp(np.cumsum(steps, axis=0))
+        prices *= np.array([self.price(ticker) for ticker in tickers]) / prices[-1]
+        young = rng.random(len(tickers)) < 0.05 # recent listings with short histories
+        prices[:200, young] = np.nan
+        return pd.DataFrame(prices, index=dates, columns=tickers)
+
+    def krx_fundamentals(self):
+        codes = [ticker[:6] for ticker in self.tickers()]
+        rng = np.random.default_rng(self.seed)
+        return pd.DataFrame({'PER': rng.uniform(3, 40, len(codes)), 'PBR': rng.uniform(0.2, 4, len(codes))}, index=codes)
+
+    # ---- web pages
+
+    def page(self, url):
+        _sleep(PAGE_LATENCY, _rng(self.seed, url), self.latency_scale)
+        for column, page_url in FULLRATIO_URLS.items():
+            if url == page_url:
+                position = {'P/E Ratio': 0, 'ROE': 1, 'ROA': 2}[column]
+                rows = ''.join(f"<tr><td>{name}</td><td>{values[position]}</td></tr>" for name, values in INDUSTRIES.items())
+                return FakeResponse(200, {}, f"<table><tbody>{rows}</tbody></table>".encode(), url)
+        if 'item/main' in url:
+            code = url.split('code=')[-1][:6]
+            sector = int(code[:5]) % NAVER_SECTORS
+            per = round(_rng(self.seed, 'sector', sector).uniform(5, 30), 2)
+            html = (f'<div class="aside_invest_info"><table><tr><th>동일업종 PER</th><td><em>{per}</em>배</td></tr></table></div>'
+                    f'<a href="/sise/sise_group_detail.naver?type=upjong&no={sector}">업종</a>')
+            return FakeResponse(200, {}, html.encode(), url)
+        if 'sise_group_detail' in url:
+            sector = int(url.split('no=')[-1])
+            members = [t[:6] for t in self.tickers() if int(t[:5]) % NAVER_SECTORS == sector]
+            html = ''.join(f'<a href="/item/main.naver?code={code}">{code}</a>' for code in members)
+            return FakeResponse(200, {}, html.encode(), url)
+        return FakeResponse(404, {}, b'', url)
+
+
+class BenchmarkScreener(Screener):
+    # Screener with wall time per stage and per-ticker latency; limits override fetch_engine.HOST_LIMITS
+    def __init__(self, *args, limits=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limits = limits
+        self.stage_times = {}
+        self.latencies = []
+
+    def open(self):
+        super().open()
+        if self.limits:
+            self.engine.limits.update(self.limits) # before the first request creates a host's limiter
+        return self
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + time.perf_counter() - start
+
+    def prepare(self):
+        with self.stage('prepare'):
+            super().prepare()
+
+    def fetch(self, tickers=None):
+        with self.stage('fetch'):
+            super().fetch(tickers)
+
+    def fetch_incremental(self, store):
+        with self.stage('incremental'): # includes the fetch of the refetched tickers
+            super().fetch_incremental(store)
+
+    def score(self):
+        with self.stage('score'):
+            return super().score()
+
+    def save(self, scores, store):
+        with self.stage('save'):
+            super().save(scores, store)
+
+    async def process_ticker_quantitatives(self, ticker):
+        start = time.perf_counter()
+        try:
+            await super().process_ticker_quantitatives(ticker)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+class SyntheticScreener(BenchmarkScreener):
+    def __init__(self, fixtures, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fixtures = fixtures
+
+        class SyntheticSnapshot(TickerSnapshot):
+            def _fetch(snapshot, dataset):
+                snapshot.fetches += 1
+                return fixtures.dataset(snapshot.ticker, dataset)
+
+        self.snapshot_class = SyntheticSnapshot
+
+    def open(self):
+        super().open()
+        # same caching/scraping code as a live run, with the pages served by the fixtures through the engine's limits
+        self.benchmarks = IndustryBenchmarks(self.fundamentals, http_get=self._http_get)
+        self.benchmarks.snapshot_class = self.snapshot_class
+        if self.country == 'KR':
+            self._df_kospi = self.fixtures.krx_fundamentals()
+        return self
+
+    def _http_get(self, url, **kwargs):
+        return self.engine.run(self.engine.call(self.engine.group_of(url), self.fixtures.page, url))
+
+    def fetch_tickers(self):
+        return self.fixtures.tickers()
+
+    def fetch_close_panel(self, tickers):
+        return self.fixtures.close_panel(tickers)
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024 # bytes on macOS, KiB on Linux
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    return git('rev-parse', '--short', 'HEAD') or None, bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+def fixture_key(args):
+    mode = '+incremental' if args.incremental else '+warm' if args.warm else ''
+    if args.fixture:
+        return f"replay:{os.path.basename(args.fixture)}@{args.latency}+{args.latency_scale}x{mode}"
+    return f"synthetic:{args.size or 'default'}@{args.latency_scale}x{mode}"
+
+
+def run_case(case, args):
+    spec = CASES[case]
+    with tempfile.TemporaryDirectory() as tmp:
+        # cold caches unless --warm: the fundamentals cache, price store, results db and Parquet history of a real run are never touched
+        kwargs = {'cutoff': None, 'num_workers': args.workers, 'report_every': None,
+                  'cache_path': os.path.join(tmp, 'fundamentals_cache'), 'price_path': os.path.join(tmp, 'prices'),
+                  'limits': dict.fromkeys(HOST_LIMITS, UNLIMITED) if args.latency_scale == 0 else None}
+        metrics = Metrics() if args.metrics else None
+        history = ResultsHistory(os.path.join(tmp, 'history'))
+        if args.fixture:
+            archive = HttpArchive(args.fixture, 'replay', args.latency, args.latency_scale)
+            make = lambda: BenchmarkScreener(spec['country'], args.size or spec['size'], spec['sp500'], **kwargs)
+        else:
+            archive = HttpArchive(None, 'off')
+            fixtures = SyntheticFixtures(case, args.size, args.seed, args.latency_scale)
+            make = lambda: SyntheticScreener(fixtures, spec['country'], args.size or spec['size'], spec['sp500'], **kwargs)
+
+        with archive.activate(), ResultsStore(os.path.join(tmp, 'results.db')) as store:
+            if args.warm or args.incremental:
+                with make() as screener:
+                    # the incremental run needs a previous day's run to start from
+                    screener.date = args.date or screener.date
+                    if args.incremental:
+                        screener.date = (dt.datetime.strptime(screener.date, '%Y%m%d') - dt.timedelta(days=1)).strftime('%Y%m%d')
+                    screener.run(store, history=history)
+                if args.incremental: # make the previous run a day old, so a day's worth of earnings dates have passed
+                    with store.conn:
+                        store.conn.execute("UPDATE results SET metrics = json_set(metrics, '$.state.fetched', "
+                                           "json_extract(metrics, '$.state.fetched') - 86400)")
+            start = time.perf_counter()
+            with make() as screener:
+                if args.date:
+                    screener.date = args.date
+                screener.metrics = metrics or screener.metrics
+                df = screener.run(store, incremental=args.incremental, history=history)
+                wall = time.perf_counter() - start
+                requests = screener.engine.request_counts()
+                limiter_wait = sum(waited for _, waited in screener.engine.wait_times().values())
+                industry_requests = screener.benchmarks.requests
+                cache_stats = dict(screener.fundamentals.stats())
+
+    latencies = np.array(screener.latencies) if screener.latencies else np.zeros(1)
+    return {
+        'case': case,
+        'fixture': fixture_key(args),
+        'tickers': len(screener.tickers),
+        'screened': len(screener.screened),
+        'passed': len(df),
+        'wall': round(wall, 4),
+        'tickers_per_sec': round(len(screener.tickers) / wall, 3) if wall else None,
+        'latency_p50': round(float(np.percentile(latencies, 50)), 4),
+        'latency_p95': round(float(np.percentile(latencies, 95)), 4),
+        'stages': {name: round(seconds, 4) for name, seconds in screener.stage_times.items()},
+        'limiter_wait': round(limiter_wait, 4), # summed over requests, so it can exceed the wall time
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'requests': requests,
+        'industry_requests': industry_requests,
+        'cache': cache_stats,
+        'archive': dict(archive.stats),
+        **({'spans': {f"{s['name']}{'.' + '.'.join(s['labels'].values()) if s['labels'] else ''}": round(s['total'], 4)
+                      for s in metrics.to_dict()['spans']}} if metrics is not None else {}),
+    }
+
+
+# (field, True if higher is better)
+COMPARED = [('tickers_per_sec', True), ('latency_p50', False), ('latency_p95', False), ('wall', False), ('peak_rss_mb', False)]
+
+
+def load_results(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(history, result, baseline=None):
+    # latest stored run of the same case + fixture, on `baseline` (commit prefix) or else on any other commit
+    for previous in reversed(history):
+        if previous['case'] != result['case'] or previous['fixture'] != result['fixture']:
+            continue
+        if baseline is not None:
+            if previous.get('commit') and previous['commit'].startswith(baseline):
+                return previous
+        elif previous.get('commit') != result.get('commit') or previous.get('dirty') != result.get('dirty'):
+            return previous
+    return None
+
+
+def compare(result, previous, threshold):
+    # prints the change of every compared field and returns the ones that got worse by more than threshold %
+    regressions = []
+    print(f"  vs {previous.get('commit')}{'+dirty' if previous.get('dirty') else ''} ({previous.get('timestamp')}):")
+    for field, higher_is_better in COMPARED:
+        old, new = previous.get(field), result.get(field)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        worse = -change if higher_is_better else change
+        flag = '  REGRESSION' if worse > threshold else ''
+        print(f"    {field:<16} {old:>10.4g} -> {new:>10.4g}  ({change:+.1f}%){flag}")
+        if flag:
+            regressions.append(field)
+    return regressions
+
+
+def print_result(result):
+    stages = '  '.join(f"{name} {seconds:.2f}s" for name, seconds in result['stages'].items())
+    total_requests = sum(counts.get('requests', 0) for counts in result['requests'].values())
+    print(f"{result['case']:<10} {result['tickers']:>4} tickers  {result['tickers_per_sec']:>7.2f} tickers/s  "
+          f"p50 {result['latency_p50'] * 1000:.0f}ms  p95 {result['latency_p95'] * 1000:.0f}ms  "
+          f"peak RSS {result['peak_rss_mb']:.0f}MB  {total_requests} requests")
+    print(f"  {stages}  limiter wait {result.get('limiter_wait', 0):.2f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the screening pipeline")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--fixture', help="HTTP archive recorded with buffett.py --record (default: synthetic fixtures)")
+    parser.add_argument('--date', help="KRX date (YYYYMMDD) the fixture was recorded on")
+    parser.add_argument('--size', type=int, help="universe size (default: 503 / 101 / 300)")
+    parser.add_argument('--seed', type=int, default=0, help="synthetic fixture seed")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every replayed response")
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="multiplier of simulated/recorded round trips")
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--metrics', action='store_true', help="record per-helper spans (see src/metrics.py) in the results")
+    parser.add_argument('--incremental', action='store_true', help="measure an incremental rerun on top of a full run")
+    parser.add_argument('--warm', action='store_true', help="measure a second run on a warm fundamentals cache")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per case")
+    parser.add_argument('--baseline', help="commit to compare against (default: latest run on another commit)")
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT', help="exit 1 if any metric is PCT%% worse")
+    parser.add_argument('--no-save', action='store_true', help=f"don't append to {os.path.relpath(RESULTS_FILE, ROOT_DIR)}")
+    parser.add_argument('--child', help=argparse.SUPPRESS) # run one case in this process, write JSON to --child-out
+    parser.add_argument('--child-out', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        result = run_case(args.child, args)
+        with open(args.child_out, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return 0
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    commit, dirty = git_revision()
+    history = load_results()
+    regressions = []
+    for case in args.cases:
+        for _ in range(args.repeat):
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as out:
+                out_path = out.name
+            try:
+                # a fresh interpreter per case, so peak RSS and import state don't leak between cases
+                subprocess.run([sys.executable, os.path.abspath(__file__), *argv, '--child', case, '--child-out', out_path],
+                               check=True, stdout=subprocess.DEVNULL)
+                with open(out_path, encoding='utf-8') as f:
+                    result = json.load(f)
+            finally:
+                os.remove(out_path)
+
+            result.update(commit=commit, dirty=dirty, timestamp=dt.datetime.now().isoformat(timespec='seconds'),
+                          python=platform.python_version(), machine=platform.machine(), cpus=os.cpu_count())
+            print_result(result)
+            previous = find_baseline(history, result, args.baseline)
+            if previous is not None:
+                regressions += compare(result, previous, args.fail_on_regression or 10.0)
+            if not args.no_save:
+                os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+                with open(RESULTS_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result) + '\n')
+
+    if args.fail_on_regression is not None and regressions:
+        print(f"{len(regressions)} regression(s) over {args.fail_on_regression}%")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+# fetch_engine.FetchEngine against a local stub server (stub_server.py) that answers every Nth request with a 429:
+# every request must still succeed, the throttled / retries counts must match what the stub injected, each 429
+# must halve the AIMD window and nothing may reach the server before Retry-After has passed.
+#   python test/fetch_throttle.py
+#   python test/fetch_throttle.py --requests 100 --throttle-every 5 --retry-after 0.5
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from fetch_engine import FetchEngine, HostLimit
+from stub_server import StubServer
+
+SLACK = 0.05 # seconds of timer resolution allowed on the Retry-After check
+
+
+def instrument(limiter):
+    # send times (after the limiter lets a request through) and (time, window before, window after) of every 429
+    sends, throttles = [], []
+    bucket_acquire, on_throttle = limiter.bucket.acquire, limiter.on_throttle
+
+    async def acquire():
+        await bucket_acquire()
+        sends.append(time.monotonic())
+
+    def throttled(retry_after=None):
+        before = limiter.window
+        on_throttle(retry_after)
+        throttles.append((time.monotonic(), before, limiter.window))
+
+    limiter.bucket.acquire, limiter.on_throttle = acquire, throttled
+    return sends, throttles
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--throttle-every', type=int, default=3, help="the stub answers every Nth request with a 429")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="seconds, sent in the 429's Retry-After header")
+    parser.add_argument('--latency', type=float, default=0.05, help="stub round trip in seconds")
+    args = parser.parse_args()
+
+    limit = HostLimit(rate=100, burst=20, max_concurrency=16, initial_concurrency=8)
+    failures = []
+    with StubServer(throttle_every=args.throttle_every, retry_after=args.retry_after, latency=args.latency) as stub:
+        stub.route('/item', lambda request: {'item': request.query['n'][0]})
+        with FetchEngine(limits={'127.0.0.1': limit}, max_retries=10) as engine:
+            limiter = engine.limiter('127.0.0.1')
+            sends, throttles = instrument(limiter)
+            start = time.monotonic()
+            responses = engine.run(engine.map(lambda n: engine.get(f'{stub.url}/item?n={n}'), range(args.requests)))
+            wall = time.monotonic() - start
+            counts = engine.request_counts()['127.0.0.1']
+            print(engine.summary())
+
+        served = sum(stub.hits.values())
+        ok = [r for r in responses if not isinstance(r, Exception) and r.status_code == 200]
+        if len(ok) != args.requests:
+            failures.append(f"{len(ok)}/{args.requests} requests succeeded")
+        if sorted(int(r.json()['item']) for r in ok) != list(range(len(ok))):
+            failures.append("responses don't match their requests")
+        if served // args.throttle_every != stub.throttled or counts['throttled'] != stub.throttled:
+            failures.append(f"{counts['throttled']} 429s counted, stub injected {stub.throttled} of {served}")
+        if counts['retries'] != stub.throttled:
+            failures.append(f"{counts['retries']} retries for {stub.throttled} 429s")
+        if counts['requests'] != served:
+            failures.append(f"{counts['requests']} requests counted, stub served {served}")
+
+    for at, before, after in throttles:
+        if after != max(limit.min_concurrency, before / 2):
+            failures.append(f"window {before:.2f} -> {after:.2f} on a 429, not halved")
+        early = [t - at for t in sends if at < t < at + args.retry_after - SLACK]
+        if early:
+            failures.append(f"{len(early)} requests sent {min(early):.2f}s after a 429 with Retry-After {args.retry_after}s")
+    if limiter.stats.throttle_wait > wall:
+        failures.append(f"backoff {limiter.stats.throttle_wait:.1f}s counted in a {wall:.1f}s run")
+
+    print(f"{len(ok)}/{args.requests} ok, {served} served, {stub.throttled} throttled, {counts['retries']} retries, "
+          f"backoff {limiter.stats.throttle_wait:.1f}s in {wall:.1f}s, final window {limiter.window:.1f}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
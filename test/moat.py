@@ -1,17 +1,24 @@
 from dotenv import load_dotenv
 import os
+import sys
 import datetime as dt
-from openpyxl import load_workbook
 import textwrap
-from queue import Queue
-import threading
-import time
+import asyncio
+from dataclasses import replace
 import polars as pl
 from google import genai
-from google.genai.types import Tool, GenerateContentConfig, GoogleSearch
-import shelve
+from google.genai.types import Tool, GenerateContentConfig, GoogleSearch, HttpOptions
 
-CACHE_FILE = "company_cache"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from results_store import ResultsStore
+from http_archive import install_from_env
+from moat_cache import CACHE_DIR, DAY, MoatCache, template_hash
+from report_writer import write_report
+from news_ingest import NEWS_DB, NewsStore
+from llm_dispatcher import Completion, LLMDispatcher, MODEL_QUOTAS, DEFAULT_QUOTA
+from stub_server import StubServer, gemini_route
+
+http_archive = install_from_env() # HTTP_ARCHIVE_MODE=record|replay HTTP_ARCHIVE_PATH=... (Gemini calls go through httpx)
 
 model_id = "gemini-2.5-flash-preview-04-17" # 05-20
 
@@ -19,15 +26,20 @@ google_search_tool = Tool(
     google_search = GoogleSearch()
 )
 
-# Use multithreading to speed up
-num_threads = 5 #5 worked just fine for limit=50
+# asyncio dispatcher paced by the model's requests/tokens per minute (llm_dispatcher.py) instead of threads and sleeps;
+# MOAT_RPM / MOAT_TPM override the quota of the API key's tier
+quota = MODEL_QUOTAS.get(model_id, DEFAULT_QUOTA)
+quota = replace(quota, rpm=int(os.getenv("MOAT_RPM", quota.rpm)), tpm=int(os.getenv("MOAT_TPM", quota.tpm)))
+max_attempts = 4 # per company; one that still fails is left out of the sheet and retried on the next run
+
+# analyses are cached per (company, prompt template, model) in cache/moat; older than this they're asked for again
+max_age_days = float(os.getenv("MOAT_MAX_AGE_DAYS", 30))
 
 print(model_id + ' AI model working in progress.. May take up to few minutes.')
 
 # today = dt.datetime.today().weekday()
 
 data = []
-data_lock = threading.Lock()
 
 moat = {
     3: "Unbreachable(+3)",
@@ -42,22 +54,22 @@ load_dotenv()
 # Get the API key
 api_key = os.getenv("GEMINI_API_KEY")
 
-# Use it with OpenAI
-client = genai.Client(api_key=api_key)
+# GEMINI_STUB=1 answers from a local stub model server (stub_server.py), GEMINI_BASE_URL points at any other endpoint
+base_url = os.getenv("GEMINI_BASE_URL")
+stub = None
+if os.getenv("GEMINI_STUB"):
+    stub = StubServer().start()
+    stub.route(*gemini_route(model_id))
+    base_url, api_key = stub.url, api_key or 'stub'
 
-q = Queue()
-with shelve.open(CACHE_FILE) as cache:
-    for name, score in cache.items():
-        q.put((name, score))
+# stub / other endpoints get a cache of their own, so their answers never stand in for the real model's
+cache_dir = os.path.join(CACHE_DIR, 'stub') if stub else os.path.join(CACHE_DIR, template_hash(base_url)) if base_url else CACHE_DIR
+cache = MoatCache(cache_dir, max_age=max_age_days * DAY)
 
+# Use it with OpenAI
+client = genai.Client(api_key=api_key, http_options=HttpOptions(base_url=base_url) if base_url else None)
 
-def process_moat():
-    while not q.empty():
-        (name, score) = q.get()
-        try:
-            # - Return a single integer as the response output without any text explanation
-
-            user_prompt = f"""
+prompt_template = """
 
             You are a financial analysis AI trained in the style of Warren Buffett's long-term investment philosophy. 
             Your mission is to use **web search capabilities** to analyze the long-term competitive advantage (economic moat) of {name}, 
@@ -113,86 +125,94 @@ def process_moat():
             * `1`: **Narrow** : Some edge, but likely to weaken over time
             * `0`: **No moat** : Little or no sustainable advantage; easily exposed to competition
 
-            """.strip()
-
-            response = client.models.generate_content(
-            model=model_id,
-            config=GenerateContentConfig(
-                tools=[google_search_tool],
-                response_modalities=["TEXT"],
-            ),
-            contents=user_prompt)
-
-            # 줄 단위로 나눈 후, 각각에 대해 줄바꿈 적용
-            wrapped_lines = []
-            for line in response.text.strip().split('\n'):
-                # 줄의 시작 공백(들여쓰기) 보존
-                leading_spaces = len(line) - len(line.lstrip(' '))
-                indent = ' ' * leading_spaces
-
-                # bullet 유지되도록 첫 단어 확인
-                if line.lstrip().startswith(("-", "*", "•")) or line.lstrip()[:2].isdigit():
-                    first_word = line.split()[0]
-                    rest = ' '.join(line.split()[1:])
-                    wrapped = textwrap.fill(rest, width=120 - len(indent) - len(first_word) - 1,
-                                            initial_indent=indent + first_word + ' ',
-                                            subsequent_indent=indent + ' ' * (len(first_word) + 1))
-                else:
-                    wrapped = textwrap.fill(line, width=120,
-                                            initial_indent=indent,
-                                            subsequent_indent=indent)
-                wrapped_lines.append(wrapped)
-
-            # 최종 텍스트
-            ai_generated_moat = '\n'.join(wrapped_lines)
-
-            result = {
-                "기업": name,
-                "퀀트점수(9)": score,
-                "분석": ai_generated_moat,
-            }
-
-            with data_lock:
-                data.append(result)
-
-        except Exception as e:
-            if "429" in str(e):
-                print("Too many requests! Waiting 10 seconds...")
-                time.sleep(10)
-            data.append({
-                "기업": name,
-                "퀀트점수(9)": 0,
-                "분석": '',
-            })
-
-        finally:
-            q.task_done()
-            time.sleep(2)
-    
-
-threads = []
-
-for _ in range(num_threads):
-    t = threading.Thread(target=process_moat)
-    t.start()
-    threads.append(t)
-
-for t in threads:
-    t.join()
-
-df = pl.DataFrame(data)
+            """
+
+
+def format_analysis(text):
+    # 줄 단위로 나눈 후, 각각에 대해 줄바꿈 적용
+    wrapped_lines = []
+    for line in text.strip().split('\n'):
+        # 줄의 시작 공백(들여쓰기) 보존
+        leading_spaces = len(line) - len(line.lstrip(' '))
+        indent = ' ' * leading_spaces
+
+        # bullet 유지되도록 첫 단어 확인
+        if line.lstrip().startswith(("-", "*", "•")) or line.lstrip()[:2].isdigit():
+            first_word = line.split()[0]
+            rest = ' '.join(line.split()[1:])
+            wrapped = textwrap.fill(rest, width=120 - len(indent) - len(first_word) - 1,
+                                    initial_indent=indent + first_word + ' ',
+                                    subsequent_indent=indent + ' ' * (len(first_word) + 1))
+        else:
+            wrapped = textwrap.fill(line, width=120,
+                                    initial_indent=indent,
+                                    subsequent_indent=indent)
+        wrapped_lines.append(wrapped)
+
+    # 최종 텍스트
+    return '\n'.join(wrapped_lines)
+
+
+async def analyze(prompt):
+    # - Return a single integer as the response output without any text explanation
+    response = await client.aio.models.generate_content(
+    model=model_id,
+    config=GenerateContentConfig(
+        tools=[google_search_tool],
+        response_modalities=["TEXT"],
+    ),
+    contents=prompt)
+    if not response.text:
+        raise ValueError("empty response")
+    usage = response.usage_metadata
+    return Completion(response.text, (usage and usage.prompt_token_count) or 0,
+                      ((usage and usage.candidates_token_count) or 0) + ((usage and usage.thoughts_token_count) or 0))
+
+
+# companies that passed a screening run, with their latest B-Score
+with ResultsStore() as store:
+    scores = store.company_scores()
+
+# only new companies and stale analyses cost a request
+cached, pending = cache.split(scores, prompt_template, model_id)
+for name, entry in cached.items():
+    data.append({"기업": name, "퀀트점수(9)": scores[name], "분석": format_analysis(entry['text'])})
+print(f"{len(cached)} analyses from cache, {len(pending)} to request")
+
+
+def save(name, completion):
+    # every analysis is written to cache/moat as it arrives, so a rerun resumes past it
+    cache.put(name, prompt_template, model_id, completion.text,
+              input_tokens=completion.input_tokens, output_tokens=completion.output_tokens, cost=dispatcher.cost(completion))
+    data.append({
+        "기업": name,
+        "퀀트점수(9)": scores[name],
+        "분석": format_analysis(completion.text),
+    })
+
+
+dispatcher = LLMDispatcher(model_id, quota, max_attempts=max_attempts, report_every=30)
+results = asyncio.run(dispatcher.run({name: prompt_template.format(name=name).strip() for name in pending}, analyze, save))
+print(dispatcher.summary())
+
+if stub is not None:
+    stub.stop()
+
+failed = [name for name, completion in results.items() if completion is None]
+if failed:
+    print(f"{len(failed)} companies failed and will be retried on the next run: {', '.join(failed)}")
+
+# 모든 회사가 실패하고 캐시도 비어 있으면 data가 비므로 스키마를 명시 (헤더만 있는 시트)
+df = pl.DataFrame(data, schema={"기업": pl.Utf8, "퀀트점수(9)": pl.Float64, "분석": pl.Utf8})
+
+# test/news.py가 모은 회사별 뉴스 해자 키워드 집계 (cache/news.db)가 있으면 시트에 추가
+if os.path.exists(NEWS_DB) and len(df):
+    with NewsStore() as news:
+        news_hits = news.keyword_table(list(scores)).select(
+            pl.col("company").alias("기업"), pl.col("articles").alias("뉴스 기사"), pl.col("hits").alias("해자 키워드"))
+    df = df.join(news_hits, on="기업", how="left")
 
 df_sorted = df.sort("퀀트점수(9)", descending = True)
 
-df_sorted.to_pandas().to_excel("moat_analysis.xlsx", index=False)
-
-wb = load_workbook("moat_analysis.xlsx")
-ws = wb.active
-
-for col in ['C']:
-    ws.column_dimensions[col].width = 200
-
-for row in range(2, ws.max_row + 1):
-    ws.row_dimensions[row].height = 500
-
-wb.save("moat_analysis.xlsx")
\ No newline at end of file
+# 열 너비/행 높이까지 한 번에 스트리밍으로 기록 (report_writer.py), 다시 열어 저장하지 않음
+write_report("moat_analysis.xlsx", df_sorted, widths={"분석": 200}, row_height=500, wrap=["분석"])
@@ -1,7 +1,13 @@
-import requests
-import json
-from dotenv import load_dotenv
 import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from results_store import ResultsStore
+from fetch_engine import FetchEngine, HostLimit
+from news_ingest import MOAT_KEYWORDS, NEWS_URL, NewsIngest, NewsStore
+from report_writer import write_report
+from stub_server import StubServer, newsapi_route
 
 load_dotenv()
 
@@ -9,54 +15,40 @@ load_dotenv()
 api_key = os.getenv("NEWSAPI_API_KEY")
 
 # Endpoint
-url = 'https://newsapi.org/v2/everything'
-
-moat_keywords = [
-    "brand strength",
-    "pricing power",
-    "economies of scale",
-    "dominant",
-    "switching costs",
-    "patent",
-    "leader",
-    "recurring revenue",
-    "sustainable",
-    "competitive",
-    "cost leadership",
-    "customer loyalty",
-    "network",
-    "margin",
-    "exclusive",
-    "regulatory",
-]
-
-# Combine keywords using OR, then prepend company name
-moat_query = " AND (" + " OR ".join(f'"{key}"' for key in moat_keywords) + ")"
-print(moat_query)
-
-# Parameters for Bloomberg finance news
-params = {
-    'q': 'Hyundai' + moat_query, #company name
-    'domains': 'bloomberg.com,reuters.com,wsj.com,cnbc.com,marketwatch.com,finance.yahoo.com,'
-    'hankyung.com,mk.co.kr,yna.co.kr,mt.co.kr,edaily.co.kr,asiae.co.kr,'
-    'ft.com,economist.com,asia.nikkei.com',
-    # 'language': 'en',
-    'pageSize': 1, # number of articles to return
-    'sortBy': 'relevance',
-    'apiKey': api_key
-}
-
-# Make the request
-response = requests.get(url, params=params)
-
-# Parse the JSON response
-data = response.json()
+url = NEWS_URL
+
+moat_keywords = MOAT_KEYWORDS
+
+# NEWS_STUB=1 answers from a local stub of the endpoint (stub_server.py) instead of newsapi.org
+stub = None
+limits = None
+if os.getenv("NEWS_STUB"):
+    stub = StubServer().start()
+    stub.route(*newsapi_route(per_company=200, keywords=moat_keywords, max_results=1000))
+    url = stub.url + '/v2/everything'
+    limits = {'127.0.0.1': HostLimit(rate=100, burst=50, max_concurrency=16)}
+
+# every company that passed a screening run
+with ResultsStore() as store:
+    companies = list(store.company_scores())
+
+# batched, paginated requests; articles deduplicated by URL in cache/news.db and scored once against moat_keywords
+with NewsStore() as news, FetchEngine(limits=limits) as engine:
+    ingest = NewsIngest(news, api_key, url, moat_keywords, engine=engine)
+    stats = ingest.run(companies)
+    table = news.keyword_table(companies, moat_keywords)
+
+if stub is not None:
+    stub.stop()
+
+print(f"{len(companies)} companies, {stats.get('requests', 0)} requests: {stats.get('articles', 0)} articles, "
+      f"{stats.get('new', 0)} new, {stats.get('duplicates', 0)} duplicates, {stats.get('errors', 0)} errors")
+for error in ingest.errors:
+    print(f" {error}")
 
 # Structured output
-for i, article in enumerate(data.get('articles', []), start=1):
-    print(f"{i}. {article['title']}")
-    print(f" Source: {article['source']['name']}")
-    print(f" Published At: {article['publishedAt']}")
-    print(f" Description: {article['description']}")
-    # print(f" Content: {article['content']}")
-    print(f" URL: {article['url']}\n")
\ No newline at end of file
+for i, row in enumerate(table.head(20).iter_rows(named=True), start=1):
+    print(f"{i}. {row['company']}: {row['hits']} keyword hits in {row['moat_articles']}/{row['articles']} articles")
+
+# per-company keyword table, also joined into the moat sheet by test/moat.py
+write_report("news_keywords.xlsx", table)
@@ -0,0 +1,119 @@
+
+# SPDX-FileCopyrightText: © 2025 Hyungsuk Choi <chs_3411@naver[dot]com>, University of Maryland
+# SPDX-License-Identifier: MIT
+
+# scoring.score_frame (vectorized) against the per-ticker buffett_score / momentum_score of buffett.py,
+# on random rows drawn around every threshold, with None, NaN and the bool EPS flags mixed in.
+#   python test/score_equivalence.py
+#   python test/score_equivalence.py --rows 200000 --seed 7
+
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from buffett import buffett_score, momentum_score
+from scoring import raw_metrics_frame, raw_metrics_row, score_frame
+
+NAN = float('nan')
+MISSING = [None, NAN]
+
+# the thresholds each input is compared against, hit exactly and just missed on either side
+BOUNDARIES = {
+    'de': [0, 0.5],
+    'cr': [1.5, 2.5],
+    'pbr': [0, 1.0, 1.5],
+    'div': [0.06, 0.08, 0.1, 0.3],
+    'eps': [0, 0.1, 0.3],
+    'icr': [5],
+    'mom': [-0.05, 0, 0.05, 0.1, 0.15],
+}
+# per / ind_per, roe / ind_roe and roa / ind_roa are drawn from one small pool so ties and the 1.2x band come up
+PAIRED = [-0.1, 0, 0.05, 0.1, 0.12, 0.2, 8, 10, 12, 15]
+
+BUFFETT_ARGS = ['de', 'cr', 'pbr', 'per', 'ind_per', 'roe', 'ind_roe', 'roa', 'ind_roa', 'eps', 'div', 'icr']
+
+
+def draw(rng, boundaries):
+    roll = rng.random()
+    if roll < 0.15:
+        return rng.choice(MISSING)
+    if roll < 0.55:
+        edge = rng.choice(boundaries)
+        return rng.choice([edge, edge + 1e-9, edge - 1e-9])
+    return round(rng.uniform(-1, 3), rng.choice([1, 2, 6]))
+
+
+def random_row(rng):
+    args = {name: draw(rng, BOUNDARIES[name]) for name in ('de', 'cr', 'pbr', 'div', 'icr')}
+    for name in ('per', 'ind_per', 'roe', 'ind_roe', 'roa', 'ind_roa'):
+        args[name] = rng.choice(MISSING) if rng.random() < 0.1 else rng.choice(PAIRED)
+    if args['per'] is not None and args['ind_per'] is not None and rng.random() < 0.1:
+        args['per'] = 1.2 * args['ind_per'] # upper edge of the "slightly overvalued" band
+    roll = rng.random()
+    args['eps'] = rng.choice([True, False]) if roll < 0.2 else draw(rng, BOUNDARIES['eps'])
+    momentum = [draw(rng, BOUNDARIES['mom']) for _ in range(3)]
+    return args, momentum, rng.choice([0, 1, 2])
+
+
+def edge_rows():
+    # hand-picked rows: all missing, all NaN, the bool EPS flags and each threshold exactly
+    blank = dict.fromkeys(BUFFETT_ARGS)
+    rows = [
+        (blank, [None] * 3, 0),
+        ({name: NAN for name in BUFFETT_ARGS}, [NAN] * 3, 0),
+        ({**blank, 'eps': True, 'div': 0.3}, [0.05, 0.1, 0.15], 1),
+        ({**blank, 'eps': False, 'div': 0.3}, [-0.05, -0.05, 0], 0),
+        ({**blank, 'eps': True, 'per': 12.0}, [None] * 3, 0),
+        ({'de': 0.5, 'cr': 1.5, 'pbr': 1.0, 'per': 10.0, 'ind_per': 12.0, 'roe': 0.2, 'ind_roe': 0.1,
+          'roa': 0.1, 'ind_roa': 0.1, 'eps': 0.1, 'div': 0.06, 'icr': 5.0}, [0.05, 0.1, 0.15], 2),
+        ({'de': 0, 'cr': 2.5, 'pbr': 1.5, 'per': 12.0, 'ind_per': 10.0, 'roe': 0.2, 'ind_roe': 0.1,
+          'roa': 0.2, 'ind_roa': 0.1, 'eps': 0.3, 'div': 0.3, 'icr': 5.0}, [0, 0, 0], 0),
+        ({'de': 0.1, 'cr': 2.0, 'pbr': 0, 'per': 15.0, 'ind_per': 10.0, 'roe': -0.1, 'ind_roe': 0.1,
+          'roa': NAN, 'ind_roa': 0.1, 'eps': -0.1, 'div': 0.08, 'icr': 4.999}, [-0.05, -0.05, 0], 1),
+        ({'de': 0.1, 'cr': 2.0, 'pbr': 1.2, 'per': 0.0, 'ind_per': 10.0, 'roe': 0.2, 'ind_roe': 0.1,
+          'roa': NAN, 'ind_roa': NAN, 'eps': 0.0, 'div': 0.1, 'icr': NAN}, [NAN, 0.2, -0.2], 0),
+    ]
+    return rows
+
+
+def scalar(args, momentum, cyclicality):
+    buffett = buffett_score(*(args[name] for name in BUFFETT_ARGS))
+    mom = momentum_score(*momentum)
+    return buffett, mom, buffett + mom + cyclicality
+
+
+def same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or abs(a - b) < 1e-9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50000, help="random rows on top of the hand-picked edge rows")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = edge_rows() + [random_row(rng) for _ in range(args.rows)]
+    expected, rows, skipped = [], [], 0
+    for metrics, momentum, cyclicality in cases:
+        try:
+            expected.append(scalar(metrics, momentum, cyclicality))
+        except TypeError: # the scalar code compares against a None it didn't guard (e.g. roa >= ind_roa=None)
+            skipped += 1
+            continue
+        rows.append(raw_metrics_row('T', *(metrics[name] for name in BUFFETT_ARGS), *momentum, cyclicality=cyclicality))
+
+    scored = score_frame(raw_metrics_frame(rows)).select('buffett', 'momentum', 'score').rows()
+    mismatches = [(row, want, got) for row, want, got in zip(rows, expected, scored)
+                  if not all(same(w, g) for w, g in zip(want, got))]
+    for row, want, got in mismatches[:10]:
+        print(f"{row}\n  scalar (buffett, momentum, score) {want}\n  score_frame                      {got}")
+    print(f"{len(rows)} rows compared ({skipped} the scalar code can't score), {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()